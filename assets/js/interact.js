@@ -1,6 +1,13 @@
 import { escapeHtml, showToast } from './utils.js';
 
+// 与服务端 INTERACT_CONFIG.batch_max_cids 保持一致
+const BATCH_STATS_MAX_CIDS = 200;
+
+// 每次加载的评论条数，服务端上限为 INTERACT_CONFIG.comments_max_page_size
+const COMMENTS_PAGE_SIZE = 20;
+
 let postCid = null;
+let nextCommentCursor = null;
 let els = {};
 
 export function initInteractListeners() {
@@ -47,11 +54,17 @@ async function updateListStats() {
     if (cids.size === 0) return;
 
     try {
-        const cidsParam = Array.from(cids).join(',');
-        const res = await fetch(`/api/interact/batch_stats?cids=${cidsParam}`);
-        if (!res.ok) return;
-
-        const data = await res.json();
+        // 服务端限制单次请求的 cid 数量，按批并发请求后合并
+        const cidList = Array.from(cids);
+        const batches = [];
+        for (let i = 0; i < cidList.length; i += BATCH_STATS_MAX_CIDS) {
+            batches.push(cidList.slice(i, i + BATCH_STATS_MAX_CIDS));
+        }
+        const responses = await Promise.all(batches.map(batch =>
+            fetch(`/api/interact/batch_stats?cids=${batch.join(',')}`)
+                .then(res => res.ok ? res.json() : {})
+        ));
+        const data = Object.assign({}, ...responses);
         
         // 更新 DOM
         statElements.forEach(el => {
@@ -105,15 +118,23 @@ async function loadStats() {
     }
 }
 
-async function loadComments() {
+/**
+ * 加载评论，reset 为 true 时从第一页重新加载，否则从 nextCommentCursor 继续加载下一页
+ */
+async function loadComments(reset = true) {
     try {
-        const res = await fetch(`/api/interact/comments?post_cid=${postCid}`);
+        let url = `/api/interact/comments?post_cid=${postCid}&limit=${COMMENTS_PAGE_SIZE}`;
+        if (!reset && nextCommentCursor) url += `&before_id=${nextCommentCursor}`;
+        const res = await fetch(url);
         if (!res.ok) return;
 
         const data = await res.json();
         
-        els.commentList.innerHTML = '';
-        if (!data.comments || data.comments.length === 0) {
+        if (reset) els.commentList.innerHTML = '';
+        els.commentList.querySelector('.comment-load-more')?.remove();
+        nextCommentCursor = data.next_cursor || null;
+
+        if (reset && (!data.comments || data.comments.length === 0)) {
             els.commentList.innerHTML = '<div class="no-comments">暂无评论</div>';
             return;
         }
@@ -137,6 +158,13 @@ async function loadComments() {
             `;
             els.commentList.appendChild(div);
         });
+
+        if (nextCommentCursor) {
+            const more = document.createElement('div');
+            more.className = 'comment-load-more';
+            more.textContent = '加载更多评论';
+            els.commentList.appendChild(more);
+        }
     } catch (e) {
         console.error("Load Comments Error:", e);
     }
@@ -209,6 +237,10 @@ function bindEvents() {
 
     if (els.commentList) {
         els.commentList.addEventListener('click', async (e) => {
+            if (e.target.classList.contains('comment-load-more')) {
+                await loadComments(false);
+                return;
+            }
             if (e.target.classList.contains('comment-delete')) {
                 const id = e.target.getAttribute('data-id');
                 if (confirm('确认删除此评论？')) {
@@ -9,9 +9,98 @@ DB_CONFIG = {
     "charset": "utf8mb4"
 }
 
+# 连接池参数，见 dao/pool.py
+DB_POOL_CONFIG = {
+    "min_size": 2,
+    "max_size": 20,
+    "max_lifetime": 3600,     # 秒，超过后连接被回收重建
+    "checkout_timeout": 10,   # 秒，池满时等待空闲连接的上限
+    "ping_interval": 30       # 秒，空闲超过该时长的连接借出前先 ping
+}
+
+# DBWatcher 变更来源:
+#   "feed" 消费 post_changes 变更队列；"poll" 按 posts.updated_at 轮询；
+#   "auto" 优先 feed，变更队列不可用时回退到 poll
+WATCHER_CONFIG = {
+    "mode": "auto",
+    "feed_interval": 0.5,     # 秒，feed 模式下队列为空时的等待间隔
+    "feed_batch_size": 500,
+    # 某篇文章的变更连续渲染失败达到该次数后放弃 (记录日志并确认)，避免阻塞后续变更
+    "feed_max_attempts": 5
+}
+
+# 静态页面批量渲染: workers > 1 且一次需要渲染的文章数不少于 parallel_threshold 时，
+# Markdown 转换分发到多进程 (链接解析与数据库写回仍在主进程)。
+# 默认 1 即在当前进程内顺序渲染；多核机器上先用 scripts/bench_markdown.py <n> <workers> 确认有收益再开启，
+# 为 None 时取 CPU 核数
+# cache_size 为 Markdown 渲染缓存的内存条目数，cache_dir 非空时同时缓存到该目录
+RENDER_CONFIG = {
+    "workers": 1,
+    "parallel_threshold": 16,
+    "cache_size": 2048,
+    "cache_dir": None
+}
+
+# URLManager 的 url_path <-> cid 内存缓存容量，negative_max_entries 为“查无此 URL”结果的容量
+URL_CACHE_CONFIG = {
+    "max_entries": 50000,
+    "negative_max_entries": 10000
+}
+
+# post_stats 计数器校正: 服务启动时执行一次，之后每 reconcile_interval 秒执行一次，为 0 时关闭
+STATS_CONFIG = {
+    "reconcile_interval": 3600,
+    "reconcile_batch_size": 500
+}
+
+# /api/interact/batch_stats: 单次请求的 cid 上限，以及按 cid 缓存统计结果的秒数和条目数
+# /api/interact/comments: 每页评论数的默认值和上限
+INTERACT_CONFIG = {
+    "batch_max_cids": 200,
+    "stats_cache_ttl": 5,
+    "stats_cache_size": 20000,
+    "comments_page_size": 20,
+    "comments_max_page_size": 100
+}
+
+# 点赞 write-behind 模式: 开启后点赞切换先在内存中合并，每 flush_interval_ms 毫秒批量写入
+# max_pending 为内存中待写入条目的上限，达到后新的点赞等待下一次写入
+LIKE_BUFFER_CONFIG = {
+    "enabled": False,
+    "flush_interval_ms": 200,
+    "max_pending": 10000
+}
+
+# 广场搜索引擎: "mysql" 使用 FULLTEXT (不可用时退回 LIKE)，"memory" 使用进程内倒排索引，
+# "auto" 在 posts 上没有 FULLTEXT 索引时使用进程内倒排索引
+SEARCH_CONFIG = {
+    "engine": "auto"
+}
+
+# mode: "threaded" 为每个连接一个线程；"asyncio" 由事件循环处理连接，
+# 路由处理函数在最多 executor_workers 个线程中执行，SSE 等待不占用线程
 SERVER_CONFIG = {
     "host": "127.0.0.1",
-    "port": 8080
+    "port": 8080,
+    "mode": "threaded",
+    "executor_workers": 32,
+    "max_request_body": 16 * 1024 * 1024,
+    # HTTP/1.1 持久连接: 空闲超时秒数与单连接最多处理的请求数
+    "keepalive_timeout": 15,
+    "max_keepalive_requests": 100
+}
+
+# 静态文件: stat 结果 (大小、修改时间、ETag) 在内存中缓存 stat_cache_ttl 秒，最多 stat_cache_size 条
+# 生成器写出的文件会立即刷新缓存，ttl 只影响由其他进程修改的文件
+# precompress 开启时生成器为文本类文件 (不小于 precompress_min_size 字节) 写出 .gz 与 .br (需安装 brotli) 副本，
+# 服务端按 Accept-Encoding 直接发送压缩副本
+STATIC_CONFIG = {
+    "stat_cache_ttl": 2,
+    "stat_cache_size": 10000,
+    "precompress": True,
+    "precompress_min_size": 256,
+    "gzip_level": 9,
+    "brotli_quality": 11
 }
 
 OPENAI_CONFIG = {
@@ -10,14 +10,11 @@ from core.url_manager import URLManager
 def _update_url_mapping(conn, cid: str):
     """内部辅助函数：计算并更新 URL 映射"""
     post_dao = MySQLPostDAO(conn)
-    owner_id = post_dao.get_field(cid, "owner_id")
-    title = post_dao.get_field(cid, "title")
-    category = post_dao.get_field(cid, "category")
-    
-    if not owner_id: 
+    row = post_dao.get_fields(cid, ("owner_id", "title", "category"))
+    if not row or not row["owner_id"]:
         return
+    owner_id, title, category = row["owner_id"], row["title"], row["category"]
 
-    user_dao = MySQLUserDAO(conn)
     with conn.cursor() as cur:
         cur.execute("SELECT username FROM users WHERE id = %s", (owner_id,))
         row = cur.fetchone()
@@ -33,6 +30,7 @@ def _update_url_mapping(conn, cid: str):
 
     map_dao = MySQLUrlMapDAO(conn)
     map_dao.upsert_mapping(cid, url_path)
+    mgr.set_mapping(cid, url_path)
 
 def post_list(token: str, count: int | None = None) -> list[str]:
     verify_token(token)
@@ -79,23 +77,17 @@ def post_get_full(token: str, cid: str) -> dict:
     try:
         dao = MySQLPostDAO(conn)
         
-        owner_id = dao.get_field(cid, "owner_id")
-        if owner_id != user_id:
+        row = dao.get_fields(cid, ("owner_id", "title", "category", "context", "description", "is_public"))
+        if not row or row["owner_id"] != user_id:
             raise PermissionError("Access denied")
-            
-        title = dao.get_field(cid, "title")
-        category = dao.get_field(cid, "category")
-        context = dao.get_field(cid, "context")
-        description = dao.get_field(cid, "description")
-        is_public = dao.get_field(cid, "is_public")
         
         return {
             "cid": cid,
-            "title": title,
-            "category": category,
-            "context": context,
-            "description": description,
-            "is_public": bool(is_public)
+            "title": row["title"],
+            "category": row["category"],
+            "context": row["context"],
+            "description": row["description"],
+            "is_public": bool(row["is_public"])
         }
     finally:
         conn.close()
@@ -167,8 +159,9 @@ def post_update(token: str, cid: str, field: str, value: str) -> bool:
         try:
             result = dao.update_field(cid, field, value)
         except pymysql.err.IntegrityError:
-            current_title = dao.get_field(cid, "title")
-            current_cat = dao.get_field(cid, "category")
+            current = dao.get_fields(cid, ("title", "category")) or {}
+            current_title = current.get("title")
+            current_cat = current.get("category")
             
             target_title = value if field == "title" else current_title
             target_cat = value if field == "category" else current_cat
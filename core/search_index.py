@@ -0,0 +1,272 @@
+import hashlib
+import heapq
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+# 拉丁字母/数字按词切分，CJK 连续片段切为二元组 (bigram)
+_LATIN = "0-9a-z\u00c0-\u024f"
+# 假名、CJK 统一汉字 (含扩展 A)、兼容汉字、韩文音节
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_TOKEN_RE = re.compile(f"[{_LATIN}]+|[{_CJK}]+")
+_LATIN_START = re.compile(f"[{_LATIN}]")
+
+# tf 以 uint8 存储，BM25 对高词频饱和，截断不影响排序
+_MAX_TF = 0xFF
+
+def tokenize(text: str) -> list[str]:
+    """小写后切词: 拉丁词整体作为一个词项，CJK 片段产生相邻两字的 bigram，单字片段保留单字。"""
+    tokens = []
+    if not text:
+        return tokens
+    for m in _TOKEN_RE.finditer(text.lower()):
+        run = m.group()
+        if _LATIN_START.match(run):
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+class _Postings:
+    """一个词项的倒排表: 按 doc_id 递增的 doc_id 数组与对应的词频数组。"""
+    __slots__ = ("docs", "tfs")
+
+    def __init__(self):
+        self.docs = array("I")
+        self.tfs = array("B")
+
+    def tf_of(self, doc_id: int) -> int:
+        i = bisect_left(self.docs, doc_id)
+        if i < len(self.docs) and self.docs[i] == doc_id:
+            return self.tfs[i]
+        return 0
+
+class SearchIndex:
+    """
+    公开文章的进程内倒排索引，供 MySQL FULLTEXT 不可用时的广场搜索使用。
+    - 文档以递增的 doc_id 编号，更新 = 删除旧文档 + 追加新文档，因此倒排表只需追加即保持有序
+    - 删除只做标记，失效文档超过一定比例时整体压缩
+    - 多个查询词项取交集 (AND)，按 BM25 打分
+    - 拉丁查询词按前缀匹配 (与 SQL 的子串匹配一致，q=pyth 能命中 python)，在有序词表上二分查找
+    由 DBWatcher 在渲染和删除文章时增量维护；首次全量扫描完成前 ready 为 False。
+    """
+    _instance = None
+
+    K1 = 1.2
+    B = 0.75
+    # 失效文档数超过存活文档数的该比例 (且不少于 COMPACT_MIN) 时压缩
+    COMPACT_RATIO = 0.25
+    COMPACT_MIN = 1000
+    # 一个前缀最多展开的词项数，超过时交给 SQL 检索
+    PREFIX_MAX_TERMS = 64
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SearchIndex, cls).__new__(cls)
+            cls._instance._init_state()
+        return cls._instance
+
+    def _init_state(self):
+        self._lock = threading.Lock()
+        self._postings: dict[str, _Postings] = {}
+        # 有序的拉丁词项表，用于前缀查找
+        self._latin_terms: list[str] = []
+        self._cids: list[str | None] = []
+        self._lengths = array("I")
+        self._doc_by_cid: dict[str, int] = {}
+        # 文章内容摘要，内容未变的重复更新 (如级联重渲染) 直接跳过
+        self._digests: dict[str, bytes] = {}
+        self._total_len = 0
+        self._dead = 0
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._doc_by_cid)
+
+    def clear(self):
+        with self._lock:
+            self._init_state()
+
+    def mark_ready(self):
+        self.ready = True
+
+    @staticmethod
+    def _digest(title, description, context) -> bytes:
+        h = hashlib.md5()
+        for part in (title, description, context):
+            h.update((part or "").encode("utf-8"))
+            h.update(b"\0")
+        return h.digest()
+
+    def update_post(self, data: dict) -> None:
+        """按文章数据 (含 cid, title, description, context, is_public) 更新索引，非公开文章从索引中移除。"""
+        cid = data["cid"]
+        if not data.get("is_public"):
+            self.remove_post(cid)
+            return
+        digest = self._digest(data.get("title"), data.get("description"), data.get("context"))
+        if self._digests.get(cid) == digest:
+            return
+
+        # 标题计入两次，提高标题命中的权重
+        tokens = tokenize(data.get("title") or "") * 2
+        tokens += tokenize(data.get("description") or "")
+        tokens += tokenize(data.get("context") or "")
+        counts = Counter(tokens)
+
+        with self._lock:
+            self._remove_locked(cid)
+            doc_id = len(self._cids)
+            self._cids.append(cid)
+            self._lengths.append(len(tokens))
+            self._doc_by_cid[cid] = doc_id
+            self._digests[cid] = digest
+            self._total_len += len(tokens)
+            postings_map = self._postings
+            for term, tf in counts.items():
+                postings = postings_map.get(term)
+                if postings is None:
+                    postings = postings_map[term] = _Postings()
+                    if _LATIN_START.match(term):
+                        insort(self._latin_terms, term)
+                postings.docs.append(doc_id)
+                postings.tfs.append(tf if tf < _MAX_TF else _MAX_TF)
+
+    def remove_post(self, cid: str) -> None:
+        with self._lock:
+            self._remove_locked(cid)
+
+    def _remove_locked(self, cid: str) -> None:
+        doc_id = self._doc_by_cid.pop(cid, None)
+        self._digests.pop(cid, None)
+        if doc_id is None:
+            return
+        self._cids[doc_id] = None
+        self._total_len -= self._lengths[doc_id]
+        self._dead += 1
+        if self._dead >= self.COMPACT_MIN and self._dead > len(self._doc_by_cid) * self.COMPACT_RATIO:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        """去掉失效文档并重新编号，倒排表中的 doc_id 保持递增。"""
+        remap = {}
+        cids, lengths = [], array("I")
+        for old_id, cid in enumerate(self._cids):
+            if cid is None:
+                continue
+            remap[old_id] = len(cids)
+            cids.append(cid)
+            lengths.append(self._lengths[old_id])
+
+        postings_map = {}
+        for term, postings in self._postings.items():
+            new = _Postings()
+            for doc_id, tf in zip(postings.docs, postings.tfs):
+                new_id = remap.get(doc_id)
+                if new_id is not None:
+                    new.docs.append(new_id)
+                    new.tfs.append(tf)
+            if new.docs:
+                postings_map[term] = new
+
+        self._postings = postings_map
+        self._latin_terms = sorted(t for t in postings_map if _LATIN_START.match(t))
+        self._cids = cids
+        self._lengths = lengths
+        self._doc_by_cid = {cid: i for i, cid in enumerate(cids)}
+        self._dead = 0
+
+    def search(self, keyword: str, offset: int = 0, limit: int = 15) -> tuple[list[str], int] | None:
+        """
+        返回 (按相关度排序的当前页 cid 列表, 命中总数)。
+        查询中含单个 CJK 字 (无法由 bigram 索引匹配)、拉丁词不是任何词项的前缀 (可能是词中间的子串)、
+        前缀展开过多或没有可检索的词项时返回 None，由调用方退回 SQL。
+        """
+        terms = list(dict.fromkeys(tokenize(keyword)))
+        if not terms or any(len(t) == 1 and not _LATIN_START.match(t) for t in terms):
+            return None
+
+        with self._lock:
+            postings = []
+            for t in terms:
+                if _LATIN_START.match(t):
+                    p = self._prefix_postings_locked(t)
+                    if p is None:
+                        return None
+                else:
+                    p = self._postings.get(t)
+                    if p is None:
+                        return [], 0
+                postings.append(p)
+            live = len(self._doc_by_cid)
+            if not live:
+                return [], 0
+            avg_len = self._total_len / live
+            # 从最短的倒排表出发，逐个在其余倒排表中二分查找
+            postings.sort(key=lambda p: len(p.docs))
+            # df 含尚未压缩的失效文档，对 idf 的影响可以忽略
+            idfs = [math.log(1 + (live - len(p.docs) + 0.5) / (len(p.docs) + 0.5)) for p in postings]
+            k1, b = self.K1, self.B
+            # norm = k1 * (1 - b + b * len / avg_len) = norm_base + len * norm_scale
+            norm_base = k1 * (1 - b)
+            norm_scale = k1 * b / avg_len
+            cids, lengths = self._cids, self._lengths
+
+            scored = []
+            rarest, others = postings[0], list(zip(postings[1:], idfs[1:]))
+            w0 = idfs[0] * (k1 + 1)
+            for doc_id, tf0 in zip(rarest.docs, rarest.tfs):
+                cid = cids[doc_id]
+                if cid is None:
+                    continue
+                norm = norm_base + lengths[doc_id] * norm_scale
+                score = w0 * tf0 / (tf0 + norm)
+                for p, idf in others:
+                    tf = p.tf_of(doc_id)
+                    if not tf:
+                        break
+                    score += idf * (k1 + 1) * tf / (tf + norm)
+                else:
+                    scored.append((score, doc_id, cid))
+
+        total = len(scored)
+        top = heapq.nlargest(offset + limit, scored)
+        return [cid for _, _, cid in top[offset:offset + limit]], total
+
+    def _prefix_postings_locked(self, prefix: str) -> _Postings | None:
+        """以 prefix 开头的所有词项合并后的倒排表 (词频相加)，没有匹配或匹配过多时返回 None。"""
+        terms = self._latin_terms
+        start = bisect_left(terms, prefix)
+        end = start
+        while end < len(terms) and terms[end].startswith(prefix):
+            end += 1
+            if end - start > self.PREFIX_MAX_TERMS:
+                return None
+        if end == start:
+            return None
+        if end - start == 1:
+            return self._postings[terms[start]]
+
+        merged = Counter()
+        for term in terms[start:end]:
+            p = self._postings[term]
+            for doc_id, tf in zip(p.docs, p.tfs):
+                merged[doc_id] += tf
+        result = _Postings()
+        for doc_id in sorted(merged):
+            tf = merged[doc_id]
+            result.docs.append(doc_id)
+            result.tfs.append(tf if tf < _MAX_TF else _MAX_TF)
+        return result
+
+    def memory_usage(self) -> int:
+        """估算倒排表占用的字节数 (数组数据 + 词项字符串)。"""
+        size = 0
+        for term, p in self._postings.items():
+            size += len(term.encode("utf-8")) + p.docs.itemsize * len(p.docs) + p.tfs.itemsize * len(p.tfs)
+        return size
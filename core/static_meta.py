@@ -0,0 +1,132 @@
+import hashlib
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from core.config import STATIC_CONFIG
+
+def content_digest(data: bytes) -> str:
+    """静态文件的内容摘要，作为强 ETag 使用。"""
+    return hashlib.sha1(data).hexdigest()
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 使用弱比较: 逐个比较逗号分隔的实体标签，忽略 W/ 前缀"""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+class StaticMeta:
+    """一个静态文件的元数据快照。"""
+    __slots__ = ("size", "mtime_ns", "digest", "etag", "last_modified", "checked_at")
+
+    def __init__(self, size: int, mtime_ns: int, digest: str, checked_at: float):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.digest = digest
+        self.etag = f'"{digest}"'
+        self.last_modified = formatdate(mtime_ns / 1e9, usegmt=True)
+        self.checked_at = checked_at
+
+    @property
+    def mtime(self) -> int:
+        """秒级修改时间 (HTTP 日期的精度)"""
+        return self.mtime_ns // 1_000_000_000
+
+class StaticMetaCache:
+    """
+    静态文件元数据缓存，生成器与静态文件服务共用 (进程内单例)。
+    - 生成器写出文件时调用 record() 登记内容摘要，ETag 无需在请求时读取文件计算
+    - 服务端 get() 在 ttl 内直接返回缓存的 stat 结果；过期后重新 stat，
+      大小或修改时间变化 (文件被其他进程改写) 时重新计算摘要
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(StaticMetaCache, cls).__new__(cls)
+            cls._instance._init_state()
+        return cls._instance
+
+    def _init_state(self):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, StaticMeta] = OrderedDict()
+        # 不存在的路径 -> 检查时间 (如未生成压缩副本的文件)，同样在 ttl 内有效
+        self._missing: dict[str, float] = {}
+        self.ttl = STATIC_CONFIG["stat_cache_ttl"]
+        self.max_entries = STATIC_CONFIG["stat_cache_size"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._missing.clear()
+
+    def record(self, path: str, digest: str) -> None:
+        """登记刚写出的文件的内容摘要 (需在文件写入完成后调用)。"""
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.forget(path)
+            return
+        self._put(path, StaticMeta(st.st_size, st.st_mtime_ns, digest, time.monotonic()))
+
+    def forget(self, path: str) -> None:
+        """丢弃缓存，下次 get() 重新 stat"""
+        path = os.path.abspath(path)
+        with self._lock:
+            self._entries.pop(path, None)
+            self._missing.pop(path, None)
+
+    def _put(self, path: str, meta: StaticMeta) -> None:
+        with self._lock:
+            self._missing.pop(path, None)
+            self._entries[path] = meta
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, path: str) -> StaticMeta | None:
+        """返回普通文件的元数据，文件不存在或不是普通文件时返回 None。"""
+        path = os.path.abspath(path)
+        now = time.monotonic()
+        with self._lock:
+            meta = self._entries.get(path)
+            if meta is not None and now - meta.checked_at < self.ttl:
+                self._entries.move_to_end(path)
+                return meta
+            checked_at = self._missing.get(path)
+            if checked_at is not None and now - checked_at < self.ttl:
+                return None
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._entries.pop(path, None)
+                if len(self._missing) >= self.max_entries:
+                    self._missing.clear()
+                self._missing[path] = now
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+
+        if meta is not None and meta.size == st.st_size and meta.mtime_ns == st.st_mtime_ns:
+            meta.checked_at = now
+            return meta
+
+        try:
+            digest = file_digest(path)
+        except OSError:
+            return None
+        meta = StaticMeta(st.st_size, st.st_mtime_ns, digest, now)
+        self._put(path, meta)
+        return meta
@@ -1,18 +1,99 @@
+import threading
 import urllib.parse
-from core.config import SERVER_CONFIG
+import pymysql.err
+from collections import OrderedDict
+from core.config import SERVER_CONFIG, URL_CACHE_CONFIG
 from dao.factory import create_connection
 from dao.url_map_dao import MySQLUrlMapDAO
 
+# 负缓存中表示“数据库中不存在”的标记
+_MISSING = object()
+
+class _UrlCache:
+    """
+    有界的 url_path <-> cid 双向 LRU 缓存。
+    正向与反向映射总是成对写入/删除；查不到的 url_path 与 cid 进入独立的负缓存。
+    """
+
+    def __init__(self, max_entries: int, negative_max_entries: int):
+        self.max_entries = max_entries
+        self.negative_max_entries = negative_max_entries
+        self._by_cid: OrderedDict[str, str] = OrderedDict()
+        self._by_url: dict[str, str] = {}
+        self._negative: OrderedDict[tuple[str, str], bool] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_url(self, cid: str):
+        """返回 url_path，已知不存在时返回 _MISSING，未缓存时返回 None。"""
+        with self._lock:
+            url_path = self._by_cid.get(cid)
+            if url_path is not None:
+                self._by_cid.move_to_end(cid)
+                return url_path
+            return _MISSING if ("cid", cid) in self._negative else None
+
+    def get_cid(self, url_path: str):
+        with self._lock:
+            cid = self._by_url.get(url_path)
+            if cid is not None:
+                self._by_cid.move_to_end(cid)
+                return cid
+            return _MISSING if ("url", url_path) in self._negative else None
+
+    def put(self, cid: str, url_path: str) -> None:
+        with self._lock:
+            self._drop_locked(cid)
+            stale_cid = self._by_url.get(url_path)
+            if stale_cid is not None:
+                self._drop_locked(stale_cid)
+            self._negative.pop(("cid", cid), None)
+            self._negative.pop(("url", url_path), None)
+            self._by_cid[cid] = url_path
+            self._by_url[url_path] = cid
+            while len(self._by_cid) > self.max_entries:
+                old_cid, old_url = self._by_cid.popitem(last=False)
+                self._by_url.pop(old_url, None)
+
+    def put_missing(self, kind: str, key: str) -> None:
+        with self._lock:
+            self._negative[(kind, key)] = True
+            self._negative.move_to_end((kind, key))
+            while len(self._negative) > self.negative_max_entries:
+                self._negative.popitem(last=False)
+
+    def drop(self, cid: str) -> str | None:
+        with self._lock:
+            return self._drop_locked(cid)
+
+    def _drop_locked(self, cid: str) -> str | None:
+        url_path = self._by_cid.pop(cid, None)
+        if url_path is not None and self._by_url.get(url_path) == cid:
+            del self._by_url[url_path]
+        return url_path
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_cid.clear()
+            self._by_url.clear()
+            self._negative.clear()
+
+    def __len__(self) -> int:
+        return len(self._by_cid)
+
 class URLManager:
     """
     负责路径映射和 URL 解析。
+    url_path <-> cid 的查询优先走进程内缓存；本进程内的映射写入和文章删除会同步更新缓存。
     """
     _instance = None
-    _cid_map: dict[str, str] = {} # cid -> rel_path
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(URLManager, cls).__new__(cls)
+            cls._instance._cache = _UrlCache(
+                URL_CACHE_CONFIG["max_entries"],
+                URL_CACHE_CONFIG["negative_max_entries"]
+            )
         return cls._instance
 
     def safe_title(self, title: str) -> str:
@@ -36,31 +117,93 @@ class URLManager:
             
         return safe
 
-    def register_mapping(self, cid: str, username: str, category: str, title: str) -> str:
+    def warm_cache(self) -> int:
+        """启动时批量加载映射到缓存，返回加载条数。"""
+        conn = create_connection()
+        try:
+            map_dao = MySQLUrlMapDAO(conn)
+            rows = map_dao.list_mappings(self._cache.max_entries)
+        finally:
+            conn.close()
+        # 按 id 倒序读取，反向写入使最新的映射处于 LRU 尾部
+        for cid, url_path in reversed(rows):
+            self._cache.put(cid, url_path)
+        print(f"[URL] Cache warmed with {len(rows)} mappings.")
+        return len(rows)
+
+    def set_mapping(self, cid: str, url_path: str) -> None:
+        """映射已写入数据库后同步更新缓存。"""
+        self._cache.put(cid, url_path)
+
+    def register_mapping(self, cid: str, username: str, category: str, title: str) -> str | None:
         """
         生成路径并确保写入数据库。
-        返回相对路径前缀: username/category/safe-title
+        返回相对路径前缀: username/category/safe-title；路径已被其他文章占用 (冲突未写入) 时返回 None
         """
-        s_cat = self.safe_title(category)
-        s_title = self.safe_title(title)
-        
-        rel_path = f"{username}/{s_cat}/{s_title}"
-        self._cid_map[cid] = rel_path
+        return self.register_mappings([(cid, username, category, title)])[0]
+
+    def register_mappings(self, entries: list[tuple[str, str, str, str]]) -> list[str | None]:
+        """
+        批量生成路径 [(cid, username, category, title), ...]，按输入顺序返回相对路径前缀。
+        只有与缓存中映射不同的条目才会写库，并合并为一次批量 upsert。
+        url_path 与其他文章冲突而未写入的条目对应位置为 None，调用方不应使用该路径。
+        """
+        rel_paths = []
+        pending = {}
+        written = {}
+        for cid, username, category, title in entries:
+            s_cat = self.safe_title(category)
+            s_title = self.safe_title(title)
+            rel_path = f"{username}/{s_cat}/{s_title}"
+            rel_paths.append(rel_path)
 
-        # 持久化到数据库，确保 external_url 可以被查到
-        conn = create_connection()
-        try:
-            map_dao = MySQLUrlMapDAO(conn)
             # 存入绝对路径 /username/cat/title.html
             url_path = f"/{rel_path}.html"
-            map_dao.upsert_mapping(cid, url_path)
-        finally:
-            conn.close()
+            if self._cache.get_url(cid) != url_path:
+                pending[cid] = url_path
+
+        if pending:
+            # 持久化到数据库，确保 external_url 可以被查到
+            conn = create_connection()
+            try:
+                map_dao = MySQLUrlMapDAO(conn)
+                try:
+                    map_dao.upsert_mappings(list(pending.items()))
+                except pymysql.err.IntegrityError:
+                    # 批量中有 url_path 冲突时逐条写入，跳过冲突的条目
+                    conn.rollback()
+                    for cid, url_path in pending.items():
+                        try:
+                            map_dao.upsert_mapping(cid, url_path)
+                        except pymysql.err.IntegrityError:
+                            conn.rollback()
+                # 新 cid 的 url_path 已被占用时 ON DUPLICATE KEY UPDATE 命中的是对方的行，
+                # 不会报错也不会写入，因此回读确认哪些映射真正落库
+                stored = map_dao.get_urls_by_cids(list(pending))
+                for cid, url_path in pending.items():
+                    if stored.get(cid) == url_path:
+                        written[cid] = url_path
+                    else:
+                        print(f"[URL] Mapping conflict for {cid} -> {url_path}: path owned by another post")
+            finally:
+                conn.close()
+            for cid, url_path in written.items():
+                self.set_mapping(cid, url_path)
 
-        return rel_path
+        return [
+            rel_path if cid not in pending or written.get(cid) == f"/{rel_path}.html" else None
+            for (cid, *_), rel_path in zip(entries, rel_paths)
+        ]
 
     def remove_mapping(self, cid: str) -> str | None:
-        return self._cid_map.pop(cid, None)
+        """文章删除后清除缓存中的映射，返回原相对路径前缀。"""
+        url_path = self._cache.drop(cid)
+        if url_path is None:
+            return None
+        return url_path[1:-len(".html")]
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
 
     def get_cid_from_external_url(self, url: str) -> str | None:
         """解析外界传入的完整 URL，返回对应的 CID。"""
@@ -80,27 +223,43 @@ class URLManager:
             
         # 提取路径并解码 (防止数据库存的是中文，但 URL 是编码过的情况)
         url_path = urllib.parse.unquote(parsed.path)
+
+        cached = self._cache.get_cid(url_path)
+        if cached is _MISSING:
+            return None
+        if cached is not None:
+            return cached
         
         # 查库
         conn = create_connection()
         try:
             map_dao = MySQLUrlMapDAO(conn)
             cid = map_dao.get_cid_by_url(url_path)
-            return cid
         finally:
             conn.close()
+        if cid:
+            self._cache.put(cid, url_path)
+        else:
+            self._cache.put_missing("url", url_path)
+        return cid
 
     def get_url_by_cid(self, cid: str) -> str | None:
         """通过 CID 查询完整的 URL 路径"""
-        # 优先查内存
-        if cid in self._cid_map:
-            return "/" + self._cid_map[cid] + ".html"
+        cached = self._cache.get_url(cid)
+        if cached is _MISSING:
+            return None
+        if cached is not None:
+            return cached
 
         # 查库
         conn = create_connection()
         try:
             map_dao = MySQLUrlMapDAO(conn)
             path = map_dao.get_url_by_cid(cid)
-            return path if path else None
         finally:
-            conn.close()
\ No newline at end of file
+            conn.close()
+        if path:
+            self._cache.put(cid, path)
+        else:
+            self._cache.put_missing("cid", cid)
+        return path if path else None
@@ -0,0 +1,51 @@
+import pymysql.connections
+
+# ack_changes 单条 DELETE 语句中的 id 数上限
+ACK_CHUNK = 1000
+
+class MySQLPostChangeDAO:
+    """消费 post_changes 变更队列（由 posts 触发器写入）。"""
+
+    def __init__(self, conn: pymysql.connections.Connection):
+        self.conn = conn
+
+    def fetch_changes(self, limit: int) -> list[tuple]:
+        """按 id 顺序取出最早的 limit 条变更: (id, cid, op, old_owner_id, old_title, old_category)"""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT id, cid, op, old_owner_id, old_title, old_category "
+                "FROM post_changes ORDER BY id LIMIT %s",
+                (limit,),
+            )
+            rows = cur.fetchall()
+        return list(rows) if rows else []
+
+    def ack_changes(self, ids: list[int]) -> int:
+        """
+        确认（删除）给定 id 的变更。
+        按实际取到的 id 删除而不是按 id 范围: 自增 id 的提交顺序可能与分配顺序不同，
+        较小 id 的事件可能在更大 id 的批次取出之后才提交，范围删除会把它未经处理就删掉。
+        """
+        deleted = 0
+        with self.conn.cursor() as cur:
+            for i in range(0, len(ids), ACK_CHUNK):
+                chunk = ids[i:i + ACK_CHUNK]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cur.execute(f"DELETE FROM post_changes WHERE id IN ({placeholders})", chunk)
+                deleted += cur.rowcount
+        self.conn.commit()
+        return deleted
+
+    def get_change_ids(self, up_to_id: int) -> list[int]:
+        """当前已提交、id 不大于 up_to_id 的变更 id"""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT id FROM post_changes WHERE id <= %s ORDER BY id", (up_to_id,))
+            rows = cur.fetchall()
+        return [r[0] for r in rows] if rows else []
+
+    def get_last_change_id(self) -> int:
+        """当前队列中最大的 id，队列为空时为 0。"""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM post_changes")
+            row = cur.fetchone()
+        return row[0] if row else 0
@@ -1,12 +1,13 @@
+import threading
 import pymysql
-from core.config import DB_CONFIG
+from core.config import DB_CONFIG, DB_POOL_CONFIG
 from dao.driver import get_mysql_connection
+from dao.pool import ConnectionPool, PooledConnection
 
-def create_connection() -> pymysql.connections.Connection:
-    """
-    根据 core/config.py 的配置创建一个新的数据库连接。
-    调用者有责任在使用完毕后关闭连接。
-    """
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+def _connect() -> pymysql.connections.Connection:
     return get_mysql_connection(
         host=DB_CONFIG["host"],
         port=DB_CONFIG["port"],
@@ -14,4 +15,30 @@ def create_connection() -> pymysql.connections.Connection:
         password=DB_CONFIG["password"],
         database=DB_CONFIG["database"],
         charset=DB_CONFIG["charset"]
-    )
\ No newline at end of file
+    )
+
+def get_pool() -> ConnectionPool:
+    """获取进程内共享的连接池，首次调用时按 DB_POOL_CONFIG 创建并预热。"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(_connect, **DB_POOL_CONFIG)
+                pool.prefill()
+                _pool = pool
+    return _pool
+
+def close_pool() -> None:
+    """关闭连接池（进程退出时调用）。"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def create_connection() -> PooledConnection:
+    """
+    从连接池借出一个数据库连接。
+    调用者有责任在使用完毕后调用 close()，连接会被归还到池中而不是真正断开。
+    """
+    return get_pool().acquire()
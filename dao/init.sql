@@ -4,6 +4,8 @@ CREATE DATABASE IF NOT EXISTS `megacite` DEFAULT CHARACTER SET = utf8mb4 COLLATE
 USE `megacite`;
 
 -- 为避免重复执行报错，先删除可能已存在的表（按外键依赖顺序）
+DROP TABLE IF EXISTS post_changes;
+DROP TABLE IF EXISTS post_stats;
 DROP TABLE IF EXISTS comments;
 DROP TABLE IF EXISTS likes;
 DROP TABLE IF EXISTS url_mappings;
@@ -30,6 +32,8 @@ CREATE TABLE auth_platforms (
     CONSTRAINT fk_auth_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- 全文索引在创建时固化停用词表: 关闭后 ngram 才会收录含 "a"、"in"、"is" 等停用词的双字组
+SET SESSION innodb_ft_enable_stopword = OFF;
 CREATE TABLE posts (
     id BIGINT PRIMARY KEY AUTO_INCREMENT,
     cid VARCHAR(32) UNIQUE NOT NULL,
@@ -40,11 +44,43 @@ CREATE TABLE posts (
     category VARCHAR(255) NOT NULL DEFAULT 'default',
     date DATE NOT NULL,
     is_public BOOLEAN NOT NULL DEFAULT FALSE,
+    -- 任一字段变化时由 MySQL 自动刷新，供 DBWatcher 增量扫描
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
     -- 确保同一个用户在同一个 category 下的 title 不重复
     UNIQUE KEY ux_owner_category_title (owner_id, category, title),
+    INDEX idx_posts_updated_at (updated_at),
+    -- 搜索用全文索引，ngram 分词以支持中文；MATCH 的列顺序须与此一致
+    -- 建表前已关闭停用词 (见上方 SET SESSION)，否则含英文停用词的 ngram (如 "is"、"in") 不会被索引
+    FULLTEXT INDEX ft_posts_search (title, description, `context`) WITH PARSER ngram,
     CONSTRAINT fk_post_owner FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- 文章变更队列 (outbox): 由 posts 上的触发器写入，DBWatcher 按 id 顺序消费并删除已处理的记录
+-- 旧值列记录变更前的 owner/title/category，用于删除旧的静态文件
+-- 注意: 由外键级联 (删除用户) 引起的删除不会触发触发器
+CREATE TABLE post_changes (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    cid VARCHAR(32) NOT NULL,
+    op CHAR(1) NOT NULL,  -- I / U / D
+    old_owner_id BIGINT DEFAULT NULL,
+    old_title VARCHAR(255) DEFAULT NULL,
+    old_category VARCHAR(255) DEFAULT NULL,
+    created_at DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TRIGGER trg_posts_after_insert AFTER INSERT ON posts FOR EACH ROW
+    INSERT INTO post_changes (cid, op) VALUES (NEW.cid, 'I');
+
+-- updated_at 仅在某列实际变化时刷新，借此过滤掉无变化的 UPDATE
+CREATE TRIGGER trg_posts_after_update AFTER UPDATE ON posts FOR EACH ROW
+    INSERT INTO post_changes (cid, op, old_owner_id, old_title, old_category)
+    SELECT OLD.cid, 'U', OLD.owner_id, OLD.title, OLD.category FROM DUAL
+    WHERE NOT (OLD.updated_at <=> NEW.updated_at);
+
+CREATE TRIGGER trg_posts_after_delete AFTER DELETE ON posts FOR EACH ROW
+    INSERT INTO post_changes (cid, op, old_owner_id, old_title, old_category)
+    VALUES (OLD.cid, 'D', OLD.owner_id, OLD.title, OLD.category);
+
 CREATE TABLE post_references (
     id BIGINT PRIMARY KEY AUTO_INCREMENT,
     post_cid VARCHAR(32) NOT NULL,
@@ -79,9 +115,20 @@ CREATE TABLE comments (
     post_cid VARCHAR(32) NOT NULL,
     content TEXT NOT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    -- 评论按 (created_at, id) 游标分页
+    INDEX idx_comments_post_created (post_cid, created_at, id),
     CONSTRAINT fk_comment_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     CONSTRAINT fk_comment_post FOREIGN KEY (post_cid) REFERENCES posts(cid) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- 点赞/评论计数器: 由 interact_dao 在写入 likes / comments 的同一事务内维护
+-- 偏差由 interact_dao.reconcile_post_stats 定期校正
+CREATE TABLE post_stats (
+    post_cid VARCHAR(32) PRIMARY KEY,
+    like_count INT NOT NULL DEFAULT 0,
+    comment_count INT NOT NULL DEFAULT 0,
+    CONSTRAINT fk_stats_post FOREIGN KEY (post_cid) REFERENCES posts(cid) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 ALTER USER 'root'@'localhost' IDENTIFIED BY '114514';
 FLUSH PRIVILEGES;
\ No newline at end of file
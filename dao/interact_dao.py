@@ -1,6 +1,33 @@
+import time
+import pymysql
 from dao.factory import create_connection
+from dao.like_buffer import LikeWriteBuffer
 from dao.models import Like, Comment
 
+# ER_LOCK_DEADLOCK: InnoDB 选中当前事务作为死锁牺牲者并已将其回滚
+_ER_LOCK_DEADLOCK = 1213
+# 死锁后整个事务的最大执行次数
+DEADLOCK_RETRIES = 3
+
+# 启用 write-behind 模式后的点赞缓冲，为 None 时点赞同步写入
+_like_buffer: LikeWriteBuffer | None = None
+
+def enable_like_buffer(flush_interval_ms: int = 200, max_pending: int = 10000) -> None:
+    """开启点赞 write-behind 模式: toggle_like 只写内存，后台线程批量落库。"""
+    global _like_buffer
+    if _like_buffer is not None:
+        return
+    buffer = LikeWriteBuffer(flush_interval_ms / 1000, max_pending)
+    buffer.start()
+    _like_buffer = buffer
+
+def disable_like_buffer() -> None:
+    """关闭 write-behind 模式，并写入缓冲中剩余的点赞。"""
+    global _like_buffer
+    buffer, _like_buffer = _like_buffer, None
+    if buffer is not None:
+        buffer.close()
+
 def init_interact_tables():
     """初始化交互所需的数据库表（如果不存在）"""
     conn = create_connection()
@@ -25,23 +52,78 @@ def init_interact_tables():
                 post_cid VARCHAR(32) NOT NULL,
                 content TEXT NOT NULL,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_comments_post_created (post_cid, created_at, id),
                 CONSTRAINT fk_comment_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
                 CONSTRAINT fk_comment_post FOREIGN KEY (post_cid) REFERENCES posts(cid) ON DELETE CASCADE
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
         """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS post_stats (
+                post_cid VARCHAR(32) PRIMARY KEY,
+                like_count INT NOT NULL DEFAULT 0,
+                comment_count INT NOT NULL DEFAULT 0,
+                CONSTRAINT fk_stats_post FOREIGN KEY (post_cid) REFERENCES posts(cid) ON DELETE CASCADE
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """)
         conn.commit()
     finally:
         cursor.close()
         conn.close()
 
+def _bump_stats(cursor, post_cid: str, likes: int = 0, comments: int = 0):
+    """在调用方的事务内调整 post_stats 计数器，计数不会减到 0 以下。"""
+    sql = """
+        INSERT INTO post_stats (post_cid, like_count, comment_count)
+        VALUES (%s, GREATEST(%s, 0), GREATEST(%s, 0))
+        ON DUPLICATE KEY UPDATE
+            like_count = GREATEST(like_count + %s, 0),
+            comment_count = GREATEST(comment_count + %s, 0)
+    """
+    cursor.execute(sql, (post_cid, likes, comments, likes, comments))
+
+def _lock_stats(cursor, post_cids: list[str]):
+    """
+    按 cid 顺序对 post_stats 行加排他锁 (行不存在时先插入)，已删除的文章被跳过。
+    所有同时写 likes/comments 与 post_stats 的事务都先调用它，加锁顺序统一为
+    posts (共享) -> post_stats -> likes/comments，避免相互死锁。
+    """
+    placeholders = ", ".join(["%s"] * len(post_cids))
+    cursor.execute(
+        f"""
+        INSERT INTO post_stats (post_cid)
+        SELECT cid FROM posts WHERE cid IN ({placeholders}) ORDER BY cid
+        ON DUPLICATE KEY UPDATE like_count = like_count
+        """,
+        tuple(post_cids)
+    )
+
+def _is_deadlock(e: Exception) -> bool:
+    return bool(e.args) and e.args[0] == _ER_LOCK_DEADLOCK
+
+def _retry_on_deadlock(run, label: str):
+    """执行事务 run()，被选为死锁牺牲者 (事务已回滚) 时稍后重新执行，最多 DEADLOCK_RETRIES 次。"""
+    for attempt in range(1, DEADLOCK_RETRIES + 1):
+        try:
+            return run()
+        except pymysql.MySQLError as e:
+            if not _is_deadlock(e) or attempt == DEADLOCK_RETRIES:
+                raise
+            print(f"[Stats] Deadlock in {label}, retrying ({attempt}/{DEADLOCK_RETRIES})")
+            time.sleep(0.01 * attempt)
+
 def add_like(user_id: int, post_cid: str) -> bool:
     conn = create_connection()
     cursor = conn.cursor()
     try:
+        _lock_stats(cursor, [post_cid])
         sql = "INSERT IGNORE INTO likes (user_id, post_cid) VALUES (%s, %s)"
         cursor.execute(sql, (user_id, post_cid))
+        added = cursor.rowcount > 0
+        if added:
+            _bump_stats(cursor, post_cid, likes=1)
         conn.commit()
-        return cursor.rowcount > 0
+        return added
     finally:
         cursor.close()
         conn.close()
@@ -50,63 +132,158 @@ def remove_like(user_id: int, post_cid: str) -> bool:
     conn = create_connection()
     cursor = conn.cursor()
     try:
+        _lock_stats(cursor, [post_cid])
         sql = "DELETE FROM likes WHERE user_id = %s AND post_cid = %s"
         cursor.execute(sql, (user_id, post_cid))
+        removed = cursor.rowcount > 0
+        if removed:
+            _bump_stats(cursor, post_cid, likes=-1)
         conn.commit()
-        return cursor.rowcount > 0
+        return removed
     finally:
         cursor.close()
         conn.close()
 
-def has_user_liked(user_id: int, post_cid: str) -> bool:
+def toggle_like(user_id: int, post_cid: str) -> tuple[str, int] | None:
+    """
+    在一个事务内切换点赞状态并返回 (action, 最新点赞数)，action 为 'added' 或 'removed'。
+    文章不存在时返回 None，给自己的文章点赞时抛出 PermissionError。
+    文章行加共享锁，提交前不会被并发删除；再对 post_stats 行加排他锁，同一文章的并发切换
+    (如连续双击) 依次执行。被选为死锁牺牲者时整体重试。
+    开启 write-behind 模式时改由缓冲记录切换。
+    """
+    buffer = _like_buffer
+    if buffer is not None:
+        return buffer.toggle(user_id, post_cid)
+    return _retry_on_deadlock(lambda: _toggle_like_once(user_id, post_cid), "toggle_like")
+
+def _toggle_like_once(user_id: int, post_cid: str) -> tuple[str, int] | None:
     conn = create_connection()
     cursor = conn.cursor()
     try:
-        sql = "SELECT 1 FROM likes WHERE user_id = %s AND post_cid = %s LIMIT 1"
-        cursor.execute(sql, (user_id, post_cid))
-        return cursor.fetchone() is not None
+        cursor.execute("SELECT owner_id FROM posts WHERE cid = %s FOR SHARE", (post_cid,))
+        row = cursor.fetchone()
+        if not row:
+            conn.rollback()
+            return None
+        if row[0] == user_id:
+            raise PermissionError("Cannot like own post")
+
+        _lock_stats(cursor, [post_cid])
+        cursor.execute("DELETE FROM likes WHERE user_id = %s AND post_cid = %s", (user_id, post_cid))
+        if cursor.rowcount > 0:
+            action = 'removed'
+            _bump_stats(cursor, post_cid, likes=-1)
+        else:
+            action = 'added'
+            cursor.execute("INSERT IGNORE INTO likes (user_id, post_cid) VALUES (%s, %s)", (user_id, post_cid))
+            if cursor.rowcount > 0:
+                _bump_stats(cursor, post_cid, likes=1)
+
+        cursor.execute("SELECT like_count FROM post_stats WHERE post_cid = %s", (post_cid,))
+        count = cursor.fetchone()[0]
+        conn.commit()
+        return action, count
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         cursor.close()
         conn.close()
 
+def _read_merged(read, overlay):
+    """
+    执行数据库读取 read()，开启 write-behind 模式时再用 overlay(buffer, 结果) 叠加尚未落库的点赞，
+    由缓冲保证读取与叠加之间没有一批写入提交。
+    """
+    buffer = _like_buffer
+    if buffer is None:
+        return read()
+    return buffer.read_merged(read, lambda value: overlay(buffer, value))
+
+def has_user_liked(user_id: int, post_cid: str) -> bool:
+    def read():
+        conn = create_connection()
+        cursor = conn.cursor()
+        try:
+            sql = "SELECT 1 FROM likes WHERE user_id = %s AND post_cid = %s LIMIT 1"
+            cursor.execute(sql, (user_id, post_cid))
+            return cursor.fetchone() is not None
+        finally:
+            cursor.close()
+            conn.close()
+
+    def overlay(buffer, liked):
+        pending = buffer.liked_state(user_id, post_cid)
+        return liked if pending is None else pending
+
+    return _read_merged(read, overlay)
+
 def count_likes_for_post(post_cid: str) -> int:
-    conn = create_connection()
-    cursor = conn.cursor()
-    try:
-        sql = "SELECT COUNT(*) FROM likes WHERE post_cid = %s"
-        cursor.execute(sql, (post_cid,))
-        result = cursor.fetchone()
-        return result[0] if result else 0
-    finally:
-        cursor.close()
-        conn.close()
+    def read():
+        conn = create_connection()
+        cursor = conn.cursor()
+        try:
+            sql = "SELECT like_count FROM post_stats WHERE post_cid = %s"
+            cursor.execute(sql, (post_cid,))
+            result = cursor.fetchone()
+            return result[0] if result else 0
+        finally:
+            cursor.close()
+            conn.close()
+
+    return _read_merged(read, lambda buffer, count: _merge_likes(buffer, post_cid, count))
 
 def count_total_likes_for_username(username: str) -> int:
-    conn = create_connection()
-    cursor = conn.cursor()
-    try:
-        sql = """
-            SELECT COUNT(l.id) 
-            FROM likes l
-            JOIN posts p ON l.post_cid = p.cid
-            JOIN users u ON p.owner_id = u.id
-            WHERE u.username = %s
-        """
-        cursor.execute(sql, (username,))
-        result = cursor.fetchone()
-        return result[0] if result else 0
-    finally:
-        cursor.close()
-        conn.close()
+    if _like_buffer is None:
+        conn = create_connection()
+        cursor = conn.cursor()
+        try:
+            sql = """
+                SELECT COALESCE(SUM(s.like_count), 0)
+                FROM post_stats s
+                JOIN posts p ON s.post_cid = p.cid
+                JOIN users u ON p.owner_id = u.id
+                WHERE u.username = %s
+            """
+            cursor.execute(sql, (username,))
+            result = cursor.fetchone()
+            return result[0] if result else 0
+        finally:
+            cursor.close()
+            conn.close()
+
+    # write-behind 模式下逐篇叠加缓冲中的差值，与单篇文章的点赞数保持一致
+    def read():
+        conn = create_connection()
+        cursor = conn.cursor()
+        try:
+            sql = """
+                SELECT p.cid, COALESCE(s.like_count, 0)
+                FROM posts p
+                JOIN users u ON p.owner_id = u.id
+                LEFT JOIN post_stats s ON s.post_cid = p.cid
+                WHERE u.username = %s
+            """
+            cursor.execute(sql, (username,))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+    return _read_merged(read, lambda buffer, rows: sum(_merge_likes(buffer, cid, count) for cid, count in rows))
 
 def create_comment(user_id: int, post_cid: str, content: str) -> int:
     conn = create_connection()
     cursor = conn.cursor()
     try:
+        _lock_stats(cursor, [post_cid])
         sql = "INSERT INTO comments (user_id, post_cid, content) VALUES (%s, %s, %s)"
         cursor.execute(sql, (user_id, post_cid, content))
+        comment_id = cursor.lastrowid
+        _bump_stats(cursor, post_cid, comments=1)
         conn.commit()
-        return cursor.lastrowid
+        return comment_id
     finally:
         cursor.close()
         conn.close()
@@ -115,10 +292,24 @@ def delete_comment(comment_id: int) -> bool:
     conn = create_connection()
     cursor = conn.cursor()
     try:
-        sql = "DELETE FROM comments WHERE id = %s"
-        cursor.execute(sql, (comment_id,))
+        # 先取得评论所属文章并锁定其计数器行，再锁定评论行，删除与计数器更新在同一事务内完成
+        cursor.execute("SELECT post_cid FROM comments WHERE id = %s", (comment_id,))
+        row = cursor.fetchone()
+        if not row:
+            conn.rollback()
+            return False
+        _lock_stats(cursor, [row[0]])
+        cursor.execute("SELECT post_cid FROM comments WHERE id = %s FOR UPDATE", (comment_id,))
+        row = cursor.fetchone()
+        if not row:
+            conn.rollback()
+            return False
+        cursor.execute("DELETE FROM comments WHERE id = %s", (comment_id,))
+        deleted = cursor.rowcount > 0
+        if deleted:
+            _bump_stats(cursor, row[0], comments=-1)
         conn.commit()
-        return cursor.rowcount > 0
+        return deleted
     finally:
         cursor.close()
         conn.close()
@@ -143,18 +334,38 @@ def get_comment_by_id(comment_id: int) -> Comment:
         cursor.close()
         conn.close()
 
-def get_comments_for_post(post_cid: str) -> list[Comment]:
+def get_comments_for_post(post_cid: str, before_id: int = None, limit: int = None) -> list[Comment]:
+    """
+    按 (created_at, id) 倒序获取评论，走 (post_cid, created_at, id) 索引。
+    before_id 为上一页最后一条评论的 id，只返回排在它之后的评论；limit 为 None 时不限条数。
+    """
     conn = create_connection()
     cursor = conn.cursor()
     try:
-        sql = """
+        where = "c.post_cid = %s"
+        params = [post_cid]
+        if before_id is not None:
+            cursor.execute("SELECT created_at FROM comments WHERE id = %s AND post_cid = %s", (before_id, post_cid))
+            anchor = cursor.fetchone()
+            if anchor:
+                where += " AND (c.created_at < %s OR (c.created_at = %s AND c.id < %s))"
+                params += [anchor[0], anchor[0], before_id]
+            else:
+                # 游标指向的评论已被删除，id 自增，按 id 继续翻页
+                where += " AND c.id < %s"
+                params.append(before_id)
+
+        sql = f"""
             SELECT c.id, c.user_id, c.post_cid, c.content, c.created_at, u.username 
             FROM comments c
             JOIN users u ON c.user_id = u.id
-            WHERE c.post_cid = %s
-            ORDER BY c.created_at DESC
+            WHERE {where}
+            ORDER BY c.created_at DESC, c.id DESC
         """
-        cursor.execute(sql, (post_cid,))
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(limit)
+        cursor.execute(sql, tuple(params))
         rows = cursor.fetchall()
         comments = []
         for row in rows:
@@ -176,7 +387,7 @@ def count_comments_for_post(post_cid: str) -> int:
     conn = create_connection()
     cursor = conn.cursor()
     try:
-        sql = "SELECT COUNT(*) FROM comments WHERE post_cid = %s"
+        sql = "SELECT comment_count FROM post_stats WHERE post_cid = %s"
         cursor.execute(sql, (post_cid,))
         result = cursor.fetchone()
         return result[0] if result else 0
@@ -189,9 +400,9 @@ def count_total_comments_for_username(username: str) -> int:
     cursor = conn.cursor()
     try:
         sql = """
-            SELECT COUNT(c.id) 
-            FROM comments c
-            JOIN posts p ON c.post_cid = p.cid
+            SELECT COALESCE(SUM(s.comment_count), 0)
+            FROM post_stats s
+            JOIN posts p ON s.post_cid = p.cid
             JOIN users u ON p.owner_id = u.id
             WHERE u.username = %s
         """
@@ -200,4 +411,144 @@ def count_total_comments_for_username(username: str) -> int:
         return result[0] if result else 0
     finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+def _merge_likes(buffer: LikeWriteBuffer, post_cid: str, persisted: int) -> int:
+    """叠加 write-behind 缓冲中尚未落库的点赞数，需在 _read_merged 的 overlay 内调用。"""
+    return max(persisted + buffer.like_delta(post_cid), 0)
+
+# IN (...) 查询每批的 cid 数量
+_STATS_CHUNK = 500
+
+def get_post_stats(post_cid: str) -> dict[str, int]:
+    """读取单篇文章的计数器，返回 {'likes': n, 'comments': m}。"""
+    def read():
+        conn = create_connection()
+        cursor = conn.cursor()
+        try:
+            sql = "SELECT like_count, comment_count FROM post_stats WHERE post_cid = %s"
+            cursor.execute(sql, (post_cid,))
+            row = cursor.fetchone()
+            if not row:
+                return {'likes': 0, 'comments': 0}
+            return {'likes': row[0], 'comments': row[1]}
+        finally:
+            cursor.close()
+            conn.close()
+
+    def overlay(buffer, stats):
+        stats['likes'] = _merge_likes(buffer, post_cid, stats['likes'])
+        return stats
+
+    return _read_merged(read, overlay)
+
+def count_stats_for_posts(post_cids: list[str]) -> dict[str, dict[str, int]]:
+    """
+    批量读取多篇文章的点赞数与评论数计数器，共用一个连接。
+    返回 {cid: {'likes': n, 'comments': m}}，没有记录的文章计为 0。
+    """
+    cids = list(dict.fromkeys(c for c in post_cids if c))
+    if not cids:
+        return {}
+
+    def read():
+        stats = {cid: {'likes': 0, 'comments': 0} for cid in cids}
+        conn = create_connection()
+        cursor = conn.cursor()
+        try:
+            for i in range(0, len(cids), _STATS_CHUNK):
+                chunk = cids[i:i + _STATS_CHUNK]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"SELECT post_cid, like_count, comment_count FROM post_stats WHERE post_cid IN ({placeholders})",
+                    tuple(chunk)
+                )
+                for cid, likes, comments in cursor.fetchall():
+                    stats[cid] = {'likes': likes, 'comments': comments}
+            return stats
+        finally:
+            cursor.close()
+            conn.close()
+
+    def overlay(buffer, stats):
+        for cid, value in stats.items():
+            value['likes'] = _merge_likes(buffer, cid, value['likes'])
+        return stats
+
+    return _read_merged(read, overlay)
+
+def reconcile_post_stats(batch_size: int = 500) -> int:
+    """
+    按 likes / comments 表的实际行数校正 post_stats 计数器。
+    按 cid 分批扫描文章，每批一个事务，只写入有偏差的行。返回修复的文章数。
+    """
+    conn = create_connection()
+    cursor = conn.cursor()
+    repaired = 0
+    last_cid = ""
+    try:
+        while True:
+            cursor.execute(
+                "SELECT cid FROM posts WHERE cid > %s ORDER BY cid LIMIT %s",
+                (last_cid, batch_size)
+            )
+            cids = [r[0] for r in cursor.fetchall()]
+            if not cids:
+                break
+            last_cid = cids[-1]
+            placeholders = ", ".join(["%s"] * len(cids))
+
+            actual = {cid: [0, 0] for cid in cids}
+            cursor.execute(
+                f"SELECT post_cid, COUNT(*) FROM likes WHERE post_cid IN ({placeholders}) GROUP BY post_cid",
+                tuple(cids)
+            )
+            for cid, count in cursor.fetchall():
+                actual[cid][0] = count
+            cursor.execute(
+                f"SELECT post_cid, COUNT(*) FROM comments WHERE post_cid IN ({placeholders}) GROUP BY post_cid",
+                tuple(cids)
+            )
+            for cid, count in cursor.fetchall():
+                actual[cid][1] = count
+
+            cursor.execute(
+                f"SELECT post_cid, like_count, comment_count FROM post_stats WHERE post_cid IN ({placeholders})",
+                tuple(cids)
+            )
+            stored = {r[0]: [r[1], r[2]] for r in cursor.fetchall()}
+
+            # 计数器行缺失且实际为 0 的文章无需写入
+            drifted = [cid for cid, counts in actual.items() if stored.get(cid, [0, 0]) != counts]
+            conn.commit()
+            if drifted:
+                _retry_on_deadlock(lambda: _rewrite_stats(conn, cursor, drifted), "reconcile_post_stats")
+                repaired += len(drifted)
+        return repaired
+    finally:
+        cursor.close()
+        conn.close()
+
+def _rewrite_stats(conn, cursor, post_cids: list[str]):
+    """
+    按 likes / comments 重新统计并写入给定文章的计数器。先锁定 post_stats 行 (与 toggle_like 同序)，
+    再在写入语句内重新计数 (加锁读)，避免覆盖快照之后提交的点赞/评论。
+    """
+    try:
+        _lock_stats(cursor, post_cids)
+        placeholders = ", ".join(["%s"] * len(post_cids))
+        cursor.execute(
+            f"""
+            INSERT INTO post_stats (post_cid, like_count, comment_count)
+            SELECT p.cid,
+                (SELECT COUNT(*) FROM likes l WHERE l.post_cid = p.cid),
+                (SELECT COUNT(*) FROM comments c WHERE c.post_cid = p.cid)
+            FROM posts p WHERE p.cid IN ({placeholders})
+            ON DUPLICATE KEY UPDATE like_count = VALUES(like_count), comment_count = VALUES(comment_count)
+            """,
+            tuple(post_cids)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
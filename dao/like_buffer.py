@@ -0,0 +1,221 @@
+import atexit
+import threading
+from collections import defaultdict
+from dao.factory import create_connection
+
+
+class LikeWriteBuffer:
+    """
+    点赞的 write-behind 缓冲。
+    点赞切换先记录在内存中，同一 (user_id, post_cid) 的多次切换合并为最终状态，
+    由后台线程每 flush_interval 秒批量写入数据库。写入是幂等的:
+    点赞用 INSERT IGNORE，取消用 DELETE，计数器按 likes 表重新统计。
+    - pending: 尚未写入的条目 {(user_id, post_cid): (已持久化状态, 目标状态)}
+    - inflight: 正在写入、尚未提交的一批条目
+    读取时把两者叠加到数据库中的状态上。pending 达到 max_pending 时，新的切换会等待下一次写入完成。
+    """
+
+    def __init__(self, flush_interval: float = 0.2, max_pending: int = 10000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: dict[tuple[int, str], tuple[bool, bool]] = {}
+        self._inflight: dict[tuple[int, str], tuple[bool, bool]] = {}
+        # 每篇文章 pending + inflight 相对数据库的点赞数差值
+        self._delta: defaultdict[str, int] = defaultdict(int)
+        # 每次提交或放弃一批写入后递增，用于发现与写入交错的数据库读取
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="like-buffer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[LikeBuffer] Flush loop error: {e}")
+
+    def _read_state(self, user_id: int, post_cid: str):
+        """读取 (owner_id, 已持久化点赞数, 用户是否已点赞)，文章不存在时返回 None。"""
+        conn = create_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                """
+                SELECT p.owner_id, COALESCE(s.like_count, 0),
+                    EXISTS(SELECT 1 FROM likes l WHERE l.user_id = %s AND l.post_cid = p.cid)
+                FROM posts p LEFT JOIN post_stats s ON s.post_cid = p.cid
+                WHERE p.cid = %s
+                """,
+                (user_id, post_cid)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return row[0], row[1], bool(row[2])
+        finally:
+            cursor.close()
+            conn.close()
+
+    def toggle(self, user_id: int, post_cid: str) -> tuple[str, int] | None:
+        """语义同 interact_dao.toggle_like，但只修改内存状态。"""
+        key = (user_id, post_cid)
+        while True:
+            generation = self._generation
+            state = self._read_state(user_id, post_cid)
+            if state is None:
+                return None
+            owner_id, count, liked = state
+            if owner_id == user_id:
+                raise PermissionError("Cannot like own post")
+
+            with self._cond:
+                while key not in self._pending and len(self._pending) >= self.max_pending and not self._closed:
+                    self._wake.set()
+                    self._cond.wait()
+                if self._closed:
+                    raise RuntimeError("Like buffer is closed")
+                if self._generation != generation:
+                    # 读取期间有一批写入完成，数据库状态可能已包含 inflight，重新读取
+                    continue
+
+                entry = self._pending.get(key)
+                if entry is not None:
+                    persisted, desired = entry
+                else:
+                    inflight = self._inflight.get(key)
+                    persisted = inflight[1] if inflight else liked
+                    desired = persisted
+
+                desired = not desired
+                if desired == persisted:
+                    self._pending.pop(key, None)
+                else:
+                    self._pending[key] = (persisted, desired)
+                self._add_delta(post_cid, 1 if desired else -1)
+                return ('added' if desired else 'removed'), max(count + self._delta.get(post_cid, 0), 0)
+
+    def _add_delta(self, post_cid: str, delta: int) -> None:
+        self._delta[post_cid] += delta
+        if not self._delta[post_cid]:
+            del self._delta[post_cid]
+
+    def read_merged(self, read, overlay):
+        """
+        执行数据库读取 read()，并在锁内用 overlay(结果) 叠加缓冲状态。
+        读取期间有一批写入提交或放弃 (generation 变化) 时重新读取，
+        避免同一批条目被重复计入或漏计。overlay 内可调用 liked_state / like_delta。
+        """
+        while True:
+            generation = self._generation
+            value = read()
+            with self._cond:
+                if self._generation == generation:
+                    return overlay(value)
+
+    def liked_state(self, user_id: int, post_cid: str) -> bool | None:
+        """尚未持久化的点赞状态，没有待写入的切换时返回 None。"""
+        key = (user_id, post_cid)
+        with self._cond:
+            entry = self._pending.get(key) or self._inflight.get(key)
+            return entry[1] if entry else None
+
+    def like_delta(self, post_cid: str) -> int:
+        """尚未持久化的点赞数差值，与数据库计数叠加时应经 read_merged 调用。"""
+        with self._cond:
+            return self._delta.get(post_cid, 0)
+
+    def flush(self) -> int:
+        """把当前 pending 的条目批量写入数据库，返回写入的条目数。"""
+        with self._flush_lock:
+            with self._cond:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+                self._cond.notify_all()
+
+            adds = [key for key, (_, desired) in batch.items() if desired]
+            removes = [key for key, (_, desired) in batch.items() if not desired]
+            cids = sorted({post_cid for _, post_cid in batch})
+
+            conn = create_connection()
+            cursor = conn.cursor()
+            try:
+                # 先按 cid 顺序锁定计数器行，与 interact_dao 中其余写入事务的加锁顺序一致
+                placeholders = ", ".join(["%s"] * len(cids))
+                cursor.execute(
+                    f"""
+                    INSERT INTO post_stats (post_cid)
+                    SELECT cid FROM posts WHERE cid IN ({placeholders}) ORDER BY cid
+                    ON DUPLICATE KEY UPDATE like_count = like_count
+                    """,
+                    tuple(cids)
+                )
+                if adds:
+                    cursor.executemany("INSERT IGNORE INTO likes (user_id, post_cid) VALUES (%s, %s)", adds)
+                if removes:
+                    cursor.executemany("DELETE FROM likes WHERE user_id = %s AND post_cid = %s", removes)
+                # 按 likes 表重新统计，重复执行结果不变；文章已删除时 IGNORE 跳过
+                cursor.executemany(
+                    """
+                    INSERT IGNORE INTO post_stats (post_cid, like_count)
+                    SELECT %s, COUNT(*) FROM likes WHERE post_cid = %s
+                    ON DUPLICATE KEY UPDATE like_count = VALUES(like_count)
+                    """,
+                    [(cid, cid) for cid in cids]
+                )
+                # 提交与清除 inflight 在同一临界区内，读取方据此判断数据库是否已包含这批写入
+                with self._cond:
+                    conn.commit()
+                    self._inflight = {}
+                    for (_, post_cid), (persisted, desired) in batch.items():
+                        self._add_delta(post_cid, int(persisted) - int(desired))
+                    self._generation += 1
+                return len(batch)
+            except Exception as e:
+                conn.rollback()
+                with self._cond:
+                    # 放回 pending，之后的切换以这批条目的目标状态为基准
+                    for key, (persisted, desired) in batch.items():
+                        newer = self._pending.get(key)
+                        if newer is not None:
+                            desired = newer[1]
+                        if desired == persisted:
+                            self._pending.pop(key, None)
+                        else:
+                            self._pending[key] = (persisted, desired)
+                    self._inflight = {}
+                    self._generation += 1
+                print(f"[LikeBuffer] Flush failed, {len(batch)} entries requeued: {e}")
+                return 0
+            finally:
+                cursor.close()
+                conn.close()
+
+    def close(self) -> None:
+        """停止后台线程并写入剩余条目。"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        remaining = self.flush()
+        if remaining:
+            print(f"[LikeBuffer] Flushed {remaining} pending likes on shutdown")
+        if self._pending:
+            print(f"[LikeBuffer] {len(self._pending)} likes could not be written")
@@ -0,0 +1,208 @@
+import threading
+import time
+import weakref
+from collections import deque
+from pymysql.constants import SERVER_STATUS
+
+
+class PoolTimeoutError(TimeoutError):
+    """在 checkout_timeout 内无法从连接池取得连接。"""
+
+
+class _PoolEntry:
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class PooledConnection:
+    """
+    连接池借出的连接代理。
+    除 close() 外的属性均透传给底层 pymysql 连接；close() 会把连接归还到池中而非真正断开。
+    未 close 就被回收的代理会释放其占用的池容量。
+    """
+
+    def __init__(self, pool: "ConnectionPool", entry: _PoolEntry):
+        self._pool = pool
+        self._entry = entry
+        self._finalizer = weakref.finalize(self, pool._discard, entry)
+
+    @property
+    def raw(self):
+        if self._entry is None:
+            raise RuntimeError("Connection already returned to pool")
+        return self._entry.raw
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def close(self) -> None:
+        entry, self._entry = self._entry, None
+        if entry is None:
+            return
+        self._finalizer.detach()
+        self._pool._release(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    线程安全的数据库连接池。
+    - min_size: 首次使用时预热的连接数
+    - max_size: 同时存在（空闲 + 借出）的最大连接数
+    - max_lifetime: 连接最长存活秒数，超时后归还时直接关闭
+    - checkout_timeout: 池满时等待空闲连接的最长秒数
+    - ping_interval: 空闲超过该秒数的连接在借出前先 ping 检查
+    """
+
+    def __init__(self, connect, min_size: int = 1, max_size: int = 10,
+                 max_lifetime: float = 3600, checkout_timeout: float = 10,
+                 ping_interval: float = 30):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Invalid pool size")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.ping_interval = ping_interval
+
+        self._idle: deque[_PoolEntry] = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def prefill(self) -> None:
+        """预先建立 min_size 个连接，失败时只打印日志，留给后续 acquire 重试。"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = _PoolEntry(self._connect())
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                print(f"[Pool] Prefill failed: {e}")
+                return
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def acquire(self, timeout: float | None = None) -> PooledConnection:
+        if timeout is None:
+            timeout = self.checkout_timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            entry = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No connection available within {timeout}s (max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+
+            if entry is None:
+                try:
+                    entry = _PoolEntry(self._connect())
+                except BaseException:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                return PooledConnection(self, entry)
+
+            if self._is_healthy(entry):
+                return PooledConnection(self, entry)
+            self._discard(entry)
+
+    def _is_healthy(self, entry: _PoolEntry) -> bool:
+        now = time.monotonic()
+        if now - entry.created_at > self.max_lifetime:
+            return False
+        if now - entry.last_used < self.ping_interval:
+            return True
+        try:
+            entry.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _in_transaction(raw) -> bool:
+        """
+        连接上是否有未结束的事务。自动提交模式、或最近一次 commit/rollback 后未再执行语句时，
+        服务器返回的状态中没有 IN_TRANS 标志，归还时可省去一次 ROLLBACK 往返。
+        无法判断时按有事务处理。
+        """
+        try:
+            if raw.get_autocommit():
+                return False
+            return bool(raw.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS)
+        except (AttributeError, TypeError):
+            return True
+
+    def _release(self, entry: _PoolEntry) -> None:
+        # 结束未提交的事务，避免下一个借用者读到旧快照或残留的写入
+        if self._in_transaction(entry.raw):
+            try:
+                entry.raw.rollback()
+            except Exception:
+                self._discard(entry)
+                return
+
+        entry.last_used = time.monotonic()
+        expired = entry.last_used - entry.created_at > self.max_lifetime
+        with self._cond:
+            if not self._closed and not expired:
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        self._discard(entry)
+
+    def _discard(self, entry: _PoolEntry) -> None:
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def close(self) -> None:
+        """关闭所有空闲连接；借出中的连接在归还时关闭。"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry)
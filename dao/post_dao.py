@@ -1,8 +1,76 @@
+import re
+import time
 from datetime import datetime
+import pymysql
 import pymysql.connections
 from dao.factory import create_connection
 from dao.models import Post
 
+# 与 MySQL 的 ngram_token_size 保持一致 (默认 2)，短于该长度的词无法通过 ngram 索引检索
+NGRAM_TOKEN_SIZE = 2
+
+# ER_FT_MATCHING_KEY_NOT_FOUND: 库中还没有 ft_posts_search 索引 (未执行 upgrade.sql)
+_ER_FT_MATCHING_KEY_NOT_FOUND = 1191
+
+# 发现索引缺失 (1191) 的时间 (time.monotonic)。此后 FULLTEXT_RECHECK_INTERVAL 秒内的搜索直接走 LIKE，
+# 到期后重新尝试 FULLTEXT，执行 upgrade.sql 补建索引后无需重启进程
+FULLTEXT_RECHECK_INTERVAL = 300
+_fulltext_missing_since: float | None = None
+
+def _fulltext_enabled() -> bool:
+    global _fulltext_missing_since
+    if _fulltext_missing_since is None:
+        return True
+    if time.monotonic() - _fulltext_missing_since >= FULLTEXT_RECHECK_INTERVAL:
+        _fulltext_missing_since = None
+        return True
+    return False
+
+def _mark_fulltext_missing() -> None:
+    global _fulltext_missing_since
+    _fulltext_missing_since = time.monotonic()
+    print(f"[Search] FULLTEXT index ft_posts_search not found, falling back to LIKE for {FULLTEXT_RECHECK_INTERVAL}s")
+
+# MATCH 的列必须与 ft_posts_search 索引的列完全一致
+_FULLTEXT_MATCH = "MATCH(p.title, p.description, p.context) AGAINST (%s IN BOOLEAN MODE)"
+
+def _fulltext_query(keyword: str) -> str | None:
+    """
+    把搜索词转换为 BOOLEAN MODE 查询: 空白分隔的每个词都作为必须出现的短语，
+    ngram 下短语匹配等价于子串匹配。任一词短于 NGRAM_TOKEN_SIZE 时返回 None，由调用方改用 LIKE。
+    """
+    terms = [t.replace('"', '') for t in keyword.split()]
+    terms = [t for t in terms if t]
+    if not terms or any(len(t) < NGRAM_TOKEN_SIZE for t in terms):
+        return None
+    return " ".join(f'+"{t}"' for t in terms)
+
+# 搜索结果摘要: 命中时截取首个匹配前后各 SNIPPET_CONTEXT 个字符，未命中时取开头 SNIPPET_LENGTH 个字符
+SNIPPET_CONTEXT = 100
+SNIPPET_LENGTH = 200
+
+def _snippet_columns(keyword: str) -> tuple[str, list]:
+    """
+    在 SQL 端截取正文摘要，返回 (列片段, 参数)。三列依次为:
+    摘要窗口、首个匹配的位置 (从 1 开始，0 表示正文未命中)、正文总字符数。
+    LOCATE 使用列的排序规则，与 LIKE 一样不区分大小写。
+    """
+    if not keyword:
+        return f"LEFT(p.context, {SNIPPET_LENGTH}), 0, CHAR_LENGTH(p.context)", []
+    locate = "LOCATE(%s, p.context)"
+    sql = f"""
+        CASE WHEN {locate} > 0
+            THEN SUBSTRING(p.context, GREATEST({locate} - {SNIPPET_CONTEXT}, 1),
+                           LEAST({locate} - 1, {SNIPPET_CONTEXT}) + CHAR_LENGTH(%s) + {SNIPPET_CONTEXT})
+            ELSE LEFT(p.context, {SNIPPET_LENGTH}) END,
+        IFNULL({locate}, 0),
+        CHAR_LENGTH(p.context)
+    """
+    return sql, [keyword] * 5
+
+def _is_fulltext_missing(e: Exception) -> bool:
+    return bool(e.args) and e.args[0] == _ER_FT_MATCHING_KEY_NOT_FOUND
+
 class MySQLPostDAO:
     """MySQL 实现的 PostDAO。"""
 
@@ -66,6 +134,42 @@ class MySQLPostDAO:
             return None
         return row[0]
 
+    def get_fields(self, cid: str, fields) -> dict | None:
+        """
+        一次查询获取文章的多个字段，返回 {field: value}。
+        非法字段会被忽略；文章不存在时返回 None。
+        """
+        cols = [f for f in dict.fromkeys(fields) if f in self.ALLOWED_FIELDS]
+        if not cols:
+            return None
+        with self.conn.cursor() as cur:
+            cur.execute(f"SELECT {', '.join(cols)} FROM posts WHERE cid = %s", (cid,))
+            row = cur.fetchone()
+        if not row:
+            return None
+        return dict(zip(cols, row))
+
+    def apply_context_rewrites(self, cid: str, rewrites: list[tuple[str, str]]) -> bool:
+        """
+        锁定文章行并对正文依次执行 (old_str, new_str) 替换，正文有变化时写回并返回 True。
+        在调用方的事务内执行，不提交。
+        """
+        if not rewrites:
+            return False
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT context FROM posts WHERE cid = %s FOR UPDATE", (cid,))
+            row = cur.fetchone()
+            if not row:
+                return False
+            current_context = row[0] or ""
+            new_context = current_context
+            for old_str, new_str in rewrites:
+                new_context = new_context.replace(old_str, new_str)
+            if new_context == current_context:
+                return False
+            cur.execute("UPDATE posts SET context = %s WHERE cid = %s", (new_context, cid))
+        return True
+
     def delete_post(self, cid: str) -> bool:
         with self.conn.cursor() as cur:
             cur.execute("DELETE FROM posts WHERE cid = %s", (cid,))
@@ -111,6 +215,21 @@ class MySQLPostDAO:
         ]
     
     def search_posts(self, keyword: str) -> list[str]:
+        """按相关度返回匹配的 cid，优先使用 FULLTEXT 索引，不可用时退回 LIKE"""
+        query = _fulltext_query(keyword) if _fulltext_enabled() else None
+        if query is not None:
+            sql = f"SELECT p.cid FROM posts p WHERE {_FULLTEXT_MATCH} ORDER BY {_FULLTEXT_MATCH} DESC"
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute(sql, (query, query))
+                    return [r[0] for r in cur.fetchall()]
+            except pymysql.MySQLError as e:
+                if not _is_fulltext_missing(e):
+                    raise
+                _mark_fulltext_missing()
+        return self._search_posts_like(keyword)
+
+    def _search_posts_like(self, keyword: str) -> list[str]:
         like = f"%{keyword}%"
         results: list[str] = []
         seen = set()
@@ -140,6 +259,83 @@ class MySQLPostDAO:
         return results
 
     def search_public_posts_paged(self, keyword: str, offset: int, limit: int) -> tuple[list[dict], int]:
+        """
+        分页搜索公开文章。有关键字时按 FULLTEXT 相关度排序，同分按日期；
+        FULLTEXT 不可用或关键字过短时退回 LIKE 并按日期排序。
+        """
+        query = _fulltext_query(keyword) if keyword and _fulltext_enabled() else None
+        if query is None:
+            return self._search_public_posts_like(keyword, offset, limit)
+
+        snippet_sql, snippet_params = _snippet_columns(keyword)
+        count_sql = f"SELECT COUNT(*) FROM posts p WHERE p.is_public = TRUE AND {_FULLTEXT_MATCH}"
+        data_sql = f"""
+            SELECT p.cid, p.title, p.category, p.date, p.description, u.username, {snippet_sql},
+                {_FULLTEXT_MATCH} AS score
+            FROM posts p
+            JOIN users u ON p.owner_id = u.id
+            WHERE p.is_public = TRUE AND {_FULLTEXT_MATCH}
+            ORDER BY score DESC, p.date DESC
+            LIMIT %s OFFSET %s
+        """
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(count_sql, (query,))
+                total = cur.fetchone()[0]
+                if total > 0:
+                    cur.execute(data_sql, tuple(snippet_params + [query, query, limit, offset]))
+                    rows = cur.fetchall()
+                else:
+                    rows = []
+        except pymysql.MySQLError as e:
+            if not _is_fulltext_missing(e):
+                raise
+            _mark_fulltext_missing()
+            return self._search_public_posts_like(keyword, offset, limit)
+
+        return [self._search_row_to_dict(r) for r in rows], total
+
+    @staticmethod
+    def _search_row_to_dict(r) -> dict:
+        return {
+            "cid": r[0],
+            "title": r[1],
+            "category": r[2],
+            "date": str(r[3]),
+            "description": r[4],
+            "author": r[5],
+            "snippet": r[6] or "",
+            "match_pos": r[7] or 0,
+            "context_length": r[8] or 0
+        }
+
+    def has_fulltext_index(self) -> bool:
+        """posts 上是否已建立 ft_posts_search 全文索引"""
+        with self.conn.cursor() as cur:
+            cur.execute("SHOW INDEX FROM posts WHERE Key_name = 'ft_posts_search'")
+            return cur.fetchone() is not None
+
+    def get_public_posts_by_cids(self, cids: list[str], keyword: str = "") -> list[dict]:
+        """
+        按给定顺序返回公开文章 (字段同 search_public_posts_paged，摘要按 keyword 截取)，
+        不存在或已转为私有的文章被跳过
+        """
+        if not cids:
+            return []
+        snippet_sql, snippet_params = _snippet_columns(keyword)
+        placeholders = ", ".join(["%s"] * len(cids))
+        sql = f"""
+            SELECT p.cid, p.title, p.category, p.date, p.description, u.username, {snippet_sql}
+            FROM posts p
+            JOIN users u ON p.owner_id = u.id
+            WHERE p.is_public = TRUE AND p.cid IN ({placeholders})
+        """
+        with self.conn.cursor() as cur:
+            cur.execute(sql, tuple(snippet_params + list(cids)))
+            rows = {r[0]: r for r in cur.fetchall()}
+        return [self._search_row_to_dict(rows[cid]) for cid in cids if cid in rows]
+
+    def _search_public_posts_like(self, keyword: str, offset: int, limit: int) -> tuple[list[dict], int]:
         params = []
         where_clause = "WHERE p.is_public = TRUE"
         
@@ -150,8 +346,9 @@ class MySQLPostDAO:
             
         count_sql = f"SELECT COUNT(*) FROM posts p {where_clause}"
         
+        snippet_sql, snippet_params = _snippet_columns(keyword)
         data_sql = f"""
-            SELECT p.cid, p.title, p.category, p.date, p.description, u.username, p.context
+            SELECT p.cid, p.title, p.category, p.date, p.description, u.username, {snippet_sql}
             FROM posts p
             JOIN users u ON p.owner_id = u.id
             {where_clause}
@@ -164,24 +361,13 @@ class MySQLPostDAO:
             total = cur.fetchone()[0]
             
             if total > 0:
-                full_params = params + [limit, offset]
+                full_params = snippet_params + params + [limit, offset]
                 cur.execute(data_sql, tuple(full_params))
                 rows = cur.fetchall()
             else:
                 rows = []
 
-        posts = [
-            {
-                "cid": r[0],
-                "title": r[1],
-                "category": r[2],
-                "date": str(r[3]),
-                "description": r[4],
-                "author": r[5],
-                "context": r[6]
-            }
-            for r in rows
-        ]
+        posts = [self._search_row_to_dict(r) for r in rows]
         
         return posts, total
 
@@ -48,6 +48,29 @@ class MySQLPostReferenceDAO:
                 )
         self.conn.commit()
 
+    def sync_references(self, post_cid: str, ref_cids: set[str]) -> bool:
+        """
+        把文章的引用关系调整为 ref_cids，只增删与库中不同的部分，有改动时返回 True。
+        在调用方的事务内执行，不提交。
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT ref_cid FROM post_references WHERE post_cid = %s", (post_cid,))
+            existing = {r[0] for r in cur.fetchall()}
+            removed = existing - ref_cids
+            added = ref_cids - existing
+            if removed:
+                placeholders = ", ".join(["%s"] * len(removed))
+                cur.execute(
+                    f"DELETE FROM post_references WHERE post_cid = %s AND ref_cid IN ({placeholders})",
+                    (post_cid, *removed)
+                )
+            if added:
+                cur.executemany(
+                    "INSERT INTO post_references (post_cid, ref_cid) VALUES (%s, %s)",
+                    [(post_cid, ref) for ref in added]
+                )
+        return bool(removed or added)
+
     def get_referencing_posts(self, ref_cid: str) -> list[str]:
         """
         反向查找：找出所有引用了 ref_cid 的文章（post_cid）。
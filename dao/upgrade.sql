@@ -0,0 +1,56 @@
+-- 已有数据库的结构升级脚本: 新安装直接执行 init.sql 即可，无需执行本文件
+-- 按顺序执行，每一段对应一次结构变更
+USE `megacite`;
+
+-- posts.updated_at: DBWatcher 增量扫描的高水位列
+ALTER TABLE posts
+    ADD COLUMN updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_posts_updated_at (updated_at);
+
+-- post_changes: DBWatcher 的变更队列 (outbox) 及其触发器，定义同 init.sql
+CREATE TABLE IF NOT EXISTS post_changes (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    cid VARCHAR(32) NOT NULL,
+    op CHAR(1) NOT NULL,
+    old_owner_id BIGINT DEFAULT NULL,
+    old_title VARCHAR(255) DEFAULT NULL,
+    old_category VARCHAR(255) DEFAULT NULL,
+    created_at DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+DROP TRIGGER IF EXISTS trg_posts_after_insert;
+CREATE TRIGGER trg_posts_after_insert AFTER INSERT ON posts FOR EACH ROW
+    INSERT INTO post_changes (cid, op) VALUES (NEW.cid, 'I');
+
+DROP TRIGGER IF EXISTS trg_posts_after_update;
+CREATE TRIGGER trg_posts_after_update AFTER UPDATE ON posts FOR EACH ROW
+    INSERT INTO post_changes (cid, op, old_owner_id, old_title, old_category)
+    SELECT OLD.cid, 'U', OLD.owner_id, OLD.title, OLD.category FROM DUAL
+    WHERE NOT (OLD.updated_at <=> NEW.updated_at);
+
+DROP TRIGGER IF EXISTS trg_posts_after_delete;
+CREATE TRIGGER trg_posts_after_delete AFTER DELETE ON posts FOR EACH ROW
+    INSERT INTO post_changes (cid, op, old_owner_id, old_title, old_category)
+    VALUES (OLD.cid, 'D', OLD.owner_id, OLD.title, OLD.category);
+
+-- post_stats: 点赞/评论计数器，定义同 init.sql，并按现有数据回填
+CREATE TABLE IF NOT EXISTS post_stats (
+    post_cid VARCHAR(32) PRIMARY KEY,
+    like_count INT NOT NULL DEFAULT 0,
+    comment_count INT NOT NULL DEFAULT 0,
+    CONSTRAINT fk_stats_post FOREIGN KEY (post_cid) REFERENCES posts(cid) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT INTO post_stats (post_cid, like_count, comment_count)
+SELECT p.cid,
+    (SELECT COUNT(*) FROM likes l WHERE l.post_cid = p.cid),
+    (SELECT COUNT(*) FROM comments c WHERE c.post_cid = p.cid)
+FROM posts p
+ON DUPLICATE KEY UPDATE like_count = VALUES(like_count), comment_count = VALUES(comment_count);
+
+-- comments: 评论游标分页索引
+ALTER TABLE comments ADD INDEX idx_comments_post_created (post_cid, created_at, id);
+
+-- posts: 搜索用 ngram 全文索引，定义同 init.sql (同样需在建索引前关闭停用词)
+SET SESSION innodb_ft_enable_stopword = OFF;
+ALTER TABLE posts ADD FULLTEXT INDEX ft_posts_search (title, description, `context`) WITH PARSER ngram;
@@ -16,6 +16,18 @@ class MySQLUrlMapDAO:
             )
         self.conn.commit()
 
+    def upsert_mappings(self, mappings: list[tuple[str, str]]) -> None:
+        """批量插入或更新映射 [(cid, url_path), ...]，一次提交。"""
+        if not mappings:
+            return
+        with self.conn.cursor() as cur:
+            cur.executemany(
+                "INSERT INTO url_mappings (cid, url_path) VALUES (%s, %s) "
+                "ON DUPLICATE KEY UPDATE url_path = VALUES(url_path)",
+                mappings,
+            )
+        self.conn.commit()
+
     def get_cid_by_url(self, url_path: str) -> str | None:
         """通过 URL 查找 CID。"""
         with self.conn.cursor() as cur:
@@ -28,4 +40,21 @@ class MySQLUrlMapDAO:
         with self.conn.cursor() as cur:
             cur.execute("SELECT url_path FROM url_mappings WHERE cid = %s", (cid,))
             row = cur.fetchone()
-        return row[0] if row else None
\ No newline at end of file
+        return row[0] if row else None
+
+    def list_mappings(self, limit: int) -> list[tuple[str, str]]:
+        """批量读取映射 [(cid, url_path), ...]，用于预热缓存。"""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT cid, url_path FROM url_mappings ORDER BY id DESC LIMIT %s", (limit,))
+            rows = cur.fetchall()
+        return list(rows) if rows else []
+
+    def get_urls_by_cids(self, cids: list[str]) -> dict[str, str]:
+        """批量通过 CID 查找 URL，返回 {cid: url_path}，不存在的 CID 不出现在结果中。"""
+        if not cids:
+            return {}
+        placeholders = ", ".join(["%s"] * len(cids))
+        with self.conn.cursor() as cur:
+            cur.execute(f"SELECT cid, url_path FROM url_mappings WHERE cid IN ({placeholders})", tuple(cids))
+            rows = cur.fetchall()
+        return {cid: url_path for cid, url_path in rows or ()}
@@ -4,17 +4,26 @@ from collections import defaultdict
 from core.url_manager import URLManager
 from core.post import get_playground_posts
 from generator.renderer import HTMLRenderer
+from generator.render_pool import RenderPool
 from dao.factory import create_connection
+from core.config import RENDER_CONFIG
+from core.static_meta import StaticMetaCache, content_digest
+from generator import precompress
+from generator.output_writer import OutputWriter
 
 class StaticSiteGenerator:
     def __init__(self, base_dir="public"):
         self.base_dir = base_dir
         self.url_mgr = URLManager()
         self.renderer = HTMLRenderer()
+        self._render_pool = None
+        self.static_meta = StaticMetaCache()
+        self.writer = OutputWriter()
 
     def init_output_dir(self):
         if os.path.exists(self.base_dir):
             shutil.rmtree(self.base_dir)
+            self.writer.clear()
             print(f"[Gen] Cleaned output directory: {self.base_dir}")
             
         os.makedirs(self.base_dir)
@@ -26,6 +35,7 @@ class StaticSiteGenerator:
         if os.path.exists(assets_dir):
             try:
                 shutil.copytree(assets_dir, self.base_dir, dirs_exist_ok=True)
+                self._record_assets(assets_dir)
                 print(f"[Gen] Assets copied from {assets_dir}")
             except Exception as e:
                 print(f"[Gen] Error copying assets: {e}")
@@ -39,42 +49,62 @@ class StaticSiteGenerator:
     def sync_landing_page(self):
         html = self.renderer.render_landing_page()
         path = self._get_abs_path("index.html")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(html)
-        print(f"[Gen] Landing Page generated: {path}")
+        if self._write_file(path, html):
+            print(f"[Gen] Landing Page generated: {path}")
 
     def sync_static_pages(self):
         # Settings
         html = self.renderer.render_settings_page()
         path = self._get_abs_path("settings.html")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(html)
+        self._write_file(path, html)
             
         # Editor
         html_editor = self.renderer.render_editor_page()
         path_editor = self._get_abs_path("edit.html")
-        with open(path_editor, "w", encoding="utf-8") as f:
-            f.write(html_editor)
+        self._write_file(path_editor, html_editor)
             
         # Admin stub
         admin_dir = self._get_abs_path("admin")
         os.makedirs(admin_dir, exist_ok=True)
         html_admin = self.renderer.render_admin_stub()
-        with open(os.path.join(admin_dir, "index.html"), "w", encoding="utf-8") as f:
-            f.write(html_admin)
+        self._write_file(os.path.join(admin_dir, "index.html"), html_admin)
 
     def sync_playground(self):
         """生成广场页面"""
         posts = get_playground_posts()
         html = self.renderer.render_playground_page(posts)
         path = self._get_abs_path("playground.html")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(html)
-        print(f"[Gen] Playground updated: {path}")
+        if self._write_file(path, html):
+            print(f"[Gen] Playground updated: {path}")
 
     def _get_abs_path(self, rel_path: str) -> str:
         return os.path.join(self.base_dir, rel_path)
 
+    def _write_file(self, path: str, text: str) -> bool:
+        """
+        经 OutputWriter 写出页面: 内容未变时跳过，否则原子替换并登记摘要 (ETag)。
+        内容变化 (或压缩副本缺失) 时重新生成压缩副本。返回是否实际写入。
+        """
+        data = text.encode("utf-8")
+        written = self.writer.write(path, data)
+        if written or not precompress.has_siblings(path, data):
+            precompress.write_siblings(path, data)
+        return written
+
+    def _record_assets(self, assets_dir: str):
+        """登记从 assets/ 复制到输出目录的文件的内容摘要，并为其生成压缩副本。"""
+        for root, _, files in os.walk(assets_dir):
+            rel_root = os.path.relpath(root, assets_dir)
+            for name in files:
+                path = os.path.normpath(os.path.join(self.base_dir, rel_root, name))
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    self.static_meta.record(path, content_digest(data))
+                    precompress.write_siblings(path, data)
+                except OSError as e:
+                    print(f"[Gen] Failed to process asset {path}: {e}")
+
     def remove_post_file_by_meta(self, username: str, category: str, title: str):
         s_cat = self.url_mgr.safe_title(category or "default")
         s_title = self.url_mgr.safe_title(title or "untitled")
@@ -82,7 +112,8 @@ class StaticSiteGenerator:
         full_path = self._get_abs_path(rel_prefix + ".html")
         
         if os.path.exists(full_path):
-            os.remove(full_path)
+            self.writer.remove(full_path)
+            precompress.remove_siblings(full_path)
             try:
                 parent_dir = os.path.dirname(full_path)
                 if not os.listdir(parent_dir):
@@ -91,23 +122,54 @@ class StaticSiteGenerator:
                 pass
 
     def sync_post_file(self, post_data: dict, author_name: str):
+        html = self.renderer.render_post(post_data, author_name, post_data["cid"])
+        self._write_post_file(post_data, author_name, html)
+
+    def sync_post_files(self, items: list[tuple[dict, str]]):
+        """
+        批量生成文章页面 [(post_data, author_name), ...]。
+        数量达到阈值时把 Markdown 转换分发到多进程渲染池，链接解析、数据库写回与文件写出仍在当前进程按输入顺序进行。
+        """
+        workers = RENDER_CONFIG["workers"] or os.cpu_count() or 1
+        if workers == 1 or len(items) < RENDER_CONFIG["parallel_threshold"]:
+            for post_data, author_name in items:
+                self.sync_post_file(post_data, author_name)
+            return
+
+        if self._render_pool is None:
+            self._render_pool = RenderPool(workers)
+        print(f"[Gen] Rendering {len(items)} posts with {self._render_pool.workers} workers...")
+        for post_data, author_name, html in self._render_pool.render_posts(items, self.renderer):
+            if isinstance(html, Exception):
+                print(f"[Gen] Parallel render failed for {post_data['cid']}: {html}, rendering in-process")
+                html = self.renderer.render_post(post_data, author_name, post_data["cid"])
+            self._write_post_file(post_data, author_name, html)
+
+    def _write_post_file(self, post_data: dict, author_name: str, html: str):
         cid = post_data["cid"]
         title = post_data["title"] or "untitled"
         category = post_data.get("category") or "default"
         
         rel_prefix = self.url_mgr.register_mapping(cid, author_name, category, title)
+        if rel_prefix is None:
+            # 路径被其他文章占用，不能覆盖对方的页面
+            print(f"[Gen] Skipped {cid}: url path conflicts with another post")
+            return
         filename = rel_prefix + ".html"
         full_path = self._get_abs_path(filename)
         
         os.makedirs(os.path.dirname(full_path), exist_ok=True)
-        html = self.renderer.render_post(post_data, author_name, cid)
-        
-        with open(full_path, "w", encoding="utf-8") as f:
-            f.write(html)
-        
-        print(f"[Gen] Generated: {full_path}")
+        if self._write_file(full_path, html):
+            print(f"[Gen] Generated: {full_path}")
+
+    def close(self):
+        """释放渲染进程池。"""
+        if self._render_pool is not None:
+            self._render_pool.close()
+            self._render_pool = None
 
     def sync_user_index(self, user_id: int):
+        # 只在读取期间持有连接: register_mappings 与渲染 (统计查询) 会各自借用连接
         conn = create_connection()
         try:
             with conn.cursor() as cur:
@@ -120,48 +182,58 @@ class StaticSiteGenerator:
                 # [新增] 查询 is_public 字段
                 cur.execute("SELECT cid, title, category, date, is_public FROM posts WHERE owner_id=%s ORDER BY date DESC", (user_id,))
                 rows = cur.fetchall()
+        finally:
+            conn.close()
 
-            categorized = defaultdict(list)
-            for r in rows:
-                p_cid, p_title = r[0], r[1] or "untitled"
-                p_cat = r[2] or "default"
-                p_date = r[3]
-                p_is_public = bool(r[4])
-                
-                rel_prefix = self.url_mgr.register_mapping(p_cid, username, p_cat, p_title)
-                link_href = f"/{rel_prefix}.html"
-                
-                categorized[p_cat].append({
-                    "cid": p_cid,
-                    "title": p_title, 
-                    "filename": link_href,
-                    "date": str(p_date),
-                    "is_public": p_is_public  # 传递公开状态
-                })
-            
-            html = self.renderer.render_user_index(username, categorized)
-            index_path = self._get_abs_path(f"{username}/index.html")
+        rel_prefixes = self.url_mgr.register_mappings(
+            [(r[0], username, r[2] or "default", r[1] or "untitled") for r in rows]
+        )
+
+        categorized = defaultdict(list)
+        for r, rel_prefix in zip(rows, rel_prefixes):
+            if rel_prefix is None:
+                # 映射冲突未写入的文章没有对应页面
+                continue
+            p_cid, p_title = r[0], r[1] or "untitled"
+            p_cat = r[2] or "default"
+            p_date = r[3]
+            p_is_public = bool(r[4])
             
-            os.makedirs(os.path.dirname(index_path), exist_ok=True)
-            with open(index_path, "w", encoding="utf-8") as f:
-                f.write(html)
+            link_href = f"/{rel_prefix}.html"
             
+            categorized[p_cat].append({
+                "cid": p_cid,
+                "title": p_title, 
+                "filename": link_href,
+                "date": str(p_date),
+                "is_public": p_is_public  # 传递公开状态
+            })
+        
+        html = self.renderer.render_user_index(username, categorized)
+        index_path = self._get_abs_path(f"{username}/index.html")
+        
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        if self._write_file(index_path, html):
             print(f"[Gen] Index Updated: {index_path}")
 
-        finally:
-            conn.close()
-
-    def remove_post_file(self, cid: str):
+    def remove_post_file(self, cid: str) -> bool:
+        """
+        按缓存中的映射删除文章页面。映射已不在缓存中 (被淘汰或从未加载) 时返回 False，
+        调用方需改用 remove_post_file_by_meta 按文章元数据删除。
+        """
         rel_prefix = self.url_mgr.remove_mapping(cid)
-        if rel_prefix:
-            full_path = self._get_abs_path(rel_prefix + ".html")
-            if os.path.exists(full_path):
-                os.remove(full_path)
-                print(f"[Gen] Deleted: {full_path}")
-            
-            try:
-                parent_dir = os.path.dirname(full_path)
-                if not os.listdir(parent_dir):
-                    os.rmdir(parent_dir)
-            except OSError:
-                pass
\ No newline at end of file
+        if not rel_prefix:
+            return False
+        full_path = self._get_abs_path(rel_prefix + ".html")
+        if os.path.exists(full_path):
+            self.writer.remove(full_path)
+            precompress.remove_siblings(full_path)
+            print(f"[Gen] Deleted: {full_path}")
+
+        try:
+            parent_dir = os.path.dirname(full_path)
+            if not os.listdir(parent_dir):
+                os.rmdir(parent_dir)
+        except OSError:
+            pass
+        return True
\ No newline at end of file
@@ -2,29 +2,25 @@ from dao.factory import create_connection
 from dao.post_dao import MySQLPostDAO
 from dao.reference_dao import MySQLPostReferenceDAO
 
-def update_post_content_in_db(post_cid: str, old_str: str, new_str: str):
+def apply_render_results(post_cid: str, rewrites: list[tuple[str, str]], refs: set):
     """
-    仅更新文章的正文内容。
-    用于将 markdown 中的 http 链接替换为内部引用格式。
+    渲染结束后一次性写回渲染产生的改动，在同一事务内完成：
+    - rewrites: 将 markdown 中的 http 链接替换为内部引用格式的 (old_str, new_str) 列表
+    - refs: 文章当前引用的 CID 集合，仅增删与库中不同的部分
+    没有任何变化时不产生写操作。
     """
     conn = create_connection()
     try:
-        dao = MySQLPostDAO(conn)
-        current_context = dao.get_field(post_cid, "context") or ""
-        new_context = current_context.replace(old_str, new_str)
-        if new_context != current_context:
-            dao.update_field(post_cid, "context", new_context)
+        changed = False
+        if MySQLPostDAO(conn).apply_context_rewrites(post_cid, rewrites):
+            changed = True
             print(f"[Renderer] DB Content Updated for {post_cid}")
+        if MySQLPostReferenceDAO(conn).sync_references(post_cid, set(refs)):
+            changed = True
+        if changed:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         conn.close()
-
-def update_post_references_in_db(post_cid: str, refs: set):
-    """
-    覆盖式重建文章的引用关系表。
-    """
-    conn = create_connection()
-    try:
-        ref_dao = MySQLPostReferenceDAO(conn)
-        ref_dao.update_references(post_cid, refs)
-    finally:
-        conn.close()
\ No newline at end of file
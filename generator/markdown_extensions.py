@@ -14,11 +14,19 @@ class CiteLinkProcessor(InlineProcessor):
     """
     处理 [text](url) 格式的链接。
     如果是外部链接，尝试转换为 [text](http://megacite.cid/<cid>) 并触发数据库更新。
+    url_mgr 与 db_callback 从扩展实例读取，以便同一个 Markdown 实例在文档之间重新绑定。
     """
-    def __init__(self, pattern, md, url_mgr, db_callback):
+    def __init__(self, pattern, md, ext):
         super().__init__(pattern, md)
-        self.url_mgr = url_mgr
-        self.db_callback = db_callback
+        self.ext = ext
+
+    @property
+    def url_mgr(self):
+        return self.ext.url_mgr
+
+    @property
+    def db_callback(self):
+        return self.ext.db_callback
 
     def handleMatch(self, m, data):
         text = m.group(1)
@@ -61,10 +69,17 @@ class CiteAutoLinkProcessor(AutolinkInlineProcessor):
     处理 <http://...> 格式的自动链接。
     如果是外部链接，尝试转换为 <http://megacite.cid/<cid>> 并触发数据库更新。
     """
-    def __init__(self, pattern, md, url_mgr, db_callback):
+    def __init__(self, pattern, md, ext):
         super().__init__(pattern, md)
-        self.url_mgr = url_mgr
-        self.db_callback = db_callback
+        self.ext = ext
+
+    @property
+    def url_mgr(self):
+        return self.ext.url_mgr
+
+    @property
+    def db_callback(self):
+        return self.ext.db_callback
 
     def handleMatch(self, m, data):
         href = m.group(1)
@@ -100,17 +115,22 @@ class CiteAutoLinkProcessor(AutolinkInlineProcessor):
 
 class CiteReferenceExtension(Extension):
     def __init__(self, **kwargs):
-        self.url_mgr = kwargs.pop('url_mgr')
-        self.db_callback = kwargs.pop('db_callback')
+        self.url_mgr = kwargs.pop('url_mgr', None)
+        self.db_callback = kwargs.pop('db_callback', None)
         super().__init__(**kwargs)
 
+    def bind(self, url_mgr, db_callback):
+        """为下一篇文档设置链接解析器和回调，无需重建 Markdown 实例。"""
+        self.url_mgr = url_mgr
+        self.db_callback = db_callback
+
     def extendMarkdown(self, md):
         # 优先级设为 165，介于代码块(175)和标准链接(160)之间
         md.inlinePatterns.register(
-            CiteLinkProcessor(LINK_RE, md, self.url_mgr, self.db_callback),
+            CiteLinkProcessor(LINK_RE, md, self),
             'cite_link', 165
         )
         md.inlinePatterns.register(
-            CiteAutoLinkProcessor(AUTOLINK_RE, md, self.url_mgr, self.db_callback),
+            CiteAutoLinkProcessor(AUTOLINK_RE, md, self),
             'cite_autolink', 165
         )
\ No newline at end of file
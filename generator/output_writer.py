@@ -0,0 +1,108 @@
+import os
+import threading
+from core.static_meta import StaticMetaCache, content_digest, file_digest
+
+def atomic_write(path: str, data: bytes) -> None:
+    """先写入同目录下的临时文件再 os.replace，读取方只会看到旧文件或完整的新文件。"""
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class WriteStats:
+    __slots__ = ("written_files", "written_bytes", "skipped_files", "skipped_bytes")
+
+    def __init__(self):
+        self.written_files = 0
+        self.written_bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.written_files or self.skipped_files)
+
+    def __str__(self) -> str:
+        return (f"{self.written_files} files / {self.written_bytes / 1024:.1f} KiB written, "
+                f"{self.skipped_files} files / {self.skipped_bytes / 1024:.1f} KiB unchanged")
+
+class OutputWriter:
+    """
+    生成器的输出写入器: 按内容摘要清单 (manifest) 跳过内容未变的文件，其余文件原子替换。
+    - manifest: {绝对路径: (摘要, 大小, mtime_ns)}，大小或修改时间对不上 (文件被外部改动或删除) 时视为未知
+    - 未登记的已有文件在首次写入时读取并计算摘要
+    写入后同时登记到 StaticMetaCache (ETag)。
+    """
+
+    def __init__(self):
+        self.static_meta = StaticMetaCache()
+        self._manifest: dict[str, tuple[str, int, int]] = {}
+        self._lock = threading.Lock()
+        self._stats = WriteStats()
+
+    def _current_digest(self, path: str) -> str | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._manifest.get(path)
+        if entry is not None and entry[1] == st.st_size and entry[2] == st.st_mtime_ns:
+            return entry[0]
+        try:
+            digest = file_digest(path)
+        except OSError:
+            return None
+        with self._lock:
+            self._manifest[path] = (digest, st.st_size, st.st_mtime_ns)
+        return digest
+
+    def write(self, path: str, data: bytes) -> bool:
+        """写出 data，内容与现有文件相同时跳过并返回 False。"""
+        path = os.path.abspath(path)
+        digest = content_digest(data)
+        if self._current_digest(path) == digest:
+            with self._lock:
+                self._stats.skipped_files += 1
+                self._stats.skipped_bytes += len(data)
+            return False
+
+        # 替换与登记在同一临界区内，并发写同一文件时 manifest 与磁盘内容保持一致
+        with self._lock:
+            atomic_write(path, data)
+            st = os.stat(path)
+            self._manifest[path] = (digest, st.st_size, st.st_mtime_ns)
+            self._stats.written_files += 1
+            self._stats.written_bytes += len(data)
+            self.static_meta.record(path, digest)
+        return True
+
+    def remove(self, path: str) -> bool:
+        path = os.path.abspath(path)
+        with self._lock:
+            self._manifest.pop(path, None)
+        self.static_meta.forget(path)
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def clear(self) -> None:
+        """输出目录被整体清空时调用"""
+        with self._lock:
+            self._manifest.clear()
+        self.static_meta.clear()
+
+    def take_stats(self) -> WriteStats:
+        """返回自上次调用以来的写入统计并清零"""
+        with self._lock:
+            stats, self._stats = self._stats, WriteStats()
+        return stats
@@ -0,0 +1,94 @@
+import gzip
+import os
+from core.config import STATIC_CONFIG
+from core.static_meta import StaticMetaCache, content_digest
+from generator.output_writer import atomic_write
+
+try:
+    import brotlicffi as brotli
+except ImportError:
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+# 值得预压缩的文本类文件扩展名
+COMPRESSIBLE_EXTENSIONS = {".html", ".htm", ".css", ".js", ".json", ".svg", ".txt", ".xml", ".ico", ".md"}
+
+# (Content-Encoding, 副本后缀)，按服务端的优先顺序排列
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# 因压缩后不变小而有意不生成的副本: {副本路径: 源内容摘要}，内容未变时视为副本齐全
+_absent: dict[str, str] = {}
+
+def is_compressible(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+def _compress(encoding: str, data: bytes) -> bytes | None:
+    if encoding == "gzip":
+        # mtime=0 使相同内容得到相同的压缩结果 (ETag 稳定)
+        return gzip.compress(data, compresslevel=STATIC_CONFIG["gzip_level"], mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=STATIC_CONFIG["brotli_quality"])
+    return None
+
+def remove_siblings(path: str) -> None:
+    meta = StaticMetaCache()
+    for _, suffix in ENCODINGS:
+        sibling = path + suffix
+        try:
+            os.remove(sibling)
+        except FileNotFoundError:
+            pass
+        meta.forget(sibling)
+        _absent.pop(sibling, None)
+
+def _eligible(path: str, size: int) -> bool:
+    return (
+        STATIC_CONFIG["precompress"]
+        and is_compressible(path)
+        and size >= STATIC_CONFIG["precompress_min_size"]
+    )
+
+def has_siblings(path: str, data: bytes) -> bool:
+    """应有的压缩副本是否都已存在 (不需要副本的文件、对当前内容有意省略的副本视为已存在)"""
+    if not _eligible(path, len(data)):
+        return True
+    digest = None
+    for encoding, suffix in ENCODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        sibling = path + suffix
+        if os.path.exists(sibling):
+            continue
+        if digest is None:
+            digest = content_digest(data)
+        if _absent.get(sibling) != digest:
+            return False
+    return True
+
+def write_siblings(path: str, data: bytes) -> None:
+    """
+    为 path (内容为 data) 写出压缩副本并登记其摘要。
+    不可压缩的类型、过小的文件或压缩后不变小的编码会删除已有副本，避免发送过期内容。
+    """
+    meta = StaticMetaCache()
+    eligible = _eligible(path, len(data))
+    digest = content_digest(data) if eligible else None
+    for encoding, suffix in ENCODINGS:
+        sibling = path + suffix
+        compressed = _compress(encoding, data) if eligible else None
+        if compressed is None or len(compressed) >= len(data):
+            try:
+                os.remove(sibling)
+            except FileNotFoundError:
+                pass
+            meta.forget(sibling)
+            if compressed is not None:
+                _absent[sibling] = digest
+            else:
+                _absent.pop(sibling, None)
+            continue
+        _absent.pop(sibling, None)
+        atomic_write(sibling, compressed)
+        meta.record(sibling, content_digest(compressed))
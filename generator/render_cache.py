@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# 修改 Markdown 扩展或链接渲染逻辑时递增，使旧缓存全部失效
+RENDER_CACHE_VERSION = 1
+
+class RecordingResolver:
+    """
+    包装 URLManager，记录一次渲染中解析过的每个链接及其结果。
+    这些记录作为缓存条目的依赖，命中时重新解析以确认链接目标未变。
+    """
+
+    def __init__(self, url_mgr):
+        self.url_mgr = url_mgr
+        self.deps: list[tuple[str, str, str | None]] = []
+
+    def get_cid_from_external_url(self, url: str) -> str | None:
+        result = self.url_mgr.get_cid_from_external_url(url)
+        self.deps.append(("ext", url, result))
+        return result
+
+    def get_url_by_cid(self, cid: str) -> str | None:
+        result = self.url_mgr.get_url_by_cid(cid)
+        self.deps.append(("cid", cid, result))
+        return result
+
+class SnapshotResolver:
+    """
+    基于预先解析好的链接快照的解析器，供渲染进程使用，不访问 URLManager 或数据库。
+    - external: {外部 URL: cid 或 None}
+    - urls: {cid: 站内路径或 None}
+    查询快照中没有的键时置 missing，调用方应改为在主进程渲染。
+    """
+
+    def __init__(self, external: dict, urls: dict):
+        self.external = external
+        self.urls = urls
+        self.missing = False
+
+    def get_cid_from_external_url(self, url: str) -> str | None:
+        if url not in self.external:
+            self.missing = True
+            return None
+        return self.external[url]
+
+    def get_url_by_cid(self, cid: str) -> str | None:
+        if cid not in self.urls:
+            self.missing = True
+            return None
+        return self.urls[cid]
+
+class RenderEntry:
+    __slots__ = ("html", "refs", "deps")
+
+    def __init__(self, html: str, refs, deps):
+        self.html = html
+        self.refs = frozenset(refs)
+        self.deps = tuple(tuple(d) for d in deps)
+
+    def is_valid(self, url_mgr) -> bool:
+        """依赖的链接解析结果全部未变时条目有效。"""
+        for kind, key, expected in self.deps:
+            if kind == "ext":
+                actual = url_mgr.get_cid_from_external_url(key)
+            else:
+                actual = url_mgr.get_url_by_cid(key)
+            if actual != expected:
+                return False
+        return True
+
+class RenderCache:
+    """
+    Markdown 正文 → HTML 片段的内容寻址缓存。
+    键为 (缓存版本, 站点地址, 正文) 的摘要；条目同时保存引用集合和链接解析依赖。
+    内存中按 LRU 淘汰，设置 disk_dir 时额外持久化到磁盘，供重启和其他渲染进程复用。
+    """
+
+    def __init__(self, max_entries: int = 2048, disk_dir: str | None = None, salt: str = ""):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.salt = salt
+        self._entries: OrderedDict[str, RenderEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def make_key(self, markdown_text: str) -> str:
+        h = hashlib.sha256()
+        h.update(f"{RENDER_CACHE_VERSION}\0{self.salt}\0".encode("utf-8"))
+        h.update(markdown_text.encode("utf-8"))
+        return h.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def get(self, key: str) -> RenderEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            entry = RenderEntry(raw["html"], raw["refs"], raw["deps"])
+        except (OSError, ValueError, KeyError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, entry: RenderEntry) -> None:
+        self._remember(key, entry)
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"html": entry.html, "refs": sorted(entry.refs), "deps": entry.deps}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[RenderCache] Disk write failed: {e}")
+
+    def _remember(self, key: str, entry: RenderEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def lookup(self, markdown_text: str, url_mgr, count: bool = True) -> tuple[str, RenderEntry | None]:
+        """返回 (key, 有效条目或 None)，count 为 True 时统计命中率。"""
+        key = self.make_key(markdown_text)
+        entry = self.get(key)
+        if entry is not None and entry.is_valid(url_mgr):
+            if count:
+                self.hits += 1
+            return key, entry
+        if count:
+            self.misses += 1
+        return key, None
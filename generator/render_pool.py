@@ -0,0 +1,60 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from generator.renderer import convert_with_snapshot
+
+class RenderPool:
+    """
+    多进程文章渲染池。
+    Markdown 转换是 CPU 密集型的，批量渲染时把纯转换分发到工作进程，结果按提交顺序返回。
+    链接解析 (预热过的 URL 缓存)、渲染缓存与数据库写回都留在主进程:
+    提交前用主进程的 URLManager 解析出正文涉及的链接快照，工作进程不访问数据库。
+    使用 spawn 启动工作进程，避免继承父进程的数据库连接池。
+    """
+
+    def __init__(self, workers: int | None = None, max_pending: int | None = None):
+        self.workers = workers or os.cpu_count() or 1
+        # 同时在途的任务上限，避免一次性把整批正文都序列化进队列
+        self.max_pending = max_pending or self.workers * 4
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def render_posts(self, items: list[tuple[dict, str]], renderer):
+        """
+        用 renderer (主进程的 HTMLRenderer) 并行渲染 [(post_data, author_name), ...]。
+        渲染缓存命中的文章不提交到工作进程。按输入顺序逐个产出 (post_data, author_name, html 或 Exception)。
+        """
+        for start in range(0, len(items), self.max_pending):
+            window = items[start:start + self.max_pending]
+            executor = self._get_executor()
+            futures = []
+            for data, _ in window:
+                if renderer.has_cached_render(data):
+                    futures.append(None)
+                    continue
+                raw_content = str(data.get("context", "") or "")
+                futures.append(executor.submit(convert_with_snapshot, raw_content, renderer.link_snapshot(data)))
+
+            for (data, author), fut in zip(window, futures):
+                try:
+                    # 工作进程返回 None (快照未覆盖的链接) 时在本进程转换
+                    converted = fut.result() if fut is not None else None
+                    yield data, author, renderer.render_post(data, author, data["cid"], converted)
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        # 工作进程异常退出后整个池不可用，下一批重新创建
+                        self.close()
+                    yield data, author, e
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -1,16 +1,79 @@
 import os
+import threading
 import markdown
 import re
+from collections import OrderedDict
+from core.config import RENDER_CONFIG, SERVER_CONFIG
 from core.url_manager import URLManager
-from generator.markdown_extensions import CiteReferenceExtension
-from generator.content_updater import update_post_content_in_db, update_post_references_in_db
+from generator.markdown_extensions import CiteReferenceExtension, LINK_RE, AUTOLINK_RE, CID_SCHEME
+from generator.render_cache import RenderCache, RenderEntry, RecordingResolver, SnapshotResolver
+from generator.content_updater import apply_render_results
 from dao import interact_dao
 
+# 每个线程复用一个 Markdown 实例，避免每篇文章重复注册扩展、编译正则
+_md_local = threading.local()
+
+def _get_markdown() -> tuple[markdown.Markdown, CiteReferenceExtension]:
+    engine = getattr(_md_local, "engine", None)
+    if engine is None:
+        cite_ext = CiteReferenceExtension()
+        md = markdown.Markdown(extensions=['fenced_code', 'tables', 'toc', cite_ext])
+        engine = _md_local.engine = (md, cite_ext)
+    return engine
+
+def convert_markdown(text: str, url_mgr, db_callback) -> str:
+    """用当前线程的 Markdown 实例转换一篇文档，url_mgr 与 db_callback 仅对本次转换生效。"""
+    md, cite_ext = _get_markdown()
+    cite_ext.bind(url_mgr, db_callback)
+    try:
+        md.reset()
+        return md.convert(text)
+    finally:
+        cite_ext.bind(None, None)
+
+def convert_post_content(raw_content: str, url_mgr) -> tuple[str, set, dict, list]:
+    """
+    转换文章正文，渲染过程中只收集链接改写和引用，不写数据库。
+    返回 (HTML, 引用的 CID 集合, 链接改写 {old_str: new_str}, 链接解析依赖)。
+    """
+    found_refs = set()
+    rewrites = {}
+
+    def processor_callback(old_str, new_str, target_cid):
+        if target_cid: found_refs.add(target_cid)
+        if old_str and new_str:
+            rewrites[old_str] = new_str
+
+    resolver = RecordingResolver(url_mgr)
+    html = convert_markdown(raw_content, resolver, processor_callback)
+    return html, found_refs, rewrites, resolver.deps
+
+def convert_with_snapshot(raw_content: str, snapshot: tuple[dict, dict]):
+    """
+    在渲染进程中执行的纯转换: 链接按主进程给出的快照 (见 HTMLRenderer.link_snapshot) 解析。
+    正文中出现快照未覆盖的链接时返回 None，由主进程自行渲染。
+    """
+    resolver = SnapshotResolver(*snapshot)
+    result = convert_post_content(raw_content, resolver)
+    return None if resolver.missing else result
+
+def _post_markdown(post_data: dict) -> str:
+    return str(post_data.get("context", "") or "")
+
 class HTMLRenderer:
     """渲染 HTML 内容 - VitePress 风格"""
 
     def __init__(self):
         self.url_mgr = URLManager()
+        # 链接展示文本中包含站点地址，地址变化时缓存需失效
+        self.render_cache = RenderCache(
+            max_entries=RENDER_CONFIG["cache_size"],
+            disk_dir=RENDER_CONFIG["cache_dir"],
+            salt=f"{SERVER_CONFIG['host']}:{SERVER_CONFIG['port']}"
+        )
+        # 最近写回过的文章引用集合 {cid: refs}，缓存命中且引用未变时无需再访问数据库
+        self._applied_refs: OrderedDict[str, frozenset] = OrderedDict()
+        self._applied_lock = threading.Lock()
         
         current_dir = os.path.dirname(__file__)
         project_root = os.path.dirname(current_dir)
@@ -91,15 +154,16 @@ class HTMLRenderer:
         return """..."""
 
     def render_user_index(self, username: str, categorized_posts: dict) -> str:
-        # 使用 username 直接查询统计，增加容错保护
-        total_likes = 0
-        total_comments = 0
+        # 一次批量查询该用户全部文章的统计，总数由单篇统计累加，增加容错保护
+        all_cids = [p['cid'] for posts in categorized_posts.values() for p in posts]
+        stats = {}
         try:
-            total_likes = interact_dao.count_total_likes_for_username(username)
-            total_comments = interact_dao.count_total_comments_for_username(username)
+            stats = interact_dao.count_stats_for_posts(all_cids)
         except Exception as e:
             print(f"[-] Error fetching stats for {username}: {e}")
             # 出错时不中断渲染，默认显示 0
+        total_likes = sum(s['likes'] for s in stats.values())
+        total_comments = sum(s['comments'] for s in stats.values())
 
         parts = []
         for category in sorted(categorized_posts.keys()):
@@ -109,14 +173,10 @@ class HTMLRenderer:
                 is_public = p.get('is_public', False)
                 is_public_checked = "checked" if is_public else ""
                 
-                # 获取单篇文章的统计数据 (初始值)
-                p_likes = 0
-                p_comments = 0
-                try:
-                    p_likes = interact_dao.count_likes_for_post(p['cid'])
-                    p_comments = interact_dao.count_comments_for_post(p['cid'])
-                except Exception:
-                    pass
+                # 单篇文章的统计数据 (初始值)
+                p_stats = stats.get(p['cid'], {})
+                p_likes = p_stats.get('likes', 0)
+                p_comments = p_stats.get('comments', 0)
 
                 # 定义：私有文章 (Private Post) 指 is_public 为 False 的文章
                 visibility_style = 'style="display:none;"' if not is_public else ''
@@ -189,9 +249,19 @@ class HTMLRenderer:
         )
 
     def render_playground_page(self, posts: list[dict]) -> str:
+        rel_paths = self.url_mgr.register_mappings(
+            [(p['cid'], p['author'], p['category'], p['title']) for p in posts]
+        )
+        stats = {}
+        try:
+            stats = interact_dao.count_stats_for_posts([p['cid'] for p in posts])
+        except Exception as e:
+            print(f"[-] Error fetching playground stats: {e}")
         items = []
-        for p in posts:
-            rel_path = self.url_mgr.register_mapping(p['cid'], p['author'], p['category'], p['title'])
+        for p, rel_path in zip(posts, rel_paths):
+            if rel_path is None:
+                # 映射冲突未写入的文章没有对应页面
+                continue
             filename = f"/{rel_path}.html"
             
             raw_snippet = p.get('snippet', '') or ''
@@ -202,13 +272,9 @@ class HTMLRenderer:
                 clean_snippet = "暂无预览"
 
             # 统计数据 (初始值)
-            p_likes = 0
-            p_comments = 0
-            try:
-                p_likes = interact_dao.count_likes_for_post(p['cid'])
-                p_comments = interact_dao.count_comments_for_post(p['cid'])
-            except Exception:
-                pass
+            p_stats = stats.get(p['cid'], {})
+            p_likes = p_stats.get('likes', 0)
+            p_comments = p_stats.get('comments', 0)
 
             # 添加 playground-item 类，以及 data-cid, data-type
             item_html = f"""
@@ -244,8 +310,37 @@ class HTMLRenderer:
             meta_extra='<meta name="page-type" content="playground">'
         )
 
-    def render_post(self, post_data: dict, author_name: str, cid: str) -> str:
-        raw_content = str(post_data.get("context", "") or "")
+    def has_cached_render(self, post_data: dict) -> bool:
+        """正文在渲染缓存中有有效条目 (不计入命中率统计)"""
+        _, cached = self.render_cache.lookup(_post_markdown(post_data), self.url_mgr, count=False)
+        return cached is not None
+
+    def link_snapshot(self, post_data: dict) -> tuple[dict, dict]:
+        """
+        用本进程的 URLManager (已预热的缓存) 预先解析正文中出现的链接，
+        返回 convert_with_snapshot 所需的 ({外部 URL: cid}, {cid: 站内路径})。
+        """
+        external, urls = {}, {}
+        raw_content = _post_markdown(post_data)
+        hrefs = [m.group(2) for m in re.finditer(LINK_RE, raw_content)]
+        hrefs += [m.group(1) for m in re.finditer(AUTOLINK_RE, raw_content)]
+        for href in hrefs:
+            if href.startswith(CID_SCHEME):
+                target_cid = href[len(CID_SCHEME):]
+            elif href not in external:
+                target_cid = external[href] = self.url_mgr.get_cid_from_external_url(href)
+            else:
+                continue
+            if target_cid and target_cid not in urls:
+                urls[target_cid] = self.url_mgr.get_url_by_cid(target_cid)
+        return external, urls
+
+    def render_post(self, post_data: dict, author_name: str, cid: str, converted: tuple | None = None) -> str:
+        """
+        渲染文章页面。converted 为渲染进程返回的 convert_post_content 结果，
+        给出时直接使用 (写入渲染缓存)，否则查缓存或在本进程转换。
+        """
+        raw_content = _post_markdown(post_data)
         desc_text = post_data.get("description", "")
         is_public = post_data.get("is_public", False)
         
@@ -259,19 +354,22 @@ class HTMLRenderer:
         else:
             description_html = ""
         
-        found_refs = set()
-        def processor_callback(old_str, new_str, target_cid):
-            if target_cid: found_refs.add(target_cid)
-            if old_str and new_str:
-                update_post_content_in_db(cid, old_str, new_str)
-
-        md = markdown.Markdown(extensions=[
-            'fenced_code', 'tables', 'toc',
-            CiteReferenceExtension(url_mgr=self.url_mgr, db_callback=processor_callback)
-        ])
-        content = md.convert(raw_content)
-
-        update_post_references_in_db(cid, found_refs)
+        # 正文与链接解析结果都未变时直接复用 HTML，只改了元数据的重渲染无需再跑 Markdown
+        if converted is not None:
+            cache_key, cached = self.render_cache.make_key(raw_content), None
+            self.render_cache.misses += 1
+        else:
+            cache_key, cached = self.render_cache.lookup(raw_content, self.url_mgr)
+
+        if cached is not None:
+            content, found_refs, rewrites = cached.html, set(cached.refs), {}
+        else:
+            content, found_refs, rewrites, deps = converted or convert_post_content(raw_content, self.url_mgr)
+            # 发生过链接改写的正文随后会在库中被替换，不缓存旧正文
+            if not rewrites:
+                self.render_cache.put(cache_key, RenderEntry(content, found_refs, deps))
+
+        self._apply_results(cid, rewrites, found_refs, cache_hit=cached is not None)
         
         title = post_data.get("title", "Untitled")
         
@@ -290,4 +388,25 @@ class HTMLRenderer:
             content=fragment_html,
             page_title=f"{title} - {author_name}",
             meta_extra=f'<meta name="post-cid" content="{cid}">\n<meta name="post-author" content="{author_name}">'
-        )
\ No newline at end of file
+        )
+
+    def _apply_results(self, cid: str, rewrites: dict, refs: set, cache_hit: bool):
+        """写回链接改写与引用关系。缓存命中 (没有改写) 且引用与上次写回的相同时直接返回。"""
+        refs = frozenset(refs)
+        if cache_hit and not rewrites:
+            with self._applied_lock:
+                if self._applied_refs.get(cid) == refs:
+                    self._applied_refs.move_to_end(cid)
+                    return
+
+        apply_render_results(cid, list(rewrites.items()), set(refs))
+
+        with self._applied_lock:
+            if rewrites:
+                # 正文已被改写，随后会以新正文重新渲染
+                self._applied_refs.pop(cid, None)
+                return
+            self._applied_refs[cid] = refs
+            self._applied_refs.move_to_end(cid)
+            while len(self._applied_refs) > RENDER_CONFIG["cache_size"]:
+                self._applied_refs.popitem(last=False)
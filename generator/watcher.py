@@ -1,39 +1,139 @@
+import sys
 import time
+from datetime import timedelta
+from core.config import WATCHER_CONFIG, SEARCH_CONFIG
+from core.search_index import SearchIndex
 from dao.factory import create_connection
+from dao.change_dao import MySQLPostChangeDAO
+from dao.post_dao import MySQLPostDAO
 from dao.reference_dao import MySQLPostReferenceDAO
 from generator.builder import StaticSiteGenerator
 
+POST_COLUMNS = "cid, owner_id, title, context, description, date, category, is_public"
+# 快照只保存元数据和正文摘要，正文、摘要、日期在 SQL 端压缩为 16 字节 MD5，不经网络传输
+RECORD_COLUMNS = (
+    "cid, owner_id, title, category, is_public, "
+    "UNHEX(MD5(CONCAT_WS(CHAR(0), IFNULL(`context`, ''), IFNULL(description, ''), date))), "
+    "updated_at"
+)
+# IN (...) 查询每批的 cid 数量
+FETCH_CHUNK = 500
+
+class PostRecord:
+    """快照中每篇文章的紧凑记录。"""
+    __slots__ = ("owner_id", "title", "category", "is_public", "digest")
+
+    def __init__(self, owner_id, title, category, is_public, digest):
+        self.owner_id = owner_id
+        self.title = title
+        self.category = sys.intern(category) if category else category
+        self.is_public = is_public
+        self.digest = digest
+
+    def __eq__(self, other):
+        if not isinstance(other, PostRecord):
+            return NotImplemented
+        return (self.owner_id == other.owner_id and self.title == other.title
+                and self.category == other.category and self.is_public == other.is_public
+                and self.digest == other.digest)
+
+    def sizeof(self) -> int:
+        size = sys.getsizeof(self) + sys.getsizeof(self.title) + sys.getsizeof(self.digest)
+        # category 已 intern，由多条记录共享，不重复计入
+        return size
+
 class DBWatcher:
     """
-    后台轮询监听器。
+    后台变更监听器，支持两种变更来源:
+    - feed: 按顺序消费 post_changes 变更队列，只渲染实际变化的文章，不在内存中保留快照
+    - poll: 基于 posts.updated_at 高水位增量拉取变更行，并用仅含 cid 的扫描检测删除；
+            快照只保存 PostRecord，正文只为需要重新渲染的文章拉取
     """
-    def __init__(self, generator: StaticSiteGenerator):
+    # 高水位回退的秒数，用于兜住扫描时尚未提交、但 updated_at 更早的事务
+    OVERLAP_SECONDS = 2
+
+    def __init__(self, generator: StaticSiteGenerator, mode: str | None = None):
         self.gen = generator
+        self.mode = mode or WATCHER_CONFIG["mode"]
         self.running = False
-        self._snapshot = {} 
+        self._snapshot: dict[str, PostRecord] = {}
+        self._high_water = None
+        # feed 模式下各 cid 的变更连续渲染失败的次数
+        self._feed_failures: dict[str, int] = {}
+        # 进程内搜索索引，由 start() 按 SEARCH_CONFIG 决定是否启用
+        self.search_index: SearchIndex | None = None
 
-    def _get_current_state(self):
-        state = {}
+    def _row_to_info(self, r):
+        cid, owner_id = r[0], r[1]
+        data_map = {
+            "cid": cid, "owner_id": owner_id,
+            "title": r[2], "context": r[3],
+            "description": r[4], "date": str(r[5]),
+            "category": r[6], "is_public": bool(r[7])
+        }
+        return {"owner_id": owner_id, "data": data_map}
+
+    def _get_changed_records(self):
+        """
+        拉取高水位之后变更过的文章记录（不含正文）；首次调用时为全量。
+        返回 (records, 新高水位)，高水位由调用方在处理成功后再推进。
+        """
+        records = {}
+        high_water = self._high_water
         conn = create_connection()
         try:
-            # [新增] 包含 is_public
             with conn.cursor() as cur:
-                cur.execute("SELECT cid, owner_id, title, context, description, date, category, is_public FROM posts")
+                if self._high_water is None:
+                    cur.execute(f"SELECT {RECORD_COLUMNS} FROM posts")
+                else:
+                    since = self._high_water - timedelta(seconds=self.OVERLAP_SECONDS)
+                    cur.execute(f"SELECT {RECORD_COLUMNS} FROM posts WHERE updated_at >= %s", (since,))
                 rows = cur.fetchall()
-                for r in rows:
-                    cid, owner_id = r[0], r[1]
-                    data_map = {
-                        "cid": cid, "owner_id": owner_id, 
-                        "title": r[2], "context": r[3], 
-                        "description": r[4], "date": str(r[5]), 
-                        "category": r[6], "is_public": bool(r[7])
-                    }
-                    sig = hash(tuple(data_map.values()))
-                    state[cid] = {"owner_id": owner_id, "data": data_map, "signature": sig}
+        finally:
+            conn.close()
+
+        for r in rows:
+            records[r[0]] = PostRecord(r[1], r[2], r[3], bool(r[4]), r[5])
+            if high_water is None or r[6] > high_water:
+                high_water = r[6]
+        return records, high_water
+
+    def _get_state_by_cids(self, cids):
+        """按 cid 拉取完整文章数据（含正文），用于渲染。"""
+        state = {}
+        cids = list(cids)
+        if not cids:
+            return state
+        conn = create_connection()
+        try:
+            with conn.cursor() as cur:
+                for i in range(0, len(cids), FETCH_CHUNK):
+                    chunk = cids[i:i + FETCH_CHUNK]
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    cur.execute(f"SELECT {POST_COLUMNS} FROM posts WHERE cid IN ({placeholders})", tuple(chunk))
+                    for r in cur.fetchall():
+                        state[r[0]] = self._row_to_info(r)
         finally:
             conn.close()
         return state
 
+    def snapshot_size(self) -> int:
+        """估算快照占用的内存字节数（dict 本身 + cid + 记录）。"""
+        size = sys.getsizeof(self._snapshot)
+        for cid, rec in self._snapshot.items():
+            size += sys.getsizeof(cid) + rec.sizeof()
+        return size
+
+    def _get_live_cids(self):
+        """只扫描 cid 列，用于检测删除。"""
+        conn = create_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT cid FROM posts")
+                return {r[0] for r in cur.fetchall()}
+        finally:
+            conn.close()
+
     def _get_username(self, user_id):
         conn = create_connection()
         try:
@@ -44,71 +144,35 @@ class DBWatcher:
         finally:
             conn.close()
 
-    def _scan(self):
-        new_state = self._get_current_state()
-        
-        tasks = {}
-        affected_users = set()
-
-        for cid, info in new_state.items():
-            old_info = self._snapshot.get(cid)
-            
-            if not old_info or old_info["signature"] != info["signature"]:
-                tasks[cid] = info
-                
-                if old_info:
-                    old_data = old_info["data"]
-                    new_data = info["data"]
-                    if old_data["title"] != new_data["title"] or old_data["category"] != new_data["category"]:
-                        print(f"[Watcher] Cascade Trigger: {cid} changed URL structure.")
-                        conn = create_connection()
-                        try:
-                            ref_dao = MySQLPostReferenceDAO(conn)
-                            referencing_cids = ref_dao.get_referencing_posts(cid)
-                            
-                            for ref_cid in referencing_cids:
-                                if ref_cid in new_state and ref_cid not in tasks:
-                                    print(f"[Watcher] Cascade Update: Adding {ref_cid} to tasks.")
-                                    tasks[ref_cid] = new_state[ref_cid]
-                        finally:
-                            conn.close()
-
-        for cid, info in self._snapshot.items():
-            if cid not in new_state:
-                self.gen.remove_post_file(cid)
-                affected_users.add(info["owner_id"])
-
-        if tasks:
-            for cid in tasks:
-                if cid in self._snapshot:
-                    old_data = self._snapshot[cid]["data"]
-                    new_data = tasks[cid]["data"]
-                    
-                    old_title = old_data.get("title", "untitled")
-                    old_cat = old_data.get("category", "default")
-                    new_title = new_data.get("title", "untitled")
-                    new_cat = new_data.get("category", "default")
-
-                    if old_title != new_title or old_cat != new_cat:
-                        username = self._get_username(self._snapshot[cid]["owner_id"])
-                        self.gen.remove_post_file_by_meta(username, old_cat, old_title)
+    def _get_referencing_cids(self, cid):
+        conn = create_connection()
+        try:
+            ref_dao = MySQLPostReferenceDAO(conn)
+            return ref_dao.get_referencing_posts(cid)
+        finally:
+            conn.close()
 
+    def _render(self, tasks, affected_users):
+        """重新生成 tasks 中的文章，并刷新受影响用户的索引页和广场。"""
         if tasks:
             print(f"[Watcher] Pre-updating URL mappings for {len(tasks)} tasks...")
-            for cid, info in tasks.items():
-                username = self._get_username(info["owner_id"])
-                data = info["data"]
-                self.gen.url_mgr.register_mapping(
-                    data["cid"], 
-                    username, 
-                    data.get("category", "default"), 
-                    data.get("title", "untitled")
+            self.gen.url_mgr.register_mappings([
+                (
+                    info["data"]["cid"],
+                    self._get_username(info["owner_id"]),
+                    info["data"].get("category", "default"),
+                    info["data"].get("title", "untitled")
                 )
+                for info in tasks.values()
+            ])
 
+        items = []
         for cid, info in tasks.items():
-            username = self._get_username(info["owner_id"])
-            self.gen.sync_post_file(info["data"], username)
+            items.append((info["data"], self._get_username(info["owner_id"])))
             affected_users.add(info["owner_id"])
+            if self.search_index is not None:
+                self.search_index.update_post(info["data"])
+        self.gen.sync_post_files(items)
 
         for uid in affected_users:
             self.gen.sync_user_index(uid)
@@ -117,11 +181,231 @@ class DBWatcher:
         if tasks or affected_users:
             self.gen.sync_playground()
 
-        self._snapshot = new_state
+        stats = self.gen.writer.take_stats()
+        if stats:
+            print(f"[Watcher] Output: {stats}")
 
-    def start(self, interval=3):
-        self.gen.init_output_dir()
-        self.running = True
+    def _scan(self):
+        changed, high_water = self._get_changed_records()
+        live_cids = self._get_live_cids()
+
+        task_cids = set()
+        affected_users = set()
+        cascade_cids = set()
+        renamed = {}
+
+        for cid, rec in changed.items():
+            if cid not in live_cids:
+                continue
+            old_rec = self._snapshot.get(cid)
+            if old_rec is not None and old_rec == rec:
+                continue
+
+            task_cids.add(cid)
+            if old_rec is not None and (old_rec.title != rec.title or old_rec.category != rec.category):
+                print(f"[Watcher] Cascade Trigger: {cid} changed URL structure.")
+                renamed[cid] = old_rec
+                cascade_cids.update(self._get_referencing_cids(cid))
+
+        for ref_cid in cascade_cids:
+            if ref_cid in live_cids and ref_cid not in task_cids:
+                print(f"[Watcher] Cascade Update: Adding {ref_cid} to tasks.")
+                task_cids.add(ref_cid)
+
+        deleted = [cid for cid in self._snapshot if cid not in live_cids]
+        for cid in deleted:
+            rec = self._snapshot[cid]
+            if not self.gen.remove_post_file(cid):
+                # url_mappings 行已随文章级联删除，映射不在缓存中时按快照中的元数据定位文件
+                self.gen.remove_post_file_by_meta(self._get_username(rec.owner_id), rec.category, rec.title)
+            affected_users.add(rec.owner_id)
+            if self.search_index is not None:
+                self.search_index.remove_post(cid)
+
+        for cid, old_rec in renamed.items():
+            username = self._get_username(old_rec.owner_id)
+            self.gen.remove_post_file_by_meta(username, old_rec.category, old_rec.title)
+
+        # 只为需要重新渲染的文章拉取正文
+        tasks = self._get_state_by_cids(task_cids)
+        self._render(tasks, affected_users)
+
+        first_scan = self._high_water is None
+        if first_scan and self.search_index is not None and not self.search_index.ready:
+            # 首次扫描渲染了全部文章，索引随之建好
+            self.search_index.mark_ready()
+            print(f"[Watcher] Search index ready: {len(self.search_index)} public posts, "
+                  f"{self.search_index.memory_usage() / 1024 / 1024:.1f} MiB postings")
+        for cid in deleted:
+            del self._snapshot[cid]
+        for cid, rec in changed.items():
+            if cid in live_cids:
+                self._snapshot[cid] = rec
+        self._high_water = high_water
+
+        if first_scan and self._snapshot:
+            size = self.snapshot_size()
+            per_10k = size * 10000 / len(self._snapshot)
+            print(f"[Watcher] Snapshot: {len(self._snapshot)} posts, {size / 1024:.1f} KiB "
+                  f"({per_10k / 1024 / 1024:.2f} MiB per 10k posts)")
+
+    def _consume_changes(self, batch_size):
+        """
+        处理变更队列中最早的一批事件，成功渲染后按 id 确认 (删除)。
+        整批渲染失败时逐篇文章重试，成功的部分照常确认；
+        同一文章连续失败 feed_max_attempts 次后放弃其变更，避免一篇文章阻塞整个队列。
+        返回本批确认的事件数。
+        """
+        conn = create_connection()
+        try:
+            events = MySQLPostChangeDAO(conn).fetch_changes(batch_size)
+        finally:
+            conn.close()
+        if not events:
+            return 0
+
+        try:
+            self._apply_changes(events)
+            done = events
+        except Exception as e:
+            print(f"[Watcher] Batch of {len(events)} changes failed ({e}), retrying per post")
+            done = self._apply_changes_per_post(events)
+
+        if done:
+            conn = create_connection()
+            try:
+                MySQLPostChangeDAO(conn).ack_changes([ev[0] for ev in done])
+            finally:
+                conn.close()
+        return len(done)
+
+    def _apply_changes_per_post(self, events):
+        """逐个 cid 处理事件，返回可以确认的事件 (渲染成功或已放弃)。"""
+        by_cid = {}
+        for ev in events:
+            by_cid.setdefault(ev[1], []).append(ev)
+
+        done, failed = [], {}
+        for cid, evs in by_cid.items():
+            try:
+                self._apply_changes(evs)
+                done.extend(evs)
+                self._feed_failures.pop(cid, None)
+            except Exception as e:
+                failed[cid] = (evs, e)
+
+        # 全部失败更可能是数据库等整体故障，不计入单篇文章的失败次数
+        if not done and len(by_cid) > 1:
+            return done
+        max_attempts = WATCHER_CONFIG["feed_max_attempts"]
+        for cid, (evs, e) in failed.items():
+            attempts = self._feed_failures.get(cid, 0) + 1
+            if attempts >= max_attempts:
+                print(f"[Watcher] Dropping {len(evs)} changes for {cid} after {attempts} failed attempts: {e}")
+                self._feed_failures.pop(cid, None)
+                done.extend(evs)
+            else:
+                self._feed_failures[cid] = attempts
+                print(f"[Watcher] Changes for {cid} failed ({attempts}/{max_attempts}): {e}")
+        return done
+
+    def _apply_changes(self, events):
+        """合并并渲染一批事件，出错时抛出异常 (不确认)。"""
+        # 同一 cid 的多条事件合并处理: 首条携带批次前的旧元数据，末条决定是否已删除
+        first, last = {}, {}
+        for ev in events:
+            first.setdefault(ev[1], ev)
+            last[ev[1]] = ev
+
+        current = self._get_state_by_cids(list(first))
+        tasks = {}
+        affected_users = set()
+        cascade_cids = set()
+
+        for cid, ev in first.items():
+            info = current.get(cid)
+            if info is None:
+                if last[cid][2] == "D":
+                    # 删除前若在本批内改过名，旧路径 (首条) 与最终路径 (末条) 都要清理
+                    for _, _, op, old_owner, old_title, old_cat in {ev, last[cid]}:
+                        if op == "I":
+                            continue
+                        username = self._get_username(old_owner)
+                        self.gen.remove_post_file_by_meta(username, old_cat, old_title)
+                        affected_users.add(old_owner)
+                    # 缓存中的映射可能与按元数据推算的路径不同 (如重名时追加的后缀)，一并删除
+                    self.gen.remove_post_file(cid)
+                    if self.search_index is not None:
+                        self.search_index.remove_post(cid)
+                    print(f"[Watcher] Deleted: {cid}")
+                continue
+
+            tasks[cid] = info
+            _, _, op, old_owner, old_title, old_cat = ev
+            new_data = info["data"]
+            if op != "I" and (old_title != new_data["title"] or old_cat != new_data["category"]):
+                print(f"[Watcher] Cascade Trigger: {cid} changed URL structure.")
+                username = self._get_username(old_owner)
+                self.gen.remove_post_file_by_meta(username, old_cat, old_title)
+                if old_owner != info["owner_id"]:
+                    affected_users.add(old_owner)
+                cascade_cids.update(self._get_referencing_cids(cid))
+
+        cascade_cids = {c for c in cascade_cids if c not in tasks}
+        for ref_cid, info in self._get_state_by_cids(list(cascade_cids)).items():
+            print(f"[Watcher] Cascade Update: Adding {ref_cid} to tasks.")
+            tasks[ref_cid] = info
+
+        self._render(tasks, affected_users)
+
+    def _feed_available(self):
+        try:
+            conn = create_connection()
+            try:
+                MySQLPostChangeDAO(conn).get_last_change_id()
+            finally:
+                conn.close()
+            return True
+        except Exception as e:
+            print(f"[Watcher] post_changes feed unavailable: {e}")
+            return False
+
+    def _run_feed(self):
+        interval = WATCHER_CONFIG["feed_interval"]
+        batch_size = WATCHER_CONFIG["feed_batch_size"]
+        print(f"[*] DB Watcher started. Consuming post_changes feed...")
+
+        bootstrapped = False
+        while self.running:
+            try:
+                if not bootstrapped:
+                    # 先全量渲染一次作为起点；此前入队的变更已被覆盖，直接确认
+                    # 只确认扫描前已提交的变更；之后才提交的 (即使 id 更小) 留在队列中再处理一次
+                    conn = create_connection()
+                    try:
+                        dao = MySQLPostChangeDAO(conn)
+                        start_ids = dao.get_change_ids(dao.get_last_change_id())
+                    finally:
+                        conn.close()
+                    self._scan()
+                    self._snapshot = {}
+                    self._high_water = None
+                    conn = create_connection()
+                    try:
+                        MySQLPostChangeDAO(conn).ack_changes(start_ids)
+                    finally:
+                        conn.close()
+                    bootstrapped = True
+                    continue
+
+                # 一批取满说明队列可能还有积压，不等待直接继续
+                if self._consume_changes(batch_size) >= batch_size:
+                    continue
+            except Exception as e:
+                print(f"[Watcher Error] {e}")
+            time.sleep(interval)
+
+    def _run_poll(self, interval):
         print(f"[*] DB Watcher started. Polling every {interval}s...")
         while self.running:
             try:
@@ -130,5 +414,36 @@ class DBWatcher:
                 print(f"[Watcher Error] {e}")
             time.sleep(interval)
 
+    def _use_search_index(self) -> bool:
+        engine = SEARCH_CONFIG["engine"]
+        if engine != "auto":
+            return engine == "memory"
+        try:
+            conn = create_connection()
+            try:
+                return not MySQLPostDAO(conn).has_fulltext_index()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"[Watcher] FULLTEXT index check failed: {e}")
+            return True
+
+    def start(self, interval=3):
+        self.gen.init_output_dir()
+        try:
+            self.gen.url_mgr.warm_cache()
+        except Exception as e:
+            print(f"[Watcher] URL cache warm-up failed: {e}")
+        if self._use_search_index():
+            print("[Watcher] Maintaining in-process search index.")
+            self.search_index = SearchIndex()
+        self.running = True
+        if self.mode in ("feed", "auto") and self._feed_available():
+            self._run_feed()
+        else:
+            if self.mode == "feed":
+                print("[Watcher] Falling back to polling mode.")
+            self._run_poll(interval)
+
     def stop(self):
-        self.running = False
\ No newline at end of file
+        self.running = False
@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import markdown
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator.markdown_extensions import CiteReferenceExtension
+from generator.render_pool import RenderPool
+from generator.renderer import convert_markdown, convert_with_snapshot
+
+class _StubURLManager:
+    """不访问数据库的链接解析器，只用于基准测试"""
+    def get_cid_from_external_url(self, url):
+        return None
+
+    def get_url_by_cid(self, cid):
+        return f"/bench/{cid}.html"
+
+SAMPLE = """# 标题
+
+一段带有 **粗体**、`代码` 和 [引用](http://megacite.cid/abc123) 的正文。
+
+## 小节
+
+| 列 A | 列 B |
+|------|------|
+| 1    | 2    |
+
+```python
+print("hello")
+```
+
+- 列表项 <http://example.com/page>
+- 另一个 [外链](https://example.com)
+"""
+
+def bench_fresh(n: int) -> float:
+    url_mgr = _StubURLManager()
+    start = time.perf_counter()
+    for _ in range(n):
+        md = markdown.Markdown(extensions=[
+            'fenced_code', 'tables', 'toc',
+            CiteReferenceExtension(url_mgr=url_mgr, db_callback=lambda *a: None)
+        ])
+        md.convert(SAMPLE)
+    return time.perf_counter() - start
+
+def bench_pooled(n: int) -> float:
+    url_mgr = _StubURLManager()
+    start = time.perf_counter()
+    for _ in range(n):
+        convert_markdown(SAMPLE, url_mgr, lambda *a: None)
+    return time.perf_counter() - start
+
+def _snapshot() -> tuple[dict, dict]:
+    """SAMPLE 中链接的解析快照，与 _StubURLManager 的结果一致"""
+    return {"http://example.com/page": None, "https://example.com": None}, {"abc123": "/bench/abc123.html"}
+
+def bench_serial_convert(n: int, doc: str) -> float:
+    snapshot = _snapshot()
+    start = time.perf_counter()
+    for _ in range(n):
+        convert_with_snapshot(doc, snapshot)
+    return time.perf_counter() - start
+
+def bench_pool_convert(n: int, doc: str, workers: int) -> float:
+    """RenderPool 的工作进程执行同样的纯转换 (含正文与结果的序列化开销，不含进程启动)"""
+    pool = RenderPool(workers)
+    executor = pool._get_executor()
+    snapshot = _snapshot()
+    list(executor.map(convert_with_snapshot, [doc] * workers, [snapshot] * workers))
+    start = time.perf_counter()
+    list(executor.map(convert_with_snapshot, [doc] * n, [snapshot] * n, chunksize=1))
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    bench_pooled(10)  # 预热线程内的实例
+    fresh = bench_fresh(n)
+    pooled = bench_pooled(n)
+    print(f"[*] {n} renders of a {len(SAMPLE)}-char document")
+    print(f"    new Markdown per render : {fresh / n * 1e6:8.1f} us/render")
+    print(f"    pooled Markdown + reset : {pooled / n * 1e6:8.1f} us/render")
+    print(f"    speedup                 : {fresh / pooled:8.2f}x")
+
+    if workers > 1:
+        # 放大正文，接近真实文章的长度
+        doc = SAMPLE * 20
+        count = max(n // 20, workers)
+        serial = bench_serial_convert(count, doc)
+        parallel = bench_pool_convert(count, doc, workers)
+        print(f"[*] {count} conversions of a {len(doc)}-char document, {workers} workers (cpu_count={os.cpu_count()})")
+        print(f"    in-process              : {serial / count * 1e6:8.1f} us/render")
+        print(f"    RenderPool              : {parallel / count * 1e6:8.1f} us/render")
+        print(f"    speedup                 : {serial / parallel:8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.search_index import SearchIndex
+
+# 常用汉字与英文词，用于生成合成语料
+CJK_POOL = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理府研质信"
+LATIN_POOL = ["python", "mysql", "index", "cache", "server", "async", "render", "markdown",
+              "docker", "linux", "http", "search", "thread", "memory", "queue", "vector"]
+QUERIES = ["数据", "系统设计", "python", "mysql index", "不存在的词组合"]
+
+def make_post(rng: random.Random, i: int) -> dict:
+    body = []
+    for _ in range(40):
+        if rng.random() < 0.2:
+            body.append(rng.choice(LATIN_POOL))
+        else:
+            body.append("".join(rng.choice(CJK_POOL) for _ in range(rng.randint(4, 14))))
+    return {
+        "cid": f"b{i:07d}",
+        "title": "".join(rng.choice(CJK_POOL) for _ in range(6)),
+        "description": "",
+        "context": "，".join(body),
+        "is_public": True,
+    }
+
+def like_scan(posts: list[dict], keyword: str) -> int:
+    """等价于 LIKE '%kw%' 对 title / context / description 的全表扫描"""
+    return sum(
+        1 for p in posts
+        if keyword in p["title"] or keyword in p["context"] or keyword in p["description"]
+    )
+
+def bench_mysql(keyword: str, repeat: int) -> float:
+    from dao.factory import create_connection
+    from dao.post_dao import MySQLPostDAO
+    conn = create_connection()
+    try:
+        dao = MySQLPostDAO(conn)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            dao.search_public_posts_paged(keyword, 0, 15)
+        return (time.perf_counter() - start) / repeat
+    finally:
+        conn.close()
+
+def run(n: int, repeat: int, with_mysql: bool):
+    rng = random.Random(n)
+    posts = [make_post(rng, i) for i in range(n)]
+
+    SearchIndex._instance = None
+    index = SearchIndex()
+    start = time.perf_counter()
+    for p in posts:
+        index.update_post(p)
+    build = time.perf_counter() - start
+    index.mark_ready()
+
+    print(f"[*] {n} posts, {sum(len(p['context']) for p in posts) / n:.0f} chars/post")
+    print(f"    index build    : {build:8.2f} s  ({len(index._postings)} terms, "
+          f"{index.memory_usage() / 1024 / 1024:.1f} MiB postings)")
+    for kw in QUERIES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            _, total = index.search(kw, 0, 15)
+        t_index = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        like_scan(posts, kw)
+        t_scan = time.perf_counter() - start
+
+        line = f"    {kw!r:<16} hits={total:<7} index {t_index * 1e3:8.2f} ms | LIKE scan {t_scan * 1e3:8.2f} ms"
+        if with_mysql:
+            line += f" | MySQL {bench_mysql(kw, repeat) * 1e3:8.2f} ms"
+        print(line)
+
+def main():
+    """
+    用法: python scripts/bench_search.py [posts ...] [--mysql]
+    默认对 10k / 100k 篇合成文章比较进程内索引与 LIKE 全表扫描；
+    --mysql 额外对已配置数据库中的现有数据调用 search_public_posts_paged (FULLTEXT 或 LIKE)。
+    """
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    sizes = [int(a) for a in args] or [10000, 100000]
+    with_mysql = "--mysql" in sys.argv
+    for n in sizes:
+        run(n, repeat=20, with_mysql=with_mysql)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,65 @@
+import hashlib
 import json
+import threading
+import time
 import traceback
+from collections import OrderedDict
 from http.cookies import SimpleCookie
 from urllib.parse import urlparse, parse_qs
 from core.auth import verify_token
+from core.config import INTERACT_CONFIG
+from core.static_meta import etag_matches
 from dao import interact_dao
-from dao.post_dao import get_post_dao
+from dao.factory import create_connection
+from dao.post_dao import MySQLPostDAO
+
+class _StatsCache:
+    """
+    按 cid 缓存 batch_stats 的统计结果，条目在 ttl 秒后过期。
+    点赞/评论写入后立即失效对应 cid，保证操作者本人看到最新计数。
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, cids: list[str]) -> tuple[dict, list[str]]:
+        """返回 (命中的 {cid: stats}, 未命中的 cid 列表)。"""
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for cid in cids:
+                item = self._entries.get(cid)
+                if item is not None and item[0] > now:
+                    found[cid] = item[1]
+                else:
+                    missing.append(cid)
+        return found, missing
+
+    def put_many(self, stats: dict) -> None:
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for cid, value in stats.items():
+                self._entries[cid] = (expires, value)
+                self._entries.move_to_end(cid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, cid: str) -> None:
+        with self._lock:
+            self._entries.pop(cid, None)
+
+_stats_cache = _StatsCache(INTERACT_CONFIG["stats_cache_ttl"], INTERACT_CONFIG["stats_cache_size"])
+
+def _get_post(post_cid: str):
+    """查询文章，连接用完立即归还连接池"""
+    conn = create_connection()
+    try:
+        return MySQLPostDAO(conn).get_post_by_cid(post_cid)
+    finally:
+        conn.close()
 
 def get_current_user(headers):
     if "Cookie" not in headers:
@@ -41,9 +96,6 @@ def handle_interact_routes(handler, path, method, data, server_gen):
         parsed_url = urlparse(path)
         query_params = parse_qs(parsed_url.query)
         
-        # 获取 PostDAO 实例
-        post_dao_inst = get_post_dao()
-
         # ------------------------------------------------
         # GET /api/interact/batch_stats - 批量获取文章统计数据
         # ------------------------------------------------
@@ -53,20 +105,30 @@ def handle_interact_routes(handler, path, method, data, server_gen):
                 _send_json(handler, 400, {'error': '缺少参数 cids'})
                 return True
             
-            # cids 应该是一个逗号分隔的字符串
-            cids = cids_param.split(',')
-            results = {}
-            
-            for cid in cids:
-                if not cid.strip(): continue
-                likes = interact_dao.count_likes_for_post(cid)
-                comments = interact_dao.count_comments_for_post(cid)
-                results[cid] = {
-                    'likes': likes,
-                    'comments': comments
-                }
-            
-            _send_json(handler, 200, results)
+            # cids 应该是一个逗号分隔的字符串，去重并保持顺序
+            cids = list(dict.fromkeys(cid.strip() for cid in cids_param.split(',') if cid.strip()))
+            if len(cids) > INTERACT_CONFIG["batch_max_cids"]:
+                _send_json(handler, 400, {'error': f'cids 数量超过上限 {INTERACT_CONFIG["batch_max_cids"]}'})
+                return True
+
+            results, missing = _stats_cache.get_many(cids)
+            if missing:
+                fetched = interact_dao.count_stats_for_posts(missing)
+                _stats_cache.put_many(fetched)
+                results.update(fetched)
+            results = {cid: results[cid] for cid in cids}
+
+            body = json.dumps(results).encode('utf-8')
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            cache_headers = {
+                'ETag': etag,
+                'Cache-Control': f'max-age={INTERACT_CONFIG["stats_cache_ttl"]}'
+            }
+            if etag_matches(handler.headers.get('If-None-Match', ''), etag):
+                _send_not_modified(handler, cache_headers)
+                return True
+
+            _send_json(handler, 200, results, cache_headers, body)
             return True
 
         # ------------------------------------------------
@@ -82,26 +144,18 @@ def handle_interact_routes(handler, path, method, data, server_gen):
                 _send_json(handler, 400, {'error': '缺少参数 post_cid'})
                 return True
 
-            # 检查文章是否存在
-            post = post_dao_inst.get_post_by_cid(post_cid)
-            if not post:
-                _send_json(handler, 404, {'error': '文章不存在'})
-                return True
-            
-            # 禁止自赞
-            if post.owner_id == user_id:
+            # 存在性检查、禁止自赞、切换与计数在同一事务内完成
+            try:
+                result = interact_dao.toggle_like(user_id, post_cid)
+            except PermissionError:
                 _send_json(handler, 400, {'error': '不能给自己点赞'})
                 return True
+            if result is None:
+                _send_json(handler, 404, {'error': '文章不存在'})
+                return True
 
-            # 执行点赞逻辑
-            if interact_dao.has_user_liked(user_id, post_cid):
-                interact_dao.remove_like(user_id, post_cid)
-                action = 'removed'
-            else:
-                interact_dao.add_like(user_id, post_cid)
-                action = 'added'
-            
-            new_count = interact_dao.count_likes_for_post(post_cid)
+            action, new_count = result
+            _stats_cache.invalidate(post_cid)
             _send_json(handler, 200, {'status': 'ok', 'action': action, 'count': new_count})
             return True
 
@@ -114,8 +168,9 @@ def handle_interact_routes(handler, path, method, data, server_gen):
                 _send_json(handler, 400, {'error': '缺少 post_cid'})
                 return True
                 
-            likes = interact_dao.count_likes_for_post(post_cid)
-            comments = interact_dao.count_comments_for_post(post_cid)
+            stats = interact_dao.get_post_stats(post_cid)
+            likes = stats['likes']
+            comments = stats['comments']
             liked_by_me = False
             if user_id:
                 liked_by_me = interact_dao.has_user_liked(user_id, post_cid)
@@ -147,6 +202,7 @@ def handle_interact_routes(handler, path, method, data, server_gen):
                 return True
 
             interact_dao.create_comment(user_id, post_cid, content)
+            _stats_cache.invalidate(post_cid)
             _send_json(handler, 200, {'status': 'ok'})
             return True
 
@@ -159,10 +215,23 @@ def handle_interact_routes(handler, path, method, data, server_gen):
                 _send_json(handler, 400, {'error': '缺少 post_cid'})
                 return True
 
-            comments_data = interact_dao.get_comments_for_post(post_cid)
+            try:
+                before_id = query_params.get('before_id', [None])[0]
+                before_id = int(before_id) if before_id else None
+                limit = int(query_params.get('limit', [INTERACT_CONFIG["comments_page_size"]])[0])
+            except ValueError:
+                _send_json(handler, 400, {'error': '分页参数无效'})
+                return True
+            limit = max(1, min(limit, INTERACT_CONFIG["comments_max_page_size"]))
+
+            # 多取一条用于判断是否还有下一页
+            comments_data = interact_dao.get_comments_for_post(post_cid, before_id, limit + 1)
+            has_more = len(comments_data) > limit
+            comments_data = comments_data[:limit]
+            next_cursor = comments_data[-1].id if has_more else None
             
             # 获取文章作者ID
-            post = post_dao_inst.get_post_by_cid(post_cid)
+            post = _get_post(post_cid)
             post_owner_id = post.owner_id if post else -1
 
             resp_list = []
@@ -181,7 +250,7 @@ def handle_interact_routes(handler, path, method, data, server_gen):
                     'can_delete': can_delete
                 })
 
-            _send_json(handler, 200, {'comments': resp_list})
+            _send_json(handler, 200, {'comments': resp_list, 'next_cursor': next_cursor})
             return True
 
         # ------------------------------------------------
@@ -202,7 +271,7 @@ def handle_interact_routes(handler, path, method, data, server_gen):
                 _send_json(handler, 404, {'error': '评论不存在'})
                 return True
                 
-            post = post_dao_inst.get_post_by_cid(comment.post_cid)
+            post = _get_post(comment.post_cid)
             
             is_sender = (user_id == comment.user_id)
             is_owner = (post and user_id == post.owner_id)
@@ -212,6 +281,7 @@ def handle_interact_routes(handler, path, method, data, server_gen):
                 return True
                 
             interact_dao.delete_comment(comment_id)
+            _stats_cache.invalidate(comment.post_cid)
             _send_json(handler, 200, {'status': 'ok'})
             return True
 
@@ -223,13 +293,24 @@ def handle_interact_routes(handler, path, method, data, server_gen):
         _send_json(handler, 500, {'error': f'Internal Server Error: {str(e)}'})
         return True
 
-def _send_json(handler, code, data):
+def _send_json(handler, code, data, headers=None, body=None):
     try:
-        response = json.dumps(data).encode('utf-8')
+        response = body if body is not None else json.dumps(data).encode('utf-8')
         handler.send_response(code)
         handler.send_header('Content-Type', 'application/json')
         handler.send_header('Content-Length', str(len(response)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
         handler.end_headers()
         handler.wfile.write(response)
     except Exception as e:
-        print(f"[-] Failed to send JSON response: {e}")
\ No newline at end of file
+        print(f"[-] Failed to send JSON response: {e}")
+
+def _send_not_modified(handler, headers):
+    try:
+        handler.send_response(304)
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.end_headers()
+    except Exception as e:
+        print(f"[-] Failed to send 304 response: {e}")
\ No newline at end of file
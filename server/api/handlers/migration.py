@@ -14,7 +14,8 @@ def handle_migrate(handler, body_data, server_gen):
         handler.send_response(200)
         handler.send_header('Content-Type', 'text/event-stream')
         handler.send_header('Cache-Control', 'no-cache')
-        handler.send_header('Connection', 'keep-alive')
+        # 事件流没有 Content-Length，以关闭连接表示结束
+        handler.send_header('Connection', 'close')
         handler.end_headers()
 
         def progress_callback(msg):
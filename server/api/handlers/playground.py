@@ -1,10 +1,11 @@
 import math
 from dao.factory import create_connection
 from dao.post_dao import MySQLPostDAO
-from dao.url_map_dao import MySQLUrlMapDAO
 from core.config import SERVER_CONFIG
+from core.url_manager import URLManager
+from core.search_index import SearchIndex
 from server.api.utils import send_error
-from server.api.handlers.utils import highlight_title, highlight_snippet
+from server.api.handlers.utils import highlight_title, highlight_window
 
 def handle_playground_request(handler, query_params):
     """处理 /playground 请求，支持搜索和分页"""
@@ -18,30 +19,39 @@ def handle_playground_request(handler, query_params):
     page_size = 15
     offset = (page - 1) * page_size
     
+    # 进程内索引已建好时优先使用，否则走 SQL (FULLTEXT / LIKE)
+    result = None
+    index = SearchIndex()
+    if keyword and index.ready:
+        result = index.search(keyword, offset, page_size)
+
+    # 查询完成后即归还连接，get_url_by_cid 未命中缓存时会自行借用连接
     conn = create_connection()
     try:
         post_dao = MySQLPostDAO(conn)
-        url_dao = MySQLUrlMapDAO(conn)
-        # 直接使用 SQL 模糊搜索
-        posts, total_count = post_dao.search_public_posts_paged(keyword, offset, page_size)
-        
-        host = SERVER_CONFIG.get("host", "127.0.0.1")
-        port = SERVER_CONFIG.get("port", 8080)
-        base_url = f"http://{host}:{port}"
-        
-        for p in posts:
-            rel_path = url_dao.get_url_by_cid(p['cid'])
-            if rel_path:
-                if not rel_path.startswith('/'):
-                    rel_path = '/' + rel_path
-                if not rel_path.endswith('.html'):
-                    rel_path += '.html'
-                p['url'] = f"{base_url}{rel_path}"
-            else:
-                p['url'] = f"{base_url}/post.html?cid={p['cid']}"
-                
+        if result is not None:
+            cids, total_count = result
+            posts = post_dao.get_public_posts_by_cids(cids, keyword)
+        else:
+            posts, total_count = post_dao.search_public_posts_paged(keyword, offset, page_size)
     finally:
         conn.close()
+
+    url_mgr = URLManager()
+    host = SERVER_CONFIG.get("host", "127.0.0.1")
+    port = SERVER_CONFIG.get("port", 8080)
+    base_url = f"http://{host}:{port}"
+
+    for p in posts:
+        rel_path = url_mgr.get_url_by_cid(p['cid'])
+        if rel_path:
+            if not rel_path.startswith('/'):
+                rel_path = '/' + rel_path
+            if not rel_path.endswith('.html'):
+                rel_path += '.html'
+            p['url'] = f"{base_url}{rel_path}"
+        else:
+            p['url'] = f"{base_url}/post.html?cid={p['cid']}"
     
     # 构建文章列表 HTML
     items_html = []
@@ -51,7 +61,7 @@ def handle_playground_request(handler, query_params):
         items_html.append('<div class="post-list">')
         for p in posts:
             display_title = highlight_title(p.get('title'), keyword)
-            display_snippet = highlight_snippet(p.get('context'), keyword)
+            display_snippet = highlight_window(p['snippet'], keyword, p['match_pos'], p['context_length'])
             
             item = f"""
             <div class="post-item-container playground-item">
@@ -105,10 +115,12 @@ def handle_playground_request(handler, query_params):
             modal_extra=""
         )
         
+        body = full_html.encode('utf-8')
         handler.send_response(200)
         handler.send_header('Content-type', 'text/html; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
         handler.end_headers()
-        handler.wfile.write(full_html.encode('utf-8'))
+        handler.wfile.write(body)
         return True
     except Exception as e:
         send_error(handler, f"Template Error: {str(e)}")
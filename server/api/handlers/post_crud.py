@@ -2,42 +2,39 @@ from urllib.parse import parse_qs
 from dao.factory import create_connection
 from dao.post_dao import MySQLPostDAO
 from dao.user_dao import MySQLUserDAO
-from dao.url_map_dao import MySQLUrlMapDAO
 from core.post import post_create, post_delete, post_get_full, post_update_content, post_set_public
 from core.auth import verify_token
+from core.url_manager import URLManager
 from server.api.utils import send_json, send_error
 from server.api.handlers.utils import get_token
 
 def force_sync_post(server_gen, cid: str, user_id: int):
     if not server_gen: return
 
+    # 读取完成后立即归还连接: 下面的生成步骤会各自借用连接，嵌套持有会让并发请求耗尽连接池
     conn = create_connection()
     try:
         post_dao = MySQLPostDAO(conn)
-        title = post_dao.get_field(cid, "title")
-        category = post_dao.get_field(cid, "category")
-        date = post_dao.get_field(cid, "date")
-        context = post_dao.get_field(cid, "context")
-        desc = post_dao.get_field(cid, "description")
-        is_public = post_dao.get_field(cid, "is_public")
+        row = post_dao.get_fields(cid, ("title", "category", "date", "context", "description", "is_public"))
+        if not row: return
         
         post_data = {
-            "cid": cid, "title": title, "category": category,
-            "date": str(date), "context": context, "description": desc,
-            "is_public": bool(is_public)
+            "cid": cid, "title": row["title"], "category": row["category"],
+            "date": str(row["date"]), "context": row["context"], "description": row["description"],
+            "is_public": bool(row["is_public"])
         }
         
         user_dao = MySQLUserDAO(conn)
         user = user_dao.get_user_by_id(user_id)
         if not user: return
-        
-        print(f"[Sync] Force generating files for {cid}...")
-        server_gen.sync_post_file(post_data, user.username)
-        server_gen.sync_user_index(user_id)
-        server_gen.sync_playground()
     finally:
         conn.close()
 
+    print(f"[Sync] Force generating files for {cid}...")
+    server_gen.sync_post_file(post_data, user.username)
+    server_gen.sync_user_index(user_id)
+    server_gen.sync_playground()
+
 def force_sync_delete(server_gen, cid: str, user_id: int):
     if not server_gen: return
     print(f"[Sync] Force removing files for {cid}...")
@@ -71,13 +68,7 @@ def handle_update(handler, body_data, server_gen):
         ):
             force_sync_post(server_gen, cid, user_id)
             
-            target_url = None
-            conn = create_connection()
-            try:
-                map_dao = MySQLUrlMapDAO(conn)
-                target_url = map_dao.get_url_by_cid(cid)
-            finally:
-                conn.close()
+            target_url = URLManager().get_url_by_cid(cid)
             
             send_json(handler, {'status': 'ok', 'url': target_url})
         else:
@@ -11,45 +11,25 @@ def get_token(handler):
         except: pass
     return token
 
-def highlight_snippet(text, keyword, context_len=100):
+def highlight_window(snippet, keyword, match_pos, context_length, context_len=100):
     """
-    在一段文字中间显示匹配关键词，前后保留 context_len 长度。
-    关键词加粗加蓝。
+    渲染由 SQL 截取好的摘要窗口 (见 dao.post_dao._snippet_columns): 首个匹配前后各保留 context_len 个字符，
+    窗口外还有正文时加省略号，关键词加粗加蓝。
+    match_pos 为首个匹配在正文中的位置 (从 1 开始，0 表示未命中)，context_length 为正文总字符数。
     """
-    if text is None:
-        text = ""
+    snippet = snippet or ""
+    if not keyword or match_pos <= 0:
+        return snippet + "..." if context_length > len(snippet) else snippet
 
-    if not keyword:
-        # 如果没有搜索内容就按照现在原来的显示方法显示 (前200字符)
-        return text[:200] + "..." if len(text) > 200 else text
-
-    # 模糊匹配 (忽略大小写)
-    match = re.search(re.escape(keyword), text, re.IGNORECASE)
-    if not match:
-        # 没匹配到（可能是匹配了标题），默认显示开头
-        return text[:200] + "..." if len(text) > 200 else text
-
-    start, end = match.span()
-    
-    # 计算截取范围，确保匹配项居中
-    clip_start = max(0, start - context_len)
-    clip_end = min(len(text), end + context_len)
-    
-    snippet = text[clip_start:clip_end]
-    
-    # 加上省略号
+    clip_start = max(0, match_pos - 1 - context_len)
     prefix = "..." if clip_start > 0 else ""
-    suffix = "..." if clip_end < len(text) else ""
-    
-    # 在截取后的片段中进行高亮替换
-    # 使用 style="color: #1a0dab; font-weight: bold;"
+    suffix = "..." if clip_start + len(snippet) < context_length else ""
     highlighted = re.sub(
         f"({re.escape(keyword)})", 
         r'<span style="color: #1a0dab; font-weight: bold;">\1</span>', 
         snippet, 
         flags=re.IGNORECASE
     )
-    
     return f"{prefix}{highlighted}{suffix}"
 
 def highlight_title(title, keyword):
@@ -4,11 +4,13 @@ def send_json(handler, data: dict, status: int = 200):
     """
     通用 JSON 响应辅助函数
     """
+    body = json.dumps(data).encode()
     handler.send_response(status)
     handler.send_header('Content-type', 'application/json')
+    handler.send_header('Content-Length', str(len(body)))
     handler.send_header('Access-Control-Allow-Origin', '*')
     handler.end_headers()
-    handler.wfile.write(json.dumps(data).encode())
+    handler.wfile.write(body)
 
 def send_error(handler, message: str, status: int = 400):
     """
@@ -0,0 +1,228 @@
+import asyncio
+import http.client
+import io
+import json
+import os
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from core.config import SERVER_CONFIG
+from server import manager
+from verification import manager as verify_manager
+
+# 请求行 + 请求头的最大字节数
+MAX_HEADER_BYTES = 64 * 1024
+# SSE 会话等待的超时秒数，与线程模式下 session_wait 的 timeout 一致
+SESSION_WATCH_TIMEOUT = 120
+
+class _LoopWriter:
+    """
+    供工作线程使用的 wfile: 每次 write 都交给事件循环写出并等待 drain，
+    既保证输出顺序，也让慢客户端对工作线程形成背压。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, writer: asyncio.StreamWriter):
+        self._loop = loop
+        self._writer = writer
+
+    async def _write(self, data: bytes):
+        if self._writer.is_closing():
+            raise ConnectionResetError("Client disconnected")
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def write(self, data) -> int:
+        asyncio.run_coroutine_threadsafe(self._write(bytes(data)), self._loop).result()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    async def _sendfile(self, f, offset: int, count: int):
+        await self._writer.drain()
+        await self._loop.sendfile(self._writer.transport, f, offset, count)
+
+    def sendfile(self, f, offset: int, count: int):
+        asyncio.run_coroutine_threadsafe(self._sendfile(f, offset, count), self._loop).result()
+
+class AsyncRequestHandler(manager.Handler):
+    """
+    在工作线程中复用 manager.Handler 的 do_GET / do_POST / do_DELETE (含静态文件与全部 API 路由)。
+    请求已由事件循环解析完毕，这里不调用父类构造函数 (它会直接读写 socket)。
+    """
+
+    def __init__(self, loop, writer, client_address, command, path, request_version, headers, body, requests_handled):
+        self.directory = os.path.abspath(manager.WEB_ROOT)
+        self.client_address = client_address
+        self.command = command
+        self.path = path
+        self.request_version = request_version
+        self.requestline = f"{command} {path} {request_version}"
+        self.headers = headers
+        self.rfile = io.BytesIO(body)
+        self.wfile = _LoopWriter(loop, writer)
+        self.requests_handled = requests_handled
+        # 与 BaseHTTPRequestHandler.parse_request 相同的持久连接判定，响应头 (Connection: close) 可再将其置为 True
+        conntype = headers.get("Connection", "").lower()
+        if conntype == "close":
+            self.close_connection = True
+        elif conntype == "keep-alive" or request_version >= "HTTP/1.1":
+            self.close_connection = False
+        else:
+            self.close_connection = True
+
+    def sendfile(self, f, offset: int, count: int):
+        self.wfile.sendfile(f, offset, count)
+
+    def dispatch(self):
+        method = getattr(self, "do_" + self.command, None)
+        if method is None:
+            self.send_error(HTTPStatus.NOT_IMPLEMENTED, f"Unsupported method ({self.command!r})")
+            return
+        method()
+
+class AsyncHTTPServer:
+    """
+    asyncio 版 HTTP 前端，路由与线程模式相同。
+    - 连接的读取、请求解析、SSE 会话等待 (/api/auth/watch) 都在事件循环中完成
+    - 路由处理函数 (数据库访问、文件读取、迁移等阻塞操作) 在有界线程池中执行
+    持久连接的空闲超时与单连接请求数上限与线程模式相同 (SERVER_CONFIG)。
+    """
+
+    def __init__(self, port: int, workers: int | None = None):
+        self.port = port
+        self.workers = workers or SERVER_CONFIG["executor_workers"]
+        self.max_body = SERVER_CONFIG["max_request_body"]
+        self.keepalive_timeout = SERVER_CONFIG["keepalive_timeout"]
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="http-worker")
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """
+        返回 (command, path, version, headers, body)；连接在请求前关闭或空闲超时时返回 None，请求非法时抛出 ValueError。
+        """
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+        except asyncio.TimeoutError:
+            return None
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None
+            raise ValueError("Incomplete request")
+        except asyncio.LimitOverrunError:
+            raise ValueError("Request header too large")
+
+        request_line, _, header_bytes = head.partition(b"\r\n")
+        parts = request_line.decode("iso-8859-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise ValueError("Bad request line")
+        command, path, version = parts
+        headers = http.client.parse_headers(io.BytesIO(header_bytes))
+
+        length = int(headers.get("Content-Length", 0) or 0)
+        if length < 0 or length > self.max_body:
+            raise ValueError("Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return command, path, version, headers, body
+
+    @staticmethod
+    def _simple_response(writer: asyncio.StreamWriter, code: int, message: str):
+        body = json.dumps({"error": message}).encode("utf-8")
+        status = HTTPStatus(code)
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+
+    async def _session_watch(self, writer: asyncio.StreamWriter, path: str):
+        """与 manager.Handler.do_GET 中的 SSE 分支行为一致，但以协程等待会话状态。"""
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(path).query)
+        session_id = query.get("session_id", [None])[0]
+        if not session_id:
+            self._simple_response(writer, 400, "Missing session_id")
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n"
+            b"Access-Control-Allow-Origin: *\r\n\r\n"
+        )
+        await writer.drain()
+
+        loop = asyncio.get_running_loop()
+        changed = loop.create_future()
+
+        def on_change():
+            loop.call_soon_threadsafe(lambda: changed.done() or changed.set_result(None))
+
+        status = verify_manager.session_subscribe(session_id, on_change)
+        if status is None:
+            try:
+                await asyncio.wait_for(changed, SESSION_WATCH_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                verify_manager.session_unsubscribe(session_id, on_change)
+            status = verify_manager.session_get_status(session_id)
+            if status["status"] == "invalid":
+                status = {"status": "pending"}
+
+        writer.write(f"data: {json.dumps(status)}\n\n".encode("utf-8"))
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        loop = asyncio.get_running_loop()
+        requests_handled = 0
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ValueError as e:
+                    self._simple_response(writer, 400, str(e))
+                    return
+                if request is None:
+                    return
+                command, path, version, headers, body = request
+                requests_handled += 1
+
+                if command == "GET" and path.startswith("/api/auth/watch"):
+                    await self._session_watch(writer, path)
+                    return
+
+                handler = AsyncRequestHandler(
+                    loop, writer, peer, command, path, version, headers, body, requests_handled
+                )
+                await loop.run_in_executor(self._executor, handler.dispatch)
+                if handler.close_connection:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            print(f"[AsyncServer] Error handling {peer}: {e}")
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def serve(self):
+        server = await asyncio.start_server(
+            self._handle_connection, "0.0.0.0", self.port, limit=MAX_HEADER_BYTES
+        )
+        print(f"[+] Server started on port {self.port} (asyncio, {self.workers} workers).")
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        """阻塞运行直到 KeyboardInterrupt。"""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
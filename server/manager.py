@@ -7,7 +7,9 @@ import json
 import urllib.parse
 from generator.builder import StaticSiteGenerator
 from generator.watcher import DBWatcher
-from dao.factory import create_connection
+from dao.factory import create_connection, close_pool
+from dao import interact_dao
+from core.config import STATS_CONFIG, LIKE_BUFFER_CONFIG, SERVER_CONFIG
 from core.auth import verify_token
 from verification import manager as verify_manager
 
@@ -15,6 +17,8 @@ from verification import manager as verify_manager
 from server.api.auth_handler import handle_auth_routes
 from server.api.post_handler import handle_post_routes
 from server.api.handlers.interact import handle_interact_routes
+from server.api.utils import send_error
+from server.static_files import serve_static
 
 PID_FILE = "server.pid"
 WEB_ROOT = "public"
@@ -25,12 +29,36 @@ class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
     daemon_threads = True
 
 class Handler(http.server.SimpleHTTPRequestHandler):
+    # HTTP/1.1 持久连接: 每个响应都需带 Content-Length，或以 Connection: close 结束
+    protocol_version = "HTTP/1.1"
+    # 空闲连接的超时秒数 (作用于 socket 读写)
+    timeout = SERVER_CONFIG["keepalive_timeout"]
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=os.path.abspath(WEB_ROOT), **kwargs)
     
     def log_message(self, format, *args):
         pass 
 
+    def handle(self):
+        self.requests_handled = 0
+        super().handle()
+
+    def handle_one_request(self):
+        self.requests_handled += 1
+        super().handle_one_request()
+
+    def send_response(self, code, message=None):
+        super().send_response(code, message)
+        # 达到单连接请求数上限后通知客户端关闭连接
+        if self.requests_handled >= SERVER_CONFIG["max_keepalive_requests"] and not self.close_connection:
+            self.send_header('Connection', 'close')
+
+    def send_error(self, code, message=None, explain=None):
+        # 父类的错误页总会附带 Connection: close，这里提前标记，避免 send_response 重复添加
+        self.close_connection = True
+        super().send_error(code, message, explain)
+
     def _check_auth_cookie(self):
         if "Cookie" not in self.headers: return False
         try:
@@ -61,7 +89,8 @@ class Handler(http.server.SimpleHTTPRequestHandler):
                 self.send_response(200)
                 self.send_header('Content-Type', 'text/event-stream')
                 self.send_header('Cache-Control', 'no-cache')
-                self.send_header('Connection', 'keep-alive')
+                # 事件流没有 Content-Length，以关闭连接表示结束
+                self.send_header('Connection', 'close')
                 self.send_header('Access-Control-Allow-Origin', '*')
                 self.end_headers()
 
@@ -78,9 +107,19 @@ class Handler(http.server.SimpleHTTPRequestHandler):
         if handle_auth_routes(self, self.path, "GET", {}, SERVER_GEN): return
         if handle_post_routes(self, self.path, "GET", {}, SERVER_GEN): return
         if handle_interact_routes(self, self.path, "GET", {}, SERVER_GEN): return
-        
+
+        if serve_static(self): return
         super().do_GET()
 
+    def do_HEAD(self):
+        if serve_static(self, head_only=True): return
+        super().do_HEAD()
+
+    def sendfile(self, f, offset: int, count: int):
+        """由内核把文件区间直接写入 socket (不支持 sendfile 的平台上退回普通 send)"""
+        self.wfile.flush()
+        self.connection.sendfile(f, offset, count)
+
     def do_POST(self):
         content_length = int(self.headers.get('Content-Length', 0))
         body = self.rfile.read(content_length)
@@ -96,10 +135,13 @@ class Handler(http.server.SimpleHTTPRequestHandler):
             self.send_error(404, "API Not Found")
         except Exception as e:
             print(f"Server Error: {e}")
-            self.send_response(400)
-            self.wfile.write(json.dumps({'error': str(e)}).encode())
+            send_error(self, str(e), 400)
     
     def do_DELETE(self):
+        # 读掉可能携带的请求体，保证持久连接上的下一个请求从正确位置开始解析
+        content_length = int(self.headers.get('Content-Length', 0))
+        if content_length:
+            self.rfile.read(content_length)
         try:
             # DELETE 请求通常通过 URL 参数传递信息，这里传递空字典作为 data 即可
             # 依次尝试调用各模块的 DELETE 处理逻辑
@@ -109,8 +151,20 @@ class Handler(http.server.SimpleHTTPRequestHandler):
             self.send_error(404, "API Not Found")
         except Exception as e:
             print(f"Server Error: {e}")
-            self.send_response(500)
-            self.wfile.write(json.dumps({'error': str(e)}).encode())
+            send_error(self, str(e), 500)
+
+def _reconcile_stats_loop(stop_event: threading.Event) -> None:
+    """定期按 likes / comments 表校正 post_stats 计数器。"""
+    interval = STATS_CONFIG["reconcile_interval"]
+    while True:
+        try:
+            repaired = interact_dao.reconcile_post_stats(STATS_CONFIG["reconcile_batch_size"])
+            if repaired:
+                print(f"[Stats] Reconciled {repaired} post counters")
+        except Exception as e:
+            print(f"[Stats] Reconcile failed: {e}")
+        if stop_event.wait(interval):
+            return
 
 def server_start(port: int) -> None:
     global SERVER_GEN
@@ -132,12 +186,27 @@ def server_start(port: int) -> None:
     t_watcher = threading.Thread(target=watcher.start, args=(3,), daemon=True)
     t_watcher.start()
 
-    print(f"[+] Server started on port {port} (Multi-threaded).")
+    if LIKE_BUFFER_CONFIG["enabled"]:
+        interact_dao.enable_like_buffer(LIKE_BUFFER_CONFIG["flush_interval_ms"], LIKE_BUFFER_CONFIG["max_pending"])
+
+    stats_stop = threading.Event()
+    if STATS_CONFIG["reconcile_interval"]:
+        threading.Thread(target=_reconcile_stats_loop, args=(stats_stop,), daemon=True).start()
+
     try:
-        with ThreadingHTTPServer(("0.0.0.0", port), Handler) as httpd:
-            httpd.serve_forever()
+        if SERVER_CONFIG["mode"] == "asyncio":
+            from server.async_server import AsyncHTTPServer
+            AsyncHTTPServer(port).run()
+        else:
+            print(f"[+] Server started on port {port} (Multi-threaded).")
+            with ThreadingHTTPServer(("0.0.0.0", port), Handler) as httpd:
+                httpd.serve_forever()
     except KeyboardInterrupt:
         pass
     finally:
         watcher.stop()
+        stats_stop.set()
+        interact_dao.disable_like_buffer()
+        SERVER_GEN.close()
+        close_pool()
         if os.path.exists(PID_FILE): os.remove(PID_FILE)
\ No newline at end of file
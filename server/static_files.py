@@ -0,0 +1,175 @@
+import os
+from email.utils import parsedate_to_datetime
+from core.config import STATIC_CONFIG
+from core.static_meta import StaticMetaCache, etag_matches
+from generator.precompress import ENCODINGS, is_compressible
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    解析单个字节区间 (bytes=a-b / a- / -n)，返回闭区间 (start, end)。
+    格式无法识别或为多区间时返回 None (按完整文件响应)，区间超出文件时抛出 RangeNotSatisfiable。
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if start >= size:
+                raise RangeNotSatisfiable()
+            if end < start:
+                return None
+            return start, min(end, size - 1)
+        suffix = int(last)
+    except ValueError:
+        return None
+    if suffix <= 0 or size == 0:
+        raise RangeNotSatisfiable()
+    return max(size - suffix, 0), size - 1
+
+def _not_modified(handler, meta) -> bool:
+    inm = handler.headers.get("If-None-Match")
+    if inm is not None:
+        return etag_matches(inm, meta.etag)
+    ims = handler.headers.get("If-Modified-Since")
+    if ims:
+        try:
+            return meta.mtime <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+    return False
+
+def _parse_accept_encoding(header: str) -> tuple[set[str], set[str]]:
+    """解析 Accept-Encoding，返回 (q > 0 的编码集合, 以 q=0 明确拒绝的编码集合)"""
+    accepted, rejected = set(), set()
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if not coding:
+            continue
+        if q > 0:
+            accepted.add(coding)
+        else:
+            rejected.add(coding)
+    return accepted, rejected
+
+def _select_encoding(handler, path: str):
+    """
+    按 Accept-Encoding 选择生成器写出的压缩副本。
+    返回 ((副本路径, 元数据, 编码) 或 None, 是否存在压缩副本 —— 存在时响应需带 Vary)。
+    """
+    if not STATIC_CONFIG["precompress"] or not is_compressible(path):
+        return None, False
+    cache = StaticMetaCache()
+    accepted, rejected = _parse_accept_encoding(handler.headers.get("Accept-Encoding", ""))
+    vary = False
+    for encoding, suffix in ENCODINGS:
+        meta = cache.get(path + suffix)
+        if meta is None:
+            continue
+        vary = True
+        # 明确拒绝 (q=0) 优先于通配符
+        if encoding in rejected:
+            continue
+        if encoding in accepted or "*" in accepted:
+            return (path + suffix, meta, encoding), True
+    return None, vary
+
+def _resolve(handler):
+    """把请求路径映射到 (文件路径, 元数据)，目录请求映射到其中的 index.html。"""
+    cache = StaticMetaCache()
+    path = handler.translate_path(handler.path)
+    meta = cache.get(path)
+    if meta is None and handler.path.split("?", 1)[0].split("#", 1)[0].endswith("/"):
+        path = os.path.join(path, "index.html")
+        meta = cache.get(path)
+    return path, meta
+
+def serve_static(handler, head_only: bool = False) -> bool:
+    """
+    以 sendfile 发送 WEB_ROOT 下的静态文件，支持 ETag / Last-Modified 条件请求与单区间 Range。
+    客户端接受时发送预压缩的 .br / .gz 副本 (各编码的 ETag 不同，Range 作用于压缩后的字节)。
+    目录列表、需要补全斜杠的目录重定向与 404 等情况返回 False，由 SimpleHTTPRequestHandler 处理。
+    """
+    path, meta = _resolve(handler)
+    if meta is None:
+        return False
+    content_type = handler.guess_type(path)
+    encoding = None
+    variant, vary = _select_encoding(handler, path)
+    if variant is not None:
+        path, meta, encoding = variant
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return False
+
+    with f:
+        st = os.fstat(f.fileno())
+        if st.st_size != meta.size or st.st_mtime_ns != meta.mtime_ns:
+            # 缓存的元数据已过时 (文件刚被替换)，重新 stat 并计算摘要
+            cache = StaticMetaCache()
+            cache.forget(path)
+            meta = cache.get(path)
+            if meta is None:
+                return False
+
+        if _not_modified(handler, meta):
+            handler.send_response(304)
+            handler.send_header("ETag", meta.etag)
+            handler.send_header("Last-Modified", meta.last_modified)
+            if vary:
+                handler.send_header("Vary", "Accept-Encoding")
+            handler.end_headers()
+            return True
+
+        start, end = 0, meta.size - 1
+        status = 200
+        range_header = handler.headers.get("Range")
+        if_range = handler.headers.get("If-Range")
+        if range_header and (if_range is None or if_range.strip() in (meta.etag, meta.last_modified)):
+            try:
+                parsed = _parse_range(range_header, meta.size)
+            except RangeNotSatisfiable:
+                handler.send_response(416)
+                handler.send_header("Content-Range", f"bytes */{meta.size}")
+                handler.send_header("Content-Length", "0")
+                handler.end_headers()
+                return True
+            if parsed is not None:
+                start, end = parsed
+                status = 206
+
+        length = end - start + 1
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        if encoding:
+            handler.send_header("Content-Encoding", encoding)
+        if vary:
+            handler.send_header("Vary", "Accept-Encoding")
+        handler.send_header("Content-Length", str(length))
+        handler.send_header("ETag", meta.etag)
+        handler.send_header("Last-Modified", meta.last_modified)
+        handler.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            handler.send_header("Content-Range", f"bytes {start}-{end}/{meta.size}")
+        handler.end_headers()
+
+        if not head_only and length > 0:
+            handler.sendfile(f, start, length)
+    return True
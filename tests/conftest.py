@@ -0,0 +1,118 @@
+import os
+import pytest
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=()):
+        self.conn.statements.append(" ".join(sql.split()))
+        if self.conn.fail_on and self.conn.fail_on in sql:
+            raise RuntimeError("write failed")
+
+    def executemany(self, sql, seq):
+        self.execute(sql)
+
+    def fetchone(self):
+        self.conn.reads += 1
+        if self.conn.on_read:
+            self.conn.on_read()
+        return self.conn.row
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """
+    模拟 pymysql 连接: 记录执行的语句与 commit / rollback / close 调用。
+    fetchone 返回 row；fail_on 出现在语句中时 execute 抛出异常；on_read 在每次读取时调用。
+    """
+
+    def __init__(self):
+        self.row = None
+        self.statements = []
+        self.reads = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.fail_on = None
+        self.on_read = None
+        self.autocommit = False
+        self.server_status = 0
+        self.ping_ok = True
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_autocommit(self):
+        return self.autocommit
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.server_status = 0
+
+    def ping(self, reconnect=False):
+        if not self.ping_ok:
+            raise ConnectionError("gone")
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_conn():
+    return FakeConnection()
+
+
+@pytest.fixture
+def fake_connect():
+    """connect 函数，每次调用新建 FakeConnection，已建立的连接记录在 connect.created 中。"""
+    def connect():
+        conn = FakeConnection()
+        connect.created.append(conn)
+        return conn
+
+    connect.created = []
+    return connect
+
+
+class FakeHandler:
+    """记录响应状态、头部与 sendfile 发送的字节。"""
+
+    def __init__(self, root, path, headers=None):
+        self.root = root
+        self.path = path
+        self.headers = headers or {}
+        self.status = None
+        self.sent_headers = {}
+        self.body = b""
+
+    def translate_path(self, path):
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def guess_type(self, path):
+        return "text/html"
+
+    def send_response(self, code):
+        self.status = code
+
+    def send_header(self, name, value):
+        self.sent_headers[name] = value
+
+    def end_headers(self):
+        pass
+
+    def sendfile(self, f, offset, count):
+        f.seek(offset)
+        self.body += f.read(count)
+
+
+@pytest.fixture
+def make_handler():
+    """make_handler(root, path, headers) 创建 FakeHandler"""
+    return FakeHandler
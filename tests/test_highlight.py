@@ -0,0 +1,47 @@
+from server.api.handlers.utils import highlight_title, highlight_window
+
+HL = '<span style="color: #1a0dab; font-weight: bold;">{}</span>'
+
+# ==========================================
+# highlight_window
+# ==========================================
+class TestHighlightWindow:
+    def test_no_keyword(self):
+        """[L-01] 没有关键字时显示开头，正文更长时加省略号"""
+        assert highlight_window("abc", "", 0, 3) == "abc"
+        assert highlight_window("abc", "", 0, 500) == "abc..."
+
+    def test_no_match_in_body(self):
+        """[L-02] 正文未命中 (可能命中标题) 时同样显示开头"""
+        assert highlight_window("abc", "zz", 0, 500) == "abc..."
+
+    def test_match_near_start(self):
+        """[L-03] 窗口从正文开头开始时不加前置省略号"""
+        text = "hello world"
+        out = highlight_window(text, "world", 7, len(text))
+        assert out == "hello " + HL.format("world")
+
+    def test_match_in_middle(self):
+        """[L-04] 窗口在正文中间时两端都加省略号，关键词不区分大小写高亮"""
+        body = "x" * 300 + "Python" + "y" * 300
+        pos = body.index("Python") + 1
+        window = body[pos - 1 - 100:pos - 1 + 6 + 100]
+        out = highlight_window(window, "python", pos, len(body), context_len=100)
+        assert out.startswith("...")
+        assert out.endswith("...")
+        assert HL.format("Python") in out
+
+    def test_regex_characters_escaped(self):
+        """[L-05] 关键词中的正则特殊字符按字面匹配"""
+        out = highlight_window("a (b) c", "(b)", 3, 7)
+        assert out == "a " + HL.format("(b)") + " c"
+
+# ==========================================
+# highlight_title
+# ==========================================
+class TestHighlightTitle:
+    def test_title(self):
+        """[L-06] 标题中的关键词高亮，空标题返回空串"""
+        assert HL.format("Go") in highlight_title("Go tips", "go")
+        assert highlight_title(None, "go") == ""
+        assert highlight_title("Go", "") == "Go"
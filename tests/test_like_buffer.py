@@ -0,0 +1,115 @@
+import pytest
+import dao.like_buffer
+from dao.like_buffer import LikeWriteBuffer
+
+
+@pytest.fixture
+def db(fake_conn, monkeypatch):
+    """_read_state 返回固定的 (owner_id, like_count, liked) 行，所有借用共享同一个连接。"""
+    fake_conn.row = (1, 5, 0)
+    monkeypatch.setattr(dao.like_buffer, "create_connection", lambda: fake_conn)
+    return fake_conn
+
+
+@pytest.fixture
+def buffer(db):
+    # 不启动后台线程，由测试显式调用 flush
+    return LikeWriteBuffer(flush_interval=60)
+
+# ==========================================
+# Toggle
+# ==========================================
+class TestToggle:
+    def test_toggle_records_pending(self, buffer):
+        """[B-01] 切换只修改内存状态，返回叠加后的点赞数"""
+        assert buffer.toggle(2, "c1") == ("added", 6)
+        assert buffer.liked_state(2, "c1") is True
+        assert buffer.like_delta("c1") == 1
+
+    def test_toggle_twice_cancels(self, buffer):
+        """[B-02] 同一用户连续切换两次抵消，不留待写入条目"""
+        buffer.toggle(2, "c1")
+        assert buffer.toggle(2, "c1") == ("removed", 5)
+        assert buffer.liked_state(2, "c1") is None
+        assert buffer.like_delta("c1") == 0
+
+    def test_toggle_missing_post(self, buffer, db):
+        """[B-03] 文章不存在时返回 None"""
+        db.row = None
+        assert buffer.toggle(2, "c1") is None
+
+    def test_toggle_own_post(self, buffer):
+        """[B-04] 不能给自己的文章点赞"""
+        with pytest.raises(PermissionError):
+            buffer.toggle(1, "c1")
+
+    def test_toggle_retries_when_flush_interleaves(self, buffer, db):
+        """[B-05] 读取数据库期间有一批写入提交时重新读取"""
+        def bump_once():
+            db.on_read = None
+            buffer._generation += 1
+
+        db.on_read = bump_once
+        assert buffer.toggle(2, "c1") == ("added", 6)
+        assert db.reads == 2
+
+# ==========================================
+# Read merged
+# ==========================================
+class TestReadMerged:
+    def test_overlay_applied(self, buffer):
+        """[B-06] overlay 在数据库结果上叠加待写入的差值"""
+        buffer.toggle(2, "c1")
+        assert buffer.read_merged(lambda: 5, lambda n: n + buffer.like_delta("c1")) == 6
+
+    def test_retries_on_generation_change(self, buffer):
+        """[B-07] 读取期间 generation 变化时重新读取，结果不会重复计入已提交的差值"""
+        buffer.toggle(2, "c1")
+        calls = []
+
+        def read():
+            calls.append(1)
+            if len(calls) == 1:
+                # 模拟读取期间一批写入提交: 数据库已包含该点赞，差值清零
+                buffer.flush()
+                return 5
+            return 6
+
+        assert buffer.read_merged(read, lambda n: n + buffer.like_delta("c1")) == 6
+        assert len(calls) == 2
+
+# ==========================================
+# Flush
+# ==========================================
+class TestFlush:
+    def test_flush_commits_and_clears_delta(self, buffer, db):
+        """[B-08] 写入提交后清除差值并递增 generation，先锁定计数器行"""
+        buffer.toggle(2, "c1")
+        db.statements.clear()
+        generation = buffer._generation
+        assert buffer.flush() == 1
+
+        assert db.commits == 1
+        assert buffer.like_delta("c1") == 0
+        assert buffer.liked_state(2, "c1") is None
+        assert buffer._generation == generation + 1
+        assert db.statements[0].startswith("INSERT INTO post_stats (post_cid)")
+
+    def test_flush_failure_requeues(self, buffer, db):
+        """[B-09] 写入失败时条目放回 pending，差值保持不变"""
+        buffer.toggle(2, "c1")
+        db.fail_on = "INSERT IGNORE INTO likes"
+        assert buffer.flush() == 0
+
+        assert db.rollbacks == 1
+        assert buffer.liked_state(2, "c1") is True
+        assert buffer.like_delta("c1") == 1
+
+        db.fail_on = None
+        assert buffer.flush() == 1
+        assert buffer.like_delta("c1") == 0
+
+    def test_flush_empty(self, buffer, db):
+        """[B-10] 没有待写入条目时不借用连接"""
+        assert buffer.flush() == 0
+        assert db.statements == []
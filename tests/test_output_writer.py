@@ -0,0 +1,99 @@
+import os
+import pytest
+import generator.output_writer
+from core.static_meta import StaticMetaCache, content_digest
+from generator.output_writer import OutputWriter, atomic_write
+
+
+@pytest.fixture
+def writer():
+    StaticMetaCache().clear()
+    yield OutputWriter()
+    StaticMetaCache().clear()
+
+# ==========================================
+# atomic_write
+# ==========================================
+class TestAtomicWrite:
+    def test_replaces_file(self, tmp_path):
+        """[W-01] 写入完成后替换目标文件，不留临时文件"""
+        path = tmp_path / "a.html"
+        path.write_bytes(b"old")
+        atomic_write(str(path), b"new")
+        assert path.read_bytes() == b"new"
+        assert os.listdir(tmp_path) == ["a.html"]
+
+    def test_failure_keeps_old_file(self, tmp_path, monkeypatch):
+        """[W-02] 替换失败时保留旧文件并删除临时文件"""
+        path = tmp_path / "a.html"
+        path.write_bytes(b"old")
+
+        def broken_replace(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(generator.output_writer.os, "replace", broken_replace)
+        with pytest.raises(OSError):
+            atomic_write(str(path), b"new")
+        assert path.read_bytes() == b"old"
+        assert os.listdir(tmp_path) == ["a.html"]
+
+# ==========================================
+# Write if changed
+# ==========================================
+class TestOutputWriter:
+    def test_skip_unchanged(self, writer, tmp_path):
+        """[W-03] 内容未变时跳过写入，变化时重新写入"""
+        path = str(tmp_path / "a.html")
+        assert writer.write(path, b"one")
+        mtime = os.stat(path).st_mtime_ns
+        assert not writer.write(path, b"one")
+        assert os.stat(path).st_mtime_ns == mtime
+        assert writer.write(path, b"two")
+        with open(path, "rb") as f:
+            assert f.read() == b"two"
+
+    def test_existing_file_compared_by_content(self, writer, tmp_path):
+        """[W-04] 未登记的已有文件按内容判断是否需要写入"""
+        path = tmp_path / "a.html"
+        path.write_bytes(b"same")
+        assert not writer.write(str(path), b"same")
+
+    def test_external_change_detected(self, writer, tmp_path):
+        """[W-05] 文件被外部改动或删除后重新写入"""
+        path = tmp_path / "a.html"
+        assert writer.write(str(path), b"content")
+        path.write_bytes(b"tampered!")
+        assert writer.write(str(path), b"content")
+        path.unlink()
+        assert writer.write(str(path), b"content")
+        assert path.read_bytes() == b"content"
+
+    def test_records_etag(self, writer, tmp_path):
+        """[W-06] 写入后登记内容摘要，删除后丢弃"""
+        path = str(tmp_path / "a.html")
+        writer.write(path, b"etag me")
+        meta = StaticMetaCache().get(path)
+        assert meta.digest == content_digest(b"etag me")
+
+        assert writer.remove(path)
+        assert not writer.remove(path)
+        assert StaticMetaCache().get(path) is None
+
+    def test_stats(self, writer, tmp_path):
+        """[W-07] take_stats 返回上次调用以来的统计并清零"""
+        path = str(tmp_path / "a.html")
+        writer.write(path, b"12345")
+        writer.write(path, b"12345")
+        stats = writer.take_stats()
+        assert (stats.written_files, stats.written_bytes) == (1, 5)
+        assert (stats.skipped_files, stats.skipped_bytes) == (1, 5)
+        assert not writer.take_stats()
+
+    def test_clear_forgets_manifest(self, writer, tmp_path):
+        """[W-08] clear 后按磁盘内容重新判断"""
+        path = str(tmp_path / "a.html")
+        writer.write(path, b"x")
+        writer.clear()
+        assert not writer.write(path, b"x")
+        os.remove(path)
+        assert writer.write(path, b"x")
@@ -0,0 +1,177 @@
+import gc
+import threading
+import time
+import pytest
+from pymysql.constants import SERVER_STATUS
+from dao.pool import ConnectionPool, PoolTimeoutError
+
+
+@pytest.fixture
+def make_pool(fake_connect):
+    """创建连接池，连接由 conftest 的 fake_connect 建立。"""
+    pools = []
+
+    def _make(**kwargs):
+        kwargs.setdefault("checkout_timeout", 1)
+        pool = ConnectionPool(fake_connect, **kwargs)
+        pools.append(pool)
+        return pool
+
+    yield _make
+    for pool in pools:
+        pool.close()
+
+# ==========================================
+# Checkout / Release
+# ==========================================
+class TestCheckout:
+    def test_release_reuses_connection(self, make_pool):
+        """[P-01] 归还的连接被下一次借出复用"""
+        pool = make_pool(max_size=2)
+        conn = pool.acquire()
+        raw = conn.raw
+        conn.close()
+        assert pool.idle_count == 1
+
+        again = pool.acquire()
+        assert again.raw is raw
+        assert pool.size == 1
+        again.close()
+
+    def test_close_twice_is_noop(self, make_pool):
+        """[P-02] 重复 close 不会重复归还"""
+        pool = make_pool(max_size=2)
+        conn = pool.acquire()
+        conn.close()
+        conn.close()
+        assert pool.idle_count == 1
+        with pytest.raises(RuntimeError):
+            conn.raw
+
+    def test_unhealthy_idle_connection_replaced(self, make_pool):
+        """[P-03] 空闲过久且 ping 失败的连接被丢弃并重新建立"""
+        pool = make_pool(max_size=1, ping_interval=0)
+        conn = pool.acquire()
+        stale = conn.raw
+        conn.close()
+        stale.ping_ok = False
+
+        fresh = pool.acquire()
+        assert fresh.raw is not stale
+        assert stale.closed
+        assert pool.size == 1
+        fresh.close()
+
+# ==========================================
+# Timeout
+# ==========================================
+class TestTimeout:
+    def test_acquire_times_out_when_exhausted(self, make_pool):
+        """[P-04] 池满且无人归还时在超时后抛出 PoolTimeoutError"""
+        pool = make_pool(max_size=1)
+        held = pool.acquire()
+        started = time.monotonic()
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire(timeout=0.05)
+        assert time.monotonic() - started >= 0.05
+        held.close()
+
+    def test_waiter_wakes_on_release(self, make_pool):
+        """[P-05] 等待中的借用者在连接归还后立即取得连接"""
+        pool = make_pool(max_size=1)
+        held = pool.acquire()
+        result = {}
+
+        def waiter():
+            conn = pool.acquire(timeout=2)
+            result["raw"] = conn.raw
+            conn.close()
+
+        t = threading.Thread(target=waiter)
+        t.start()
+        time.sleep(0.05)
+        raw = held.raw
+        held.close()
+        t.join(2)
+        assert result["raw"] is raw
+
+# ==========================================
+# Release on GC
+# ==========================================
+class TestGarbageCollection:
+    def test_leaked_connection_frees_slot(self, make_pool):
+        """[P-06] 未 close 就被回收的连接释放池容量"""
+        pool = make_pool(max_size=1)
+        conn = pool.acquire()
+        raw = conn.raw
+        del conn
+        gc.collect()
+
+        assert raw.closed
+        assert pool.size == 0
+        pool.acquire(timeout=0.05).close()
+
+# ==========================================
+# Rollback on release
+# ==========================================
+class TestRollback:
+    def test_rollback_when_transaction_open(self, make_pool):
+        """[P-07] 归还时回滚未结束的事务"""
+        pool = make_pool(max_size=1)
+        conn = pool.acquire()
+        conn.raw.server_status = SERVER_STATUS.SERVER_STATUS_IN_TRANS
+        raw = conn.raw
+        conn.close()
+        assert raw.rollbacks == 1
+
+    def test_no_rollback_without_transaction(self, make_pool):
+        """[P-08] 没有未结束事务或处于自动提交模式时省去 ROLLBACK"""
+        pool = make_pool(max_size=1)
+        conn = pool.acquire()
+        raw = conn.raw
+        conn.close()
+        assert raw.rollbacks == 0
+
+        conn = pool.acquire()
+        raw.autocommit = True
+        raw.server_status = SERVER_STATUS.SERVER_STATUS_IN_TRANS
+        conn.close()
+        assert raw.rollbacks == 0
+
+    def test_failed_rollback_discards_connection(self, make_pool):
+        """[P-09] ROLLBACK 失败的连接被关闭而不是放回池中"""
+        pool = make_pool(max_size=1)
+        conn = pool.acquire()
+        raw = conn.raw
+        raw.server_status = SERVER_STATUS.SERVER_STATUS_IN_TRANS
+
+        def broken_rollback():
+            raise ConnectionError("lost")
+
+        raw.rollback = broken_rollback
+        conn.close()
+        assert raw.closed
+        assert pool.size == 0
+        assert pool.idle_count == 0
+
+# ==========================================
+# Close
+# ==========================================
+class TestClose:
+    def test_close_pool(self, make_pool):
+        """[P-10] 关闭连接池: 空闲连接立即关闭，借出的连接归还时关闭，之后无法借出"""
+        pool = make_pool(max_size=2)
+        idle = pool.acquire()
+        borrowed = pool.acquire()
+        idle_raw, borrowed_raw = idle.raw, borrowed.raw
+        idle.close()
+
+        pool.close()
+        assert idle_raw.closed
+        assert not borrowed_raw.closed
+
+        borrowed.close()
+        assert borrowed_raw.closed
+        assert pool.size == 0
+        with pytest.raises(RuntimeError):
+            pool.acquire()
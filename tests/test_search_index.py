@@ -0,0 +1,112 @@
+import pytest
+from core.search_index import SearchIndex, tokenize
+
+
+@pytest.fixture
+def index():
+    SearchIndex._instance = None
+    idx = SearchIndex()
+    yield idx
+    SearchIndex._instance = None
+
+
+def post(cid, title="", context="", description="", is_public=True):
+    return {"cid": cid, "title": title, "description": description, "context": context, "is_public": is_public}
+
+# ==========================================
+# Tokenize
+# ==========================================
+class TestTokenize:
+    def test_latin_words(self):
+        """[I-01] 拉丁词小写后整体作为词项"""
+        assert tokenize("Hello, World-2026!") == ["hello", "world", "2026"]
+
+    def test_cjk_bigrams(self):
+        """[I-02] CJK 片段切为相邻两字的 bigram，单字片段保留单字"""
+        assert tokenize("全文检索") == ["全文", "文检", "检索"]
+        assert tokenize("中 python") == ["中", "python"]
+
+    def test_empty(self):
+        """[I-03] 空文本没有词项"""
+        assert tokenize("") == []
+        assert tokenize(None) == []
+
+# ==========================================
+# Search
+# ==========================================
+class TestSearch:
+    def test_and_semantics(self, index):
+        """[I-04] 多个词项取交集"""
+        index.update_post(post("a", "python tips", "web"))
+        index.update_post(post("b", "python", "systems"))
+        assert index.search("python web") == (["a"], 1)
+
+    def test_bm25_prefers_higher_tf_and_title(self, index):
+        """[I-05] 词频更高、命中标题的文章排在前面"""
+        index.update_post(post("body", "notes", "rust is here"))
+        index.update_post(post("title", "rust", "notes here"))
+        index.update_post(post("other", "misc", "nothing"))
+        cids, total = index.search("rust")
+        assert total == 2
+        assert cids == ["title", "body"]
+
+    def test_cjk_query(self, index):
+        """[I-06] CJK 查询按 bigram 匹配"""
+        index.update_post(post("a", "全文检索入门"))
+        index.update_post(post("b", "检查清单"))
+        assert index.search("检索") == (["a"], 1)
+        assert index.search("中") is None
+
+    def test_paging(self, index):
+        """[I-07] offset / limit 分页，total 为命中总数"""
+        for i in range(5):
+            index.update_post(post(f"p{i}", "guide", "x " * i))
+        cids, total = index.search("guide", offset=2, limit=2)
+        assert total == 5
+        assert len(cids) == 2
+
+    def test_latin_prefix(self, index):
+        """[I-08] 拉丁词按前缀匹配，与 SQL 的子串匹配一致"""
+        index.update_post(post("a", "python tips"))
+        index.update_post(post("b", "pythonic code"))
+        cids, total = index.search("pyth")
+        assert total == 2
+        assert sorted(cids) == ["a", "b"]
+        assert index.search("pythonic") == (["b"], 1)
+
+    def test_unmatched_latin_falls_back(self, index):
+        """[I-09] 拉丁词不是任何词项的前缀时交给 SQL (可能是词中间的子串)"""
+        index.update_post(post("a", "python"))
+        assert index.search("ytho") is None
+
+    def test_update_replaces_document(self, index):
+        """[I-10] 更新文章后只能按新内容检索"""
+        index.update_post(post("a", "golang"))
+        index.update_post(post("a", "haskell"))
+        assert index.search("haskell") == (["a"], 1)
+        assert index.search("golang") == ([], 0)
+        assert len(index) == 1
+
+# ==========================================
+# Privatization / removal
+# ==========================================
+class TestRemoval:
+    def test_private_post_removed(self, index):
+        """[I-11] 文章转为私有后从索引中移除"""
+        index.update_post(post("a", "secret plan"))
+        index.update_post(post("a", "secret plan", is_public=False))
+        assert len(index) == 0
+        assert index.search("secret") == ([], 0)
+
+    def test_compaction_keeps_results(self, index):
+        """[I-12] 压缩失效文档后检索结果不变"""
+        index.COMPACT_MIN = 1
+        for i in range(4):
+            index.update_post(post(f"p{i}", "kotlin", f"n{i}"))
+        index.remove_post("p0")
+        index.remove_post("p1")
+        assert index._dead == 0
+        cids, total = index.search("kotlin")
+        assert total == 2
+        assert sorted(cids) == ["p2", "p3"]
+        assert index.search("n3") == (["p3"], 1)
@@ -0,0 +1,150 @@
+import gzip
+import pytest
+from core.static_meta import StaticMetaCache, content_digest, etag_matches
+from server.static_files import (
+    RangeNotSatisfiable, _parse_accept_encoding, _parse_range, serve_static
+)
+
+
+@pytest.fixture
+def site(tmp_path, make_handler):
+    """写出 page.html 及其 .gz 副本，并登记到 StaticMetaCache；产出以站点目录为根的 handler 工厂。"""
+    cache = StaticMetaCache()
+    cache.clear()
+    page = tmp_path / "page.html"
+    data = b"<html>" + b"hello static world " * 40 + b"</html>"
+    page.write_bytes(data)
+    cache.record(str(page), content_digest(data))
+    gz = gzip.compress(data, mtime=0)
+    (tmp_path / "page.html.gz").write_bytes(gz)
+    cache.record(str(page) + ".gz", content_digest(gz))
+    yield lambda path, headers=None: make_handler(str(tmp_path), path, headers), data, gz
+    cache.clear()
+
+# ==========================================
+# Range parsing
+# ==========================================
+class TestParseRange:
+    def test_ranges(self):
+        """[H-01] bytes=a-b / a- / -n"""
+        assert _parse_range("bytes=0-9", 100) == (0, 9)
+        assert _parse_range("bytes=90-", 100) == (90, 99)
+        assert _parse_range("bytes=-10", 100) == (90, 99)
+        assert _parse_range("bytes=50-500", 100) == (50, 99)
+
+    def test_ignored(self):
+        """[H-02] 无法识别或多区间时按完整文件响应"""
+        assert _parse_range("items=0-9", 100) is None
+        assert _parse_range("bytes=0-1,5-6", 100) is None
+        assert _parse_range("bytes=9-0", 100) is None
+        assert _parse_range("bytes=x-y", 100) is None
+
+    def test_unsatisfiable(self):
+        """[H-03] 起点超出文件或后缀长度为 0 时 416"""
+        with pytest.raises(RangeNotSatisfiable):
+            _parse_range("bytes=100-", 100)
+        with pytest.raises(RangeNotSatisfiable):
+            _parse_range("bytes=-0", 100)
+
+# ==========================================
+# Accept-Encoding
+# ==========================================
+class TestAcceptEncoding:
+    def test_parse(self):
+        """[H-04] 区分接受与以 q=0 明确拒绝的编码"""
+        accepted, rejected = _parse_accept_encoding("gzip;q=0, br, *;q=0.1, deflate;q=bad")
+        assert accepted == {"br", "*"}
+        assert rejected == {"gzip", "deflate"}
+
+    def test_gzip_selected(self, site):
+        """[H-05] 客户端接受 gzip 时发送 .gz 副本并带 Vary"""
+        handler, _, gz = site
+        h = handler("/page.html", {"Accept-Encoding": "gzip, deflate"})
+        assert serve_static(h)
+        assert h.status == 200
+        assert h.sent_headers["Content-Encoding"] == "gzip"
+        assert h.sent_headers["Vary"] == "Accept-Encoding"
+        assert h.body == gz
+
+    def test_rejection_beats_wildcard(self, site):
+        """[H-06] gzip;q=0 优先于通配符，发送未压缩内容"""
+        handler, data, _ = site
+        h = handler("/page.html", {"Accept-Encoding": "gzip;q=0, *;q=0.1"})
+        assert serve_static(h)
+        assert "Content-Encoding" not in h.sent_headers
+        assert h.sent_headers["Vary"] == "Accept-Encoding"
+        assert h.body == data
+
+# ==========================================
+# If-None-Match
+# ==========================================
+class TestEtagMatches:
+    def test_exact_tags(self):
+        """[H-14] 按逗号拆分后逐个比较，忽略 W/ 前缀，不做子串匹配"""
+        assert etag_matches('W/"a", "b"', '"b"')
+        assert etag_matches('W/"b"', '"b"')
+        assert etag_matches(" * ", '"b"')
+        assert not etag_matches('"ab"', '"b"')
+        assert not etag_matches('"xyz", "b"x', '"b"')
+        assert not etag_matches("", '"b"')
+
+# ==========================================
+# Conditional / Range responses
+# ==========================================
+class TestServeStatic:
+    def test_not_modified(self, site):
+        """[H-07] If-None-Match 命中时 304 且不发送正文"""
+        handler, data, _ = site
+        etag = f'"{content_digest(data)}"'
+        h = handler("/page.html", {"If-None-Match": f'W/"other", {etag}'})
+        assert serve_static(h)
+        assert h.status == 304
+        assert h.sent_headers["ETag"] == etag
+        assert h.body == b""
+
+    def test_if_modified_since(self, site):
+        """[H-08] 没有 If-None-Match 时按 If-Modified-Since 判断"""
+        handler, _, _ = site
+        h = handler("/page.html")
+        serve_static(h)
+        h2 = handler("/page.html", {"If-Modified-Since": h.sent_headers["Last-Modified"]})
+        assert serve_static(h2)
+        assert h2.status == 304
+
+    def test_partial_content(self, site):
+        """[H-09] Range 请求返回 206 与 Content-Range"""
+        handler, data, _ = site
+        h = handler("/page.html", {"Range": "bytes=6-10"})
+        assert serve_static(h)
+        assert h.status == 206
+        assert h.sent_headers["Content-Range"] == f"bytes 6-10/{len(data)}"
+        assert h.body == data[6:11]
+
+    def test_if_range_mismatch(self, site):
+        """[H-10] If-Range 与 ETag 不符时忽略 Range"""
+        handler, data, _ = site
+        h = handler("/page.html", {"Range": "bytes=0-0", "If-Range": '"stale"'})
+        assert serve_static(h)
+        assert h.status == 200
+        assert h.body == data
+
+    def test_range_not_satisfiable(self, site):
+        """[H-11] 区间超出文件时 416"""
+        handler, data, _ = site
+        h = handler("/page.html", {"Range": f"bytes={len(data)}-"})
+        assert serve_static(h)
+        assert h.status == 416
+        assert h.sent_headers["Content-Range"] == f"bytes */{len(data)}"
+
+    def test_head_only(self, site):
+        """[H-12] HEAD 只发送头部"""
+        handler, data, _ = site
+        h = handler("/page.html")
+        assert serve_static(h, head_only=True)
+        assert h.sent_headers["Content-Length"] == str(len(data))
+        assert h.body == b""
+
+    def test_missing_file(self, site):
+        """[H-13] 文件不存在时交给 SimpleHTTPRequestHandler"""
+        handler, _, _ = site
+        assert not serve_static(handler("/missing.html"))
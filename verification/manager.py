@@ -24,6 +24,18 @@ class VerificationSession:
         self.error_message = None
         # 用于异步通知状态变更的事件锁
         self.event = Event()
+        # 状态变更时调用的回调 (供 asyncio 服务端等待，不占用线程)
+        self.listeners = []
+
+def _notify_locked(session: VerificationSession):
+    """在持有 _sessions_lock 时调用: 唤醒等待的线程并执行回调"""
+    session.event.set()
+    listeners, session.listeners = session.listeners, []
+    for callback in listeners:
+        try:
+            callback()
+        except Exception as e:
+            print(f"[-] Session listener error: {e}")
 
 def _get_verifier(platform_or_url: str):
     target = platform_or_url.lower()
@@ -79,7 +91,7 @@ def session_save_cookies(session_id: str, cookies: list) -> bool:
     with _sessions_lock:
         session.status = "authenticated"
         # 唤醒等待的线程
-        session.event.set()
+        _notify_locked(session)
     return True
 
 def session_get_status(session_id: str) -> dict:
@@ -108,6 +120,26 @@ def session_wait(session_id: str, timeout: int = 60) -> dict:
     
     return {"status": session.status, "platform": session.platform, "error": session.error_message}
 
+def session_subscribe(session_id: str, callback) -> dict | None:
+    """
+    非阻塞版 session_wait: 会话仍为 pending 时登记回调并返回 None，状态变更时在变更线程中调用 callback()；
+    否则直接返回当前状态。
+    """
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+        if not session:
+            return {"status": "invalid"}
+        if session.status == "pending":
+            session.listeners.append(callback)
+            return None
+        return {"status": session.status, "platform": session.platform, "error": session.error_message}
+
+def session_unsubscribe(session_id: str, callback):
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+        if session and callback in session.listeners:
+            session.listeners.remove(callback)
+
 def session_close(session_id: str):
     with _sessions_lock:
         if session_id in _sessions: del _sessions[session_id]
@@ -119,5 +151,5 @@ def session_save_error(session_id: str, error_message: str):
         session.status = "failed"
         session.error_message = error_message
         # 唤醒等待的线程
-        session.event.set()
+        _notify_locked(session)
     return True
\ No newline at end of file